@@ -1,12 +1,30 @@
-from datetime import datetime, timezone
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from app.core.circuit_breaker import is_upstream_failure
+from app.core.config import settings
 from app.middleware.auth import get_current_user
-from app.core.supabase import supabase
-from app.schemas.dos import Do, DoCreate, DoUpdate, TimeUnit, DoType
+from app.repositories import repository
+from app.schemas.dos import (
+    ArchivedDo, Board, Do, DoCreate, DoHistory, DoSearchResult, DoTagsUpdate, DoTagsUpdateResult, DoUpdate,
+    FlowAnalytics, MAX_TAGS_PER_DO, TagCount, TimeUnit, DoType, normalize_tags,
+)
+from app.services.ancestry import LineageCycleError, check_new_parent, list_ancestors, list_descendants
+from app.services.archive import list_archived_dos, restore_archived_do
+from app.services.board import group_board_rows
+from app.services.dos_snapshot import first_page_read, remember_good, stale_copy, write_scope
+from app.services.flow_history import MAX_ANALYTICS_DAYS, do_history, flow_analytics
+from app.services.log_buffer import log_buffer
 from app.services.maintenance import get_count, inject_counts
 from app.services.lineage_colors import assign_color_to_lineage_chain, assign_shared_color_for_parent_child
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, split_page
+from app.services.search import expand_lineage, search_dos
+from app.services.transfer import NDJSON_MEDIA_TYPE, ImportProgressResponse, export_dos, import_dos
 
 router = APIRouter()
 
@@ -15,22 +33,414 @@ def _user_id(current_user: dict) -> str:
     return current_user["sub"]
 
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Set on list responses served from a stale copy while the database is unavailable:
+# when that copy was read.
+STALE_HEADER = "X-Stale-Since"
+
+# Fields of `Do` computed per request rather than read straight from a column,
+# mapped to the columns they are derived from.
+_COMPUTED_FIELD_SOURCES: dict[str, set[str]] = {
+    "completion_count": {"do_type", "time_unit", "user_id"},
+    "is_today_priority": {"priority_date"},
+}
+
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    """Validate a comma-separated `fields=` projection against the `Do` schema."""
+    if fields is None:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in Do.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return requested or None
+
+
+def _select_columns(requested: list[str] | None) -> str:
+    """Build the column list needed to serve a projection (plus the cursor key)."""
+    if requested is None:
+        return "*"
+    columns = {"id", "created_at"}
+    for field in requested:
+        if field in _COMPUTED_FIELD_SOURCES:
+            columns |= _COMPUTED_FIELD_SOURCES[field]
+        if field != "is_today_priority":
+            columns.add(field)
+    return ",".join(sorted(columns))
+
+
+def _parse_tags(tags: str | None) -> list[str] | None:
+    """Validate a comma-separated `tags=` filter."""
+    if tags is None:
+        return None
+    try:
+        return normalize_tags(tags.split(",")) or None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
 @router.get("", response_model=list[Do])
 async def list_dos(
+    response: Response,
     time_unit: TimeUnit | None = None,
+    completed: bool | None = None,
+    fields: str | None = Query(default=None, description="Comma-separated subset of Do fields to return"),
+    tags: str | None = Query(default=None, description="Comma-separated tags to filter by"),
+    match: str = Query(default="all", pattern="^(all|any)$", description="Whether dos need all of `tags` or any"),
+    cursor: str | None = Query(default=None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: dict = Depends(get_current_user),
 ):
-    query = supabase.table("dos").select("*").eq("user_id", _user_id(current_user))
-    if time_unit:
-        query = query.eq("time_unit", time_unit.value)
-    query = query.order("created_at", desc=False)
-    result = query.execute()
-    dos_data = result.data or []
-    inject_counts(dos_data, datetime.now(timezone.utc))
-    today_str = datetime.now(timezone.utc).date().isoformat()
+    """
+    List the current user's dos, one keyset page at a time.
+
+    Pages are ordered by `(created_at, id)`. When more rows exist, the cursor for the
+    next page is returned in the `X-Next-Cursor` response header. `fields=` limits the
+    response to the named fields, which keeps column views from downloading whole rows.
+    `tags=` keeps dos carrying all of the tags (or any of them, with `match=any`); the
+    filter runs in the database, on the index over `dos.tags`.
+
+    First pages that arrive while another first-page request for the same user is
+    running are cut from one snapshot of the user's dos shared between them (see
+    `app.services.dos_snapshot`), so the per-column requests a page load fires share one
+    `dos` query and one `inject_counts`. While the database is unavailable a first
+    page is served from its last good copy, flagged with `X-Stale-Since`.
+    """
+    requested = _parse_fields(fields)
+    tag_list = _parse_tags(tags)
+    user_id = _user_id(current_user)
+    page_args = (user_id, requested, time_unit, completed, cursor, limit)
+    page_kwargs = {"tags": tag_list, "match_all": match == "all"}
+
+    # Snapshots hold whole first pages; a tag filter goes to the database instead.
+    if cursor is not None or tag_list is not None:
+        dos_data, next_cursor = _query_dos_page(*page_args, **page_kwargs)
+        return _list_response(response, requested, dos_data, next_cursor)
+
+    stale_key = (user_id, "list", time_unit, completed, tuple(requested or ()), limit)
+    try:
+        async with first_page_read(user_id) as snapshot:
+            if snapshot is not None and snapshot.complete:
+                rows = [
+                    d for d in snapshot.rows
+                    if (time_unit is None or d["time_unit"] == time_unit.value)
+                    and (completed is None or d["completed"] == completed)
+                ]
+                dos_data, next_cursor = split_page(rows[:limit + 1], limit)
+            else:
+                # In a worker thread, so first pages arriving meanwhile see this one running.
+                dos_data, next_cursor = await asyncio.to_thread(_query_dos_page, *page_args, **page_kwargs)
+    except Exception as exc:
+        stale = stale_copy(stale_key) if is_upstream_failure(exc) else None
+        if stale is None:
+            raise
+        dos_data, next_cursor = stale.value
+        return _list_response(response, requested, dos_data, next_cursor, stale_since=stale.fetched_at)
+
+    remember_good(stale_key, (dos_data, next_cursor), datetime.now(timezone.utc))
+    return _list_response(response, requested, dos_data, next_cursor)
+
+
+def _list_response(
+    response: Response,
+    requested: list[str] | None,
+    dos_data: list[dict],
+    next_cursor: str | None,
+    *,
+    stale_since: datetime | None = None,
+):
+    """Return a `GET /dos` page with its cursor (and stale) headers, projected to `requested`."""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if stale_since is not None:
+        headers[STALE_HEADER] = stale_since.isoformat()
+    if requested is not None:
+        projected = [{f: d.get(f) for f in requested} for d in dos_data]
+        return JSONResponse(content=jsonable_encoder(projected), headers=headers)
+    response.headers.update(headers)
+    return dos_data
+
+
+def _query_dos_page(
+    user_id: str,
+    requested: list[str] | None,
+    time_unit: TimeUnit | None,
+    completed: bool | None,
+    cursor: str | None,
+    limit: int,
+    *,
+    tags: list[str] | None = None,
+    match_all: bool = True,
+) -> tuple[list[dict], str | None]:
+    """Fetch one keyset page of a user's dos straight from the database."""
+    try:
+        rows = repository.list_dos_page(
+            user_id,
+            columns=_select_columns(requested),
+            time_unit=time_unit.value if time_unit else None,
+            completed=completed,
+            cursor=cursor,
+            limit=limit,
+            tags=tags,
+            match_all=match_all,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    dos_data, next_cursor = split_page(rows, limit)
+
+    now = datetime.now(timezone.utc)
+    if requested is None or "completion_count" in requested:
+        inject_counts(dos_data, now)
+    today_str = now.date().isoformat()
     for d in dos_data:
         d["is_today_priority"] = (d.get("priority_date") == today_str)
-    return dos_data
+    return dos_data, next_cursor
+
+
+def _parse_units(units: str | None) -> list[str]:
+    """Validate a comma-separated `units=` list, defaulting to every time unit."""
+    if units is None:
+        return [u.value for u in TimeUnit]
+    parsed: list[str] = []
+    for raw in units.split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            unit = TimeUnit(raw).value
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown time unit: {raw}")
+        if unit not in parsed:
+            parsed.append(unit)
+    if not parsed:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No time units requested")
+    return parsed
+
+
+@router.get("/board", response_model=Board)
+async def get_board(
+    response: Response,
+    units: str | None = Query(default=None, description="Comma-separated time units, e.g. today,week,month"),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Return several board columns in one call.
+
+    Rows for every requested unit come from a single query (capped at `limit` per
+    column), per-column counts are aggregated in the database, and maintenance
+    counts are injected once for the whole board. While the database is unavailable
+    the last good copy of the same board is served, flagged with `X-Stale-Since`.
+    """
+    unit_list = _parse_units(units)
+    user_id = _user_id(current_user)
+    stale_key = (user_id, "board", tuple(unit_list), limit)
+
+    try:
+        rows = repository.board_page(user_id, unit_list, limit)
+        counts = repository.board_counts(user_id, unit_list)
+        now = datetime.now(timezone.utc)
+        inject_counts(rows, now)
+    except Exception as exc:
+        stale = stale_copy(stale_key) if is_upstream_failure(exc) else None
+        if stale is None:
+            raise
+        response.headers[STALE_HEADER] = stale.fetched_at.isoformat()
+        return stale.value
+
+    today_str = now.date().isoformat()
+    for d in rows:
+        d["is_today_priority"] = (d.get("priority_date") == today_str)
+
+    board = {"columns": group_board_rows(rows, counts, unit_list, limit)}
+    remember_good(stale_key, board, now)
+    return board
+
+
+@router.get("/search", response_model=DoSearchResult)
+async def search_my_dos(
+    q: str = Query(min_length=1, max_length=200),
+    expand: bool = Query(default=False, description="Also return dos on the same tree as any match"),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Search the current user's dos by title, best matches first.
+
+    With `expand=true`, `related` holds every other do on the same parent/child tree
+    as a match on this page.
+    """
+    user_id = _user_id(current_user)
+    # Fetch one extra row to learn whether another page exists.
+    matches = search_dos(user_id, q, limit=limit + 1, offset=offset)
+    next_offset = offset + limit if len(matches) > limit else None
+    matches = matches[:limit]
+    related = expand_lineage(user_id, matches) if expand else []
+
+    now = datetime.now(timezone.utc)
+    inject_counts(matches + related, now)
+    today_str = now.date().isoformat()
+    for d in matches + related:
+        d["is_today_priority"] = (d.get("priority_date") == today_str)
+
+    return {"matches": matches, "related": related, "next_offset": next_offset}
+
+
+@router.get("/archive", response_model=list[ArchivedDo])
+async def list_archive(
+    response: Response,
+    cursor: str | None = Query(default=None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+):
+    """Page through the current user's archived dos, in the same cursor format as `GET /dos`."""
+    try:
+        rows, next_cursor = list_archived_dos(_user_id(current_user), cursor=cursor, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
+@router.get("/tags", response_model=list[TagCount])
+async def list_tags(current_user: dict = Depends(get_current_user)):
+    """Every tag on the current user's dos with how many dos carry it, most used first, from one aggregate query."""
+    return repository.tag_counts(_user_id(current_user))
+
+
+@router.post("/tags", response_model=DoTagsUpdateResult)
+async def update_tags(
+    payload: DoTagsUpdate,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Add and remove tags on many dos in one write; dos the user doesn't own are ignored,
+    and dos that would end up with more than MAX_TAGS_PER_DO tags are left unchanged.
+    """
+    user_id = _user_id(current_user)
+    with write_scope(user_id):
+        return repository.update_tags(
+            user_id, [str(d) for d in payload.do_ids], payload.add, payload.remove, max_tags=MAX_TAGS_PER_DO
+        )
+
+
+@router.get("/export")
+async def export_my_dos(current_user: dict = Depends(get_current_user)):
+    """
+    Stream the current user's dos and maintenance logs as NDJSON, for backups and
+    for moving them to another account with `POST /dos/import`.
+
+    Rows are read a keyset page at a time, so the response starts at once and memory
+    stays flat however many dos there are.
+    """
+    return StreamingResponse(
+        export_dos(_user_id(current_user)),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="dos.ndjson"'},
+    )
+
+
+@router.post("/import")
+async def import_my_dos(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Import an NDJSON stream in the `GET /dos/export` format into the current user's dos.
+
+    The body is read as it arrives and written in batches. Imported dos get new ids,
+    with parent links remapped to them. The response is NDJSON too: a `progress` line
+    after each batch, then `done` with the totals, or `error` naming the line that
+    stopped the import (the batches before it are kept).
+    """
+    return ImportProgressResponse(import_dos(_user_id(current_user), request.stream()), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/analytics/flow", response_model=FlowAnalytics)
+async def get_flow_analytics(
+    days: int = Query(default=30, ge=1, le=MAX_ANALYTICS_DAYS, description="How many days back, today included"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    How the current user's dos flowed over the last `days` UTC days: transitions per
+    day and per `from_unit -> to_unit`, with the days spent in `from_unit` beforehand.
+
+    Served from the per-day rollups of the transition log, at most a few rows per day.
+    """
+    today = datetime.now(timezone.utc).date()
+    return flow_analytics(_user_id(current_user), today - timedelta(days=days - 1), today + timedelta(days=1))
+
+
+@router.post("/archive/{do_id}/restore", response_model=Do)
+async def restore_do(
+    do_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        # Postgres accepts any spelling of the uuid; match the restored rows on the canonical one.
+        do_id = str(uuid.UUID(do_id))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archived do not found")
+    with write_scope(_user_id(current_user)):
+        try:
+            restored = restore_archived_do(_user_id(current_user), do_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archived do not found")
+
+    do = next(d for d in restored if str(d["id"]) == do_id)
+    inject_counts([do], datetime.now(timezone.utc))
+    today_str = datetime.now(timezone.utc).date().isoformat()
+    do["is_today_priority"] = (do.get("priority_date") == today_str)
+    return do
+
+
+def _with_computed_fields(rows: list[dict]) -> list[dict]:
+    inject_counts(rows, datetime.now(timezone.utc))
+    today_str = datetime.now(timezone.utc).date().isoformat()
+    for row in rows:
+        row["is_today_priority"] = (row.get("priority_date") == today_str)
+    return rows
+
+
+@router.get("/{do_id}/ancestors", response_model=list[Do])
+async def get_ancestors(
+    do_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """A do's ancestors, nearest first (parent, grandparent, …, root)."""
+    try:
+        rows = list_ancestors(_user_id(current_user), do_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
+    return _with_computed_fields(rows)
+
+
+@router.get("/{do_id}/descendants", response_model=list[Do])
+async def get_descendants(
+    do_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """Every do below a do at any depth, shallowest first."""
+    try:
+        rows = list_descendants(_user_id(current_user), do_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
+    return _with_computed_fields(rows)
+
+
+@router.get("/{do_id}/history", response_model=DoHistory)
+async def get_history(
+    do_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """Each unit a do has flowed out of, oldest move first, with how long it sat there."""
+    user_id = _user_id(current_user)
+    do = repository.get_do(user_id, do_id, "id,time_unit,days_in_unit,flow_count")
+    if do is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
+    return do_history(user_id, do)
 
 
 @router.post("", response_model=Do, status_code=status.HTTP_201_CREATED)
@@ -50,21 +460,23 @@ async def create_do(
         insert_data["color_hex"] = payload.color_hex
     if payload.parent_id is not None:
         insert_data["parent_id"] = str(payload.parent_id)
+    if payload.tags:
+        insert_data["tags"] = payload.tags
 
-    result = supabase.table("dos").insert(insert_data).execute()
-    created = result.data[0]
+    with write_scope(user_id):
+        created = repository.insert_do(insert_data)
 
-    if payload.parent_id is not None:
-        try:
-            shared_color = assign_shared_color_for_parent_child(
-                parent_id=str(payload.parent_id),
-                child_id=str(created["id"]),
-                user_id=user_id,
-                child_color_hex=created.get("color_hex"),
-            )
-            created["color_hex"] = shared_color
-        except ValueError:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent do not found")
+        if payload.parent_id is not None:
+            try:
+                shared_color = assign_shared_color_for_parent_child(
+                    parent_id=str(payload.parent_id),
+                    child_id=str(created["id"]),
+                    user_id=user_id,
+                    child_color_hex=created.get("color_hex"),
+                )
+                created["color_hex"] = shared_color
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent do not found")
 
     return created
 
@@ -76,19 +488,15 @@ async def update_do(
     current_user: dict = Depends(get_current_user),
 ):
     # Verify ownership before updating
-    existing = (
-        supabase.table("dos")
-        .select("id,color_hex")
-        .eq("id", do_id)
-        .eq("user_id", _user_id(current_user))
-        .execute()
-    )
-    if not existing.data:
+    existing = repository.get_do(_user_id(current_user), do_id, "id,color_hex")
+    if existing is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
 
     updates = payload.model_dump(exclude_unset=True)
     if "completed_at" in updates and updates["completed_at"] is not None:
         updates["completed_at"] = updates["completed_at"].isoformat()
+    if "tags" in updates and updates["tags"] is None:
+        updates["tags"] = []
     if "time_unit" in updates:
         updates["time_unit"] = updates["time_unit"].value
         if payload.time_unit != TimeUnit.today:
@@ -99,38 +507,46 @@ async def update_do(
     if "parent_id" in updates:
         if updates["parent_id"] is not None:
             link_parent_id = str(updates["parent_id"])
-            link_child_color = updates.get("color_hex", existing.data[0].get("color_hex"))
+            link_child_color = updates.get("color_hex", existing.get("color_hex"))
             updates["parent_id"] = link_parent_id
+            try:
+                check_new_parent(_user_id(current_user), do_id, link_parent_id)
+            except LineageCycleError as exc:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent do not found")
         # None is left as None to unset the parent_id
 
     if "color_hex" in updates and updates["color_hex"] is not None:
         explicit_lineage_color = updates["color_hex"]
 
-    result = supabase.table("dos").update(updates).eq("id", do_id).execute()
-    do = result.data[0]
-
-    if link_parent_id is not None:
-        try:
-            shared_color = assign_shared_color_for_parent_child(
-                parent_id=link_parent_id,
-                child_id=do_id,
-                user_id=_user_id(current_user),
-                child_color_hex=link_child_color,
-            )
-            do["color_hex"] = shared_color
-        except ValueError:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent do not found")
-    elif explicit_lineage_color is not None:
-        try:
-            do["color_hex"] = assign_color_to_lineage_chain(
-                start_do_id=do_id,
-                user_id=_user_id(current_user),
-                color_hex=explicit_lineage_color,
-            )
-        except ValueError:
+    with write_scope(_user_id(current_user)):
+        do = repository.update_do(_user_id(current_user), do_id, updates)
+        if do is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
+
+        if link_parent_id is not None:
+            try:
+                shared_color = assign_shared_color_for_parent_child(
+                    parent_id=link_parent_id,
+                    child_id=do_id,
+                    user_id=_user_id(current_user),
+                    child_color_hex=link_child_color,
+                )
+                do["color_hex"] = shared_color
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent do not found")
+        elif explicit_lineage_color is not None:
+            try:
+                do["color_hex"] = assign_color_to_lineage_chain(
+                    start_do_id=do_id,
+                    user_id=_user_id(current_user),
+                    color_hex=explicit_lineage_color,
+                )
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
     if do["do_type"] == DoType.maintenance.value:
-        do["completion_count"] = get_count(do["id"], do["time_unit"], datetime.now(timezone.utc))
+        do["completion_count"] = get_count(_user_id(current_user), do["id"], do["time_unit"], datetime.now(timezone.utc))
     today_str = datetime.now(timezone.utc).date().isoformat()
     do["is_today_priority"] = (do.get("priority_date") == today_str)
     return do
@@ -141,25 +557,24 @@ async def log_maintenance_do(
     do_id: str,
     current_user: dict = Depends(get_current_user),
 ):
-    existing = (
-        supabase.table("dos")
-        .select("id,do_type")
-        .eq("id", do_id)
-        .eq("user_id", _user_id(current_user))
-        .execute()
-    )
-    if not existing.data:
+    existing = repository.get_do(_user_id(current_user), do_id)
+    if existing is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
-    if existing.data[0]["do_type"] != DoType.maintenance.value:
+    if existing["do_type"] != DoType.maintenance.value:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only maintenance dos can be logged")
 
-    supabase.table("maintenance_logs").insert({
-        "do_id": do_id,
-        "user_id": _user_id(current_user),
-    }).execute()
+    with write_scope(_user_id(current_user)):
+        if settings.LOG_BUFFER_ENABLED:
+            # Acknowledged once journaled; the count below already includes it.
+            log_buffer.enqueue(do_id, _user_id(current_user))
+        else:
+            repository.add_maintenance_log(do_id, _user_id(current_user))
 
-    do = supabase.table("dos").select("*").eq("id", do_id).execute().data[0]
-    do["completion_count"] = get_count(do_id, do["time_unit"], datetime.now(timezone.utc))
+    # Logging doesn't touch the do row, so the ownership read is still current.
+    do = existing
+    do["completion_count"] = get_count(_user_id(current_user), do_id, do["time_unit"], datetime.now(timezone.utc))
+    today_str = datetime.now(timezone.utc).date().isoformat()
+    do["is_today_priority"] = (do.get("priority_date") == today_str)
     return do
 
 
@@ -169,28 +584,23 @@ async def toggle_priority(
     current_user: dict = Depends(get_current_user),
 ):
     user_id = _user_id(current_user)
-    existing = (
-        supabase.table("dos")
-        .select("*")
-        .eq("id", do_id)
-        .eq("user_id", user_id)
-        .execute()
-    )
-    if not existing.data:
+    do_row = repository.get_do(user_id, do_id)
+    if do_row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
 
-    do_row = existing.data[0]
     today_str = datetime.now(timezone.utc).date().isoformat()
 
-    if do_row.get("priority_date") == today_str:
-        # Toggle off
-        result = supabase.table("dos").update({"priority_date": None}).eq("id", do_id).execute()
-    else:
-        # Clear any existing today-priority for this user, then set this one
-        supabase.table("dos").update({"priority_date": None}).eq("user_id", user_id).eq("priority_date", today_str).execute()
-        result = supabase.table("dos").update({"priority_date": today_str}).eq("id", do_id).execute()
+    with write_scope(user_id):
+        if do_row.get("priority_date") == today_str:
+            # Toggle off
+            do = repository.update_do(user_id, do_id, {"priority_date": None})
+        else:
+            # Clear any existing today-priority for this user, then set this one
+            repository.clear_priority(user_id, today_str)
+            do = repository.update_do(user_id, do_id, {"priority_date": today_str})
+    if do is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
 
-    do = result.data[0]
     inject_counts([do], datetime.now(timezone.utc))
     do["is_today_priority"] = (do.get("priority_date") == today_str)
     return do
@@ -201,14 +611,8 @@ async def delete_do(
     do_id: str,
     current_user: dict = Depends(get_current_user),
 ):
-    existing = (
-        supabase.table("dos")
-        .select("id")
-        .eq("id", do_id)
-        .eq("user_id", _user_id(current_user))
-        .execute()
-    )
-    if not existing.data:
+    if repository.get_do(_user_id(current_user), do_id, "id") is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Do not found")
 
-    supabase.table("dos").delete().eq("id", do_id).execute()
+    with write_scope(_user_id(current_user)):
+        repository.delete_do(_user_id(current_user), do_id)
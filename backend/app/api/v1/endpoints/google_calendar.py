@@ -1,8 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import date, datetime, time, timedelta, timezone
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from fastapi.responses import HTMLResponse
 
 from app.core.config import settings
 from app.middleware.auth import get_current_user
+from app.schemas.google_calendar import CalendarDay, CalendarSyncSummary, FreeSlots
+from app.services import free_slots
+from app.services.calendar_sync import (
+    list_events_for_day,
+    save_google_connection,
+    sync_is_stale,
+    sync_user_calendars,
+    sync_user_calendars_quietly,
+)
 from app.services.google_oauth import (
     build_google_auth_url,
     create_google_oauth_state,
@@ -11,6 +22,7 @@ from app.services.google_oauth import (
     google_oauth_configured,
     parse_google_oauth_state,
 )
+from app.services.google_tokens import google_tokens
 
 router = APIRouter()
 
@@ -29,6 +41,7 @@ async def google_calendar_connect(current_user: dict = Depends(get_current_user)
 
 @router.get("/callback", response_class=HTMLResponse)
 async def google_calendar_callback(
+    background_tasks: BackgroundTasks,
     code: str | None = Query(default=None),
     state: str | None = Query(default=None),
     error: str | None = Query(default=None),
@@ -69,17 +82,91 @@ async def google_calendar_callback(
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Google token exchange failed")
 
     profile = await fetch_google_userinfo(access_token=access_token)
+    if profile.get("sub"):
+        # Later calendar calls for this account start from a warm token cache.
+        google_tokens.prime(profile["sub"], token_payload)
+
+    try:
+        save_google_connection(user_id=state_payload["user_id"], profile=profile, token_payload=token_payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    # The first sync runs after the response is sent; the browser doesn't wait on it.
+    background_tasks.add_task(sync_user_calendars_quietly, state_payload["user_id"])
 
-    # Persistence is intentionally deferred to issue #19.
     html = f"""
     <html>
       <body style=\"font-family: sans-serif; padding: 24px;\">
-        <h1>Google Calendar connection verified</h1>
+        <h1>Google Calendar connected</h1>
         <p><strong>Status:</strong> OAuth callback succeeded.</p>
         <p><strong>Google account:</strong> {profile.get('email', 'unknown')}</p>
         <p><strong>Flow-Do user:</strong> {state_payload.get('user_id')}</p>
-        <p>Token persistence and connected-state storage are handled in the next implementation step.</p>
+        <p>Your calendars are syncing now. You can close this window.</p>
       </body>
     </html>
     """
     return HTMLResponse(content=html)
+
+
+@router.get("/events", response_model=CalendarDay)
+async def google_calendar_events(
+    background_tasks: BackgroundTasks,
+    date_: date | None = Query(default=None, alias="date", description="UTC day, defaults to today"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Return the user's calendar events for a day from the local event store.
+
+    This never waits on Google. When the stored events are stale, a background
+    incremental sync is started and `refreshing` is set so the client can refetch.
+    """
+    user_id = current_user["sub"]
+    now = datetime.now(timezone.utc)
+    day = date_ or now.date()
+
+    refreshing = sync_is_stale(user_id, now)
+    if refreshing:
+        background_tasks.add_task(sync_user_calendars_quietly, user_id)
+
+    return {"date": day, "events": list_events_for_day(user_id, day), "refreshing": refreshing}
+
+
+@router.get("/free-slots", response_model=FreeSlots)
+async def google_calendar_free_slots(
+    date_: date | None = Query(default=None, alias="date", description="UTC day, defaults to today"),
+    min_minutes: int = Query(default=15, ge=1, le=24 * 60),
+    from_time: time = Query(default=time(0, 0), description="Start of the schedulable part of the day (UTC)"),
+    to_time: time | None = Query(default=None, description="End of the schedulable part of the day (UTC), defaults to midnight"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Return the open intervals of a day, across all connected calendars, that are at least `min_minutes` long."""
+    user_id = current_user["sub"]
+    day = date_ or datetime.now(timezone.utc).date()
+    window_start = datetime.combine(day, from_time, tzinfo=timezone.utc)
+    window_end = (
+        datetime.combine(day, to_time, tzinfo=timezone.utc)
+        if to_time is not None
+        else datetime.combine(day + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    )
+    if window_end <= window_start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="to_time must be after from_time")
+
+    busy = free_slots.cached_busy_intervals(user_id, day, lambda: list_events_for_day(user_id, day))
+    slots = free_slots.free_intervals(busy, window_start, window_end, timedelta(minutes=min_minutes))
+    return {
+        "date": day,
+        "slots": [
+            {"start_at": start, "end_at": end, "minutes": int((end - start).total_seconds() // 60)}
+            for start, end in slots
+        ],
+    }
+
+
+@router.post("/sync", response_model=CalendarSyncSummary)
+async def google_calendar_sync(current_user: dict = Depends(get_current_user)):
+    """Run an incremental sync of the user's calendars now and wait for it."""
+    if not google_oauth_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Google OAuth is not configured",
+        )
+    return await sync_user_calendars(current_user["sub"])
@@ -1,8 +1,13 @@
 from fastapi import APIRouter
 
+from app.core.read_routing import read_router
+
 router = APIRouter()
 
 
 @router.get("")
 async def health_check():
-    return {"status": "ok", "service": "flowdo-api"}
+    body = {"status": "ok", "service": "flowdo-api"}
+    if read_router.enabled:
+        body["replica"] = read_router.status()
+    return body
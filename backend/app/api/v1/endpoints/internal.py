@@ -1,6 +1,8 @@
 import logging
 from fastapi import APIRouter, Header, HTTPException, status
 from app.core.config import settings
+from app.core.profiling import profiled
+from app.services.archive import run_archive
 from app.services.flow_up import run_flow_up
 
 router = APIRouter()
@@ -8,21 +10,50 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("/flow-up")
-def trigger_flow_up(x_cron_secret: str = Header(...)):
+def trigger_flow_up(x_cron_secret: str = Header(...), profile: bool = False):
     """
     Manually trigger the flow-up job.
     Protected by X-Cron-Secret header — not a user JWT.
     Used by external cron services (Render, GitHub Actions, etc.)
+    Pass ?profile=true to run it under the profiler (see app/core/profiling.py).
     """
     if not settings.CRON_SECRET or x_cron_secret != settings.CRON_SECRET:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
+    profile_id = None
     try:
-        summary = run_flow_up()
+        if profile:
+            with profiled("flow_up") as profile_id:
+                summary = run_flow_up()
+        else:
+            summary = run_flow_up()
     except Exception as e:
         logger.exception("flow-up endpoint: run_flow_up raised an unexpected error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e),
         )
-    return {"ok": True, "moved": summary}
+    response = {"ok": True, "moved": summary}
+    if profile_id:
+        response["profile_id"] = profile_id
+    return response
+
+
+@router.post("/archive")
+def trigger_archive(x_cron_secret: str = Header(...)):
+    """
+    Manually trigger archiving of long-completed dos.
+    Protected by X-Cron-Secret header, same as /flow-up.
+    """
+    if not settings.CRON_SECRET or x_cron_secret != settings.CRON_SECRET:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+    try:
+        archived = run_archive()
+    except Exception as e:
+        logger.exception("archive endpoint: run_archive raised an unexpected error")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e),
+        )
+    return {"ok": True, "archived": archived}
@@ -0,0 +1,95 @@
+"""
+Admission control for outbound Supabase calls.
+
+When `settings.DB_ADMISSION_ENABLED` is on, every PostgREST/Auth call made while
+serving a rate-limited API request passes through `db_admission.call()`:
+
+- at most `DB_MAX_CONCURRENCY` such calls run at once across the process; a call
+  beyond that fails immediately with `DatabaseOverloaded` (the API answers `503`
+  with `Retry-After`) instead of queueing behind a slow upstream;
+- a moving average of call latency is kept, and while it is above
+  `DB_SHED_LATENCY_MS` the limit drops to a quarter and `RateLimitMiddleware` turns
+  new requests away before they spend an auth call — enough still get through to
+  notice when latency recovers.
+
+Calls outside a limited request (scheduled jobs, the log flusher, internal routes)
+are counted but never refused.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from app.core.config import settings
+
+# Weight of the newest sample in the latency moving average.
+LATENCY_SMOOTHING = 0.2
+# Share of DB_MAX_CONCURRENCY still admitted while latency is over the threshold.
+DEGRADED_SHARE = 0.25
+
+# Set by RateLimitMiddleware for requests in a limited route group; inherited by
+# worker threads started with to_thread/run_in_threadpool.
+admission_applies: ContextVar[bool] = ContextVar("admission_applies", default=False)
+
+
+class DatabaseOverloaded(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Database is overloaded; retry later")
+        self.retry_after = retry_after
+
+
+class DbAdmission:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency = 0.0
+
+    @property
+    def latency_seconds(self) -> float:
+        return self._latency
+
+    def _degraded(self) -> bool:
+        return self._latency * 1000 > settings.DB_SHED_LATENCY_MS
+
+    def _limit(self) -> int:
+        limit = max(1, settings.DB_MAX_CONCURRENCY)
+        return max(1, math.floor(limit * DEGRADED_SHARE)) if self._degraded() else limit
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: roughly two upstream round trips, at least one."""
+        return max(1, math.ceil(self._latency * 2))
+
+    def should_shed(self) -> bool:
+        """True when upstream is slow and the reduced call budget is already in use."""
+        with self._lock:
+            return self._degraded() and self._in_flight >= self._limit()
+
+    @contextmanager
+    def call(self) -> Iterator[None]:
+        """Wrap one outbound database call; raises DatabaseOverloaded when it must be refused."""
+        enforce = settings.DB_ADMISSION_ENABLED and admission_applies.get()
+        with self._lock:
+            if enforce and self._in_flight >= self._limit():
+                raise DatabaseOverloaded(self.retry_after())
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                self._latency += LATENCY_SMOOTHING * (elapsed - self._latency)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._in_flight = 0
+            self._latency = 0.0
+
+
+db_admission = DbAdmission()
@@ -0,0 +1,121 @@
+"""
+Circuit breaker around outbound Supabase calls.
+
+When `settings.CIRCUIT_BREAKER_ENABLED` is on, every PostgREST/Auth call reports to
+`db_breaker`. A call fails if it raises, answers 5xx, or takes longer than
+`CIRCUIT_SLOW_CALL_MS`. After `CIRCUIT_FAILURE_THRESHOLD` failures in a row the
+circuit opens. While it is open, calls raise `CircuitOpen` straight away instead of
+tying up a worker thread until the timeout; the API answers `503` with `Retry-After`,
+and list endpoints serve their last good answer instead
+(`app.services.dos_snapshot`).
+
+After `CIRCUIT_OPEN_SECONDS`, the next call goes through as a probe while the others
+keep failing fast. A fast, successful probe closes the circuit; anything else opens
+it for another period.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Database circuit is open; retry later")
+        self.retry_after = retry_after
+
+
+@dataclass
+class CallOutcome:
+    # Set by the caller when the call returned but should still count as a failure (5xx).
+    failed: bool = False
+
+
+class CircuitBreaker:
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _retry_after(self) -> int:
+        remaining = self._opened_at + settings.CIRCUIT_OPEN_SECONDS - self._clock()
+        return max(1, math.ceil(remaining))
+
+    def _admit(self) -> bool:
+        """Let a call through, returning True if it is the probe; raises CircuitOpen otherwise."""
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            if self._state == OPEN and self._clock() - self._opened_at >= settings.CIRCUIT_OPEN_SECONDS:
+                self._state = HALF_OPEN
+                return True
+            raise CircuitOpen(self._retry_after())
+
+    def _record(self, *, failed: bool, probe: bool) -> None:
+        with self._lock:
+            if not failed:
+                if probe:
+                    logger.warning("circuit_breaker: probe succeeded, closing the database circuit")
+                self._state, self._failures = CLOSED, 0
+                return
+            self._failures += 1
+            if probe or (self._state == CLOSED and self._failures >= settings.CIRCUIT_FAILURE_THRESHOLD):
+                if self._state == CLOSED:
+                    logger.warning("circuit_breaker: %s failed database calls, opening the circuit", self._failures)
+                self._state, self._opened_at = OPEN, self._clock()
+
+    @contextmanager
+    def call(self) -> Iterator[CallOutcome]:
+        """Wrap one outbound database call; raises CircuitOpen while the circuit is open."""
+        outcome = CallOutcome()
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            yield outcome
+            return
+        probe = self._admit()
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.failed = True
+            raise
+        finally:
+            slow = (time.perf_counter() - start) * 1000 > settings.CIRCUIT_SLOW_CALL_MS
+            self._record(failed=outcome.failed or slow, probe=probe)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state, self._failures, self._opened_at = CLOSED, 0, 0.0
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """True for errors that mean Supabase is unreachable or shedding, not that the request was bad."""
+    if isinstance(exc, CircuitOpen):
+        return True
+    # httpx is only loaded once the Supabase client is; no need to import it here.
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(exc, httpx.TransportError)
+
+
+db_breaker = CircuitBreaker()
@@ -26,6 +26,74 @@ class Settings(BaseSettings):
     # Set this to a long random string. Generate one with: openssl rand -hex 32
     CRON_SECRET: str = ""
 
+    # Expose /metrics (Prometheus text format) and add Server-Timing headers.
+    # Off by default; when off, requests and Supabase calls carry no instrumentation.
+    METRICS_ENABLED: bool = False
+
+    # Opt-in request profiling. When enabled, a request is profiled if it sends an
+    # X-Profile header equal to PROFILE_SECRET (falls back to CRON_SECRET), or if it
+    # falls within PROFILE_SAMPLE_RATE (0.0–1.0). Stats are written to PROFILE_DIR.
+    PROFILE_ENABLED: bool = False
+    PROFILE_SECRET: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_DIR: str = "profiles"
+
+    # Per-user token-bucket rate limiting for /api/v1 (see app/core/rate_limit.py).
+    # RATE_LIMITS maps path prefixes under /api/v1 to "<requests per second>:<burst>"
+    # or "off"; the longest matching prefix wins and "default" covers everything else.
+    # RATE_LIMIT_BACKEND is "memory" or a "module:factory" returning a shared backend.
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMITS: dict[str, str] = {"default": "5:20", "/internal": "off", "/health": "off"}
+    RATE_LIMIT_BACKEND: str = "memory"
+
+    # Admission control for outbound Supabase calls made by rate-limited routes: at
+    # most DB_MAX_CONCURRENCY at once, and load is shed with 503 while their average
+    # latency is above DB_SHED_LATENCY_MS.
+    DB_ADMISSION_ENABLED: bool = False
+    DB_MAX_CONCURRENCY: int = 32
+    DB_SHED_LATENCY_MS: float = 1000.0
+
+    # Circuit breaker around Supabase calls (see app/core/circuit_breaker.py). After
+    # CIRCUIT_FAILURE_THRESHOLD failed or slower-than-CIRCUIT_SLOW_CALL_MS calls in a
+    # row, calls fail fast for CIRCUIT_OPEN_SECONDS and list endpoints serve stale
+    # snapshots. Calls time out after CIRCUIT_CALL_TIMEOUT_SECONDS while it is enabled.
+    CIRCUIT_BREAKER_ENABLED: bool = False
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_SLOW_CALL_MS: float = 5000.0
+    CIRCUIT_OPEN_SECONDS: float = 15.0
+    CIRCUIT_CALL_TIMEOUT_SECONDS: float = 10.0
+
+    # Write-behind ingestion for maintenance log taps. When enabled, a tap is
+    # acknowledged once it is fsynced to a journal in LOG_BUFFER_DIR (keep this on a
+    # persistent disk so a crash can be replayed), and taps reach maintenance_logs in
+    # batches every LOG_FLUSH_INTERVAL_SECONDS or once LOG_FLUSH_BATCH_SIZE are waiting.
+    LOG_BUFFER_ENABLED: bool = False
+    LOG_BUFFER_DIR: str = "log_buffer"
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LOG_FLUSH_BATCH_SIZE: int = 500
+
+    # Where dos, maintenance logs and the archive are stored (see app/repositories):
+    # "supabase" (PostgREST) or "sqlite" (an embedded database file at SQLITE_PATH,
+    # for single-node installs). Auth always goes through Supabase.
+    STORAGE_BACKEND: str = "supabase"
+    SQLITE_PATH: str = "flowdo.db"
+
+    # Optional read replica for the Supabase backend (see app/core/read_routing.py).
+    # When SUPABASE_READ_URL is set, reads go to it unless the user wrote within the
+    # last REPLICA_PIN_SECONDS (or the replica's lag, if longer), and the flow-up scan
+    # always reads from it. Replica lag is checked every REPLICA_LAG_CHECK_SECONDS;
+    # above REPLICA_MAX_LAG_SECONDS, or when unknown, user reads go to the primary.
+    SUPABASE_READ_URL: str = ""
+    REPLICA_PIN_SECONDS: float = 5.0
+    REPLICA_MAX_LAG_SECONDS: float = 10.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+
+    # How many partitions of a hash-partitioned dos table flow-up processes at once.
+    FLOW_UP_CONCURRENCY: int = 4
+
+    # Completed dos older than this many days are moved to dos_archive by the nightly job.
+    ARCHIVE_AFTER_DAYS: int = 30
+
     # Google Calendar OAuth configuration.
     # These are populated from backend/.env (or the deployed service environment).
     GOOGLE_CLIENT_ID: str = ""
@@ -33,5 +101,13 @@ class Settings(BaseSettings):
     GOOGLE_REDIRECT_URI: str = ""
     GOOGLE_OAUTH_STATE_SECRET: str = ""
 
+    # Google Calendar event sync.
+    # The API base URL can be pointed at a local fake Google server for development.
+    GOOGLE_API_BASE_URL: str = "https://www.googleapis.com"
+    # How many calendars are fetched from Google at once during a sync.
+    GOOGLE_SYNC_CONCURRENCY: int = 4
+    # Stored events older than this trigger a background re-sync when read.
+    GOOGLE_SYNC_STALE_AFTER_SECONDS: int = 300
+
 
 settings = Settings()
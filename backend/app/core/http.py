@@ -0,0 +1,63 @@
+"""
+Application-scoped outbound HTTP client.
+
+One pooled `httpx.AsyncClient` is shared by every outbound call (Google OAuth and
+Calendar today), so connections to a host are kept alive and reused instead of
+paying DNS, TCP and TLS setup per request. It is created on first use, so apps that
+never call Google don't import httpx/h2 at startup, and the FastAPI lifespan closes
+it on shutdown; tests can swap in a client built on a mock transport.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+
+# Per-call timeouts are set by each caller; these are the pool-wide defaults.
+DEFAULT_TIMEOUT_SECONDS = 20.0
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 5.0
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+_client: httpx.AsyncClient | None = None
+
+
+def create_http_client(transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    """Build a pooled HTTP/2 client; pass `transport` to route requests to a mock."""
+    import httpx
+
+    return httpx.AsyncClient(
+        http2=transport is None,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT_SECONDS, connect=DEFAULT_CONNECT_TIMEOUT_SECONDS),
+        transport=transport,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use outside the app lifespan (scripts, tests)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+def set_http_client(client: httpx.AsyncClient | None) -> None:
+    """Replace the shared client, e.g. with one built on `httpx.MockTransport` in tests."""
+    global _client
+    _client = client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and drop its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
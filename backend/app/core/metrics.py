@@ -0,0 +1,244 @@
+"""
+In-process request and database instrumentation.
+
+When `settings.METRICS_ENABLED` is on:
+- every Supabase HTTP call (PostgREST and Auth) is timed by the client from
+  `instrumented_http_client()` and recorded with its table/RPC and operation;
+- each API request gets a latency histogram sample by route, and its database
+  call count and time are added to a `Server-Timing` response header;
+- services record phase timings (`timed()`) and cache hits/misses (`count_cache()`).
+
+Everything is exposed at `/metrics` in Prometheus text format. When disabled (and
+DB admission control and the circuit breaker are off too), the Supabase client is built without the
+instrumented HTTP client, the middleware is not installed, and the recording helpers
+return after a single flag check.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import cache
+from typing import TYPE_CHECKING, Any, Iterator
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34)
+
+_BUCKETS = {"flowdo_db_calls_per_request": COUNT_BUCKETS}
+
+_HELP = {
+    "flowdo_http_request_duration_seconds": ("histogram", "API request latency by route."),
+    "flowdo_db_call_duration_seconds": ("histogram", "Supabase HTTP call latency by table and operation."),
+    "flowdo_db_calls_per_request": ("histogram", "Supabase calls made while serving one API request."),
+    "flowdo_phase_duration_seconds": ("histogram", "Duration of named phases inside a job or request."),
+    "flowdo_cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss)."),
+    "flowdo_db_reads_total": ("counter", "Repository reads by where they were sent (primary/replica)."),
+    "flowdo_replica_lag_seconds": ("gauge", "Replication lag of the read replica at its last check."),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class _Histogram:
+    bounds: tuple[float, ...]
+    buckets: list[int] = field(init=False)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self.buckets = [0] * len(self.bounds)
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.buckets[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, _Histogram]] = {}
+        self._gauges: dict[str, dict[Labels, float]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(_BUCKETS.get(name, LATENCY_BUCKETS))
+            series[key].observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+
+    def render(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+        lines: list[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.extend(_header(name))
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+            for name in sorted(self._gauges):
+                lines.extend(_header(name))
+                for labels, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+            for name in sorted(self._histograms):
+                lines.extend(_header(name))
+                for labels, hist in sorted(self._histograms[name].items()):
+                    for bound, bucket_count in zip(hist.bounds, hist.buckets):
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {hist.total:g}")
+                    lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(name: str) -> list[str]:
+    kind, help_text = _HELP.get(name, ("untyped", name))
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+registry = Registry()
+
+
+# ---------------------------------------------------------------------------
+# Per-request accounting
+# ---------------------------------------------------------------------------
+
+@dataclass
+class RequestTimings:
+    db_calls: int = 0
+    db_seconds: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_calls} calls"']
+        parts.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items())
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Set by the metrics middleware for the duration of one API request. Worker threads
+# started with to_thread/run_in_threadpool inherit it, so their calls are counted too.
+current_request: ContextVar[RequestTimings | None] = ContextVar("current_request", default=None)
+
+
+def record_db_call(table: str, operation: str, seconds: float) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+    registry.observe("flowdo_db_call_duration_seconds", seconds, table=table, operation=operation)
+    timings = current_request.get()
+    if timings is not None:
+        timings.db_calls += 1
+        timings.db_seconds += seconds
+
+
+@contextmanager
+def timed(phase: str, **labels: str) -> Iterator[None]:
+    """Record how long the enclosed block takes as a named phase."""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("flowdo_phase_duration_seconds", elapsed, phase=phase, **labels)
+        timings = current_request.get()
+        if timings is not None:
+            timings.phases[phase] = timings.phases.get(phase, 0.0) + elapsed
+
+
+def count_cache(cache: str, hit: bool) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+    registry.inc("flowdo_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+# ---------------------------------------------------------------------------
+# Supabase HTTP instrumentation
+# ---------------------------------------------------------------------------
+
+_METHOD_OPERATIONS = {"GET": "select", "HEAD": "count", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+def describe_supabase_request(request: httpx.Request) -> tuple[str, str]:
+    """Map a Supabase HTTP request to a (table, operation) pair for labelling."""
+    path = request.url.path
+    if path.startswith("/rest/v1/rpc/"):
+        return path.removeprefix("/rest/v1/rpc/"), "rpc"
+    if path.startswith("/rest/v1/"):
+        table = path.removeprefix("/rest/v1/").split("/", 1)[0]
+        operation = _METHOD_OPERATIONS.get(request.method, request.method.lower())
+        if operation == "insert" and "resolution=merge-duplicates" in request.headers.get("prefer", ""):
+            operation = "upsert"
+        return table, operation
+    if path.startswith("/auth/v1/"):
+        return "auth", path.removeprefix("/auth/v1/").replace("/", "_") or "root"
+    return "other", request.method.lower()
+
+
+@cache
+def _instrumented_client_class() -> type[httpx.Client]:
+    # Built on first use so importing this module doesn't import httpx.
+    import httpx
+
+    from app.core.admission import db_admission
+    from app.core.circuit_breaker import db_breaker
+
+    class InstrumentedHttpClient(httpx.Client):
+        def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+            with db_breaker.call() as outcome, db_admission.call():
+                start = time.perf_counter()
+                try:
+                    response = super().send(request, **kwargs)
+                    outcome.failed = response.status_code >= 500
+                    return response
+                finally:
+                    table, operation = describe_supabase_request(request)
+                    record_db_call(table, operation, time.perf_counter() - start)
+
+    return InstrumentedHttpClient
+
+
+def instrumented_http_client(**kwargs: Any) -> httpx.Client:
+    """httpx client handed to the Supabase client so each PostgREST/Auth call is timed, admitted and tripped on."""
+    return _instrumented_client_class()(**kwargs)
@@ -0,0 +1,92 @@
+"""
+Opt-in profiling of single requests and jobs, for debugging production slowness.
+
+A profiled run executes under `cProfile` and its stats are written as a `.pstats`
+file to `settings.PROFILE_DIR`, named after the run's label and id. Load one with
+`python -m pstats <file>` or a viewer such as snakeviz.
+
+cProfile only sees the thread it was enabled on. That covers async endpoints and
+the sync Supabase calls they make, but for a sync (`def`) endpoint only the event
+loop side is captured; anything else running on the loop at the same time is
+included too.
+
+Only one run is profiled at a time: Python has a single profiling hook per process
+(3.12+ refuses a second profiler, earlier versions let it silently replace the
+first). A run that starts while another is being profiled goes unprofiled.
+"""
+
+import cProfile
+import hmac
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+# Held while a profiler is enabled anywhere in the process.
+_active = threading.Lock()
+
+
+def profile_secret() -> str:
+    return settings.PROFILE_SECRET or settings.CRON_SECRET
+
+
+def should_profile(header_value: str | None) -> bool:
+    """Decide whether a request is profiled: a matching admin header, or the sampling rate."""
+    secret = profile_secret()
+    if header_value is not None and secret and hmac.compare_digest(header_value, secret):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def new_profile_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _slug(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_]+", "-", label).strip("-")[:80] or "run"
+
+
+@contextmanager
+def profiled(label: str, profile_id: str | None = None) -> Iterator[str | None]:
+    """
+    Run the enclosed block under cProfile and write its stats; yields the profile id,
+    or None (and runs the block unprofiled) while another run is being profiled.
+    """
+    if not _active.acquire(blocking=False):
+        logger.info("profiling: %s not profiled, another profile is running", label)
+        yield None
+        return
+    profile_id = profile_id or new_profile_id()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool (not one of ours) is already active.
+        _active.release()
+        logger.warning("profiling: %s not profiled, a profiler is already active", label)
+        yield None
+        return
+    try:
+        yield profile_id
+    finally:
+        profiler.disable()
+        _active.release()
+        directory = Path(settings.PROFILE_DIR)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{_slug(label)}-{profile_id}.pstats"
+            profiler.dump_stats(path)
+            logger.info("profile written: %s", path)
+        except OSError:
+            logger.exception("profiling: failed to write profile %s", profile_id)
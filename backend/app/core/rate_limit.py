@@ -0,0 +1,149 @@
+"""
+Per-user token-bucket rate limiting for the API.
+
+When `settings.RATE_LIMIT_ENABLED` is on, `RateLimitMiddleware` takes one token
+from the caller's bucket for every `/api/v1` request and answers `429` with
+`Retry-After` when the bucket is empty. Buckets refill at `rate` tokens per second
+up to `burst`.
+
+Limits are set per route group in `settings.RATE_LIMITS`: keys are path prefixes
+under `/api/v1` (the longest match wins, `default` covers the rest) and values are
+`"<rate>:<burst>"` or `"off"` — internal jobs and health checks are `off` by default.
+
+Callers are identified by their Supabase user id (`sub`). The middleware runs before
+authentication, so it looks the token up among those `get_current_user` has already
+verified (`app.core.verified_tokens`) and counts the request against that user's
+bucket. A token not yet verified (after a restart, or on another worker) gets a
+bucket of its own, keyed by its hash: a forged token can't drain someone else's, and
+callers behind the same proxy don't share one. Only requests without a token count
+against a bucket for the client address.
+
+Buckets live in memory per process by default. `settings.RATE_LIMIT_BACKEND` can
+name a `module:attribute` factory returning a shared `RateLimitBackend` (e.g. one
+backed by Redis) so all workers draw from the same buckets.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cache
+from typing import Protocol
+
+from app.core import verified_tokens
+from app.core.config import settings
+
+API_PREFIX = "/api/v1"
+DEFAULT_GROUP = "default"
+MEMORY_BACKEND_MAX_KEYS = 100_000
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float
+    burst: int
+
+
+def parse_limit(value: str) -> RateLimit | None:
+    """Parse `"<rate>:<burst>"` (or `"off"`) from `settings.RATE_LIMITS`."""
+    if value.strip().lower() == "off":
+        return None
+    rate, _, burst = value.partition(":")
+    try:
+        limit = RateLimit(rate=float(rate), burst=int(burst or max(1, round(float(rate)))))
+    except ValueError:
+        raise ValueError(f"Invalid rate limit {value!r}; expected '<rate>:<burst>' or 'off'") from None
+    if limit.rate <= 0 or limit.burst < 1:
+        raise ValueError(f"Invalid rate limit {value!r}; rate and burst must be positive")
+    return limit
+
+
+def route_group(path: str) -> str | None:
+    """Return the `RATE_LIMITS` key governing `path`, or None for paths outside the API."""
+    if path != API_PREFIX and not path.startswith(API_PREFIX + "/"):
+        return None
+    subpath = path.removeprefix(API_PREFIX) or "/"
+    best = DEFAULT_GROUP
+    for prefix in settings.RATE_LIMITS:
+        if prefix == DEFAULT_GROUP:
+            continue
+        matches = subpath == prefix or subpath.startswith(prefix.rstrip("/") + "/")
+        if matches and (best == DEFAULT_GROUP or len(prefix) > len(best)):
+            best = prefix
+    return best
+
+
+def limit_for(path: str) -> tuple[str, RateLimit] | None:
+    """Return the (group, limit) applying to `path`, or None when it isn't limited."""
+    group = route_group(path)
+    if group is None:
+        return None
+    spec = settings.RATE_LIMITS.get(group)
+    limit = parse_limit(spec) if spec is not None else None
+    return (group, limit) if limit is not None else None
+
+
+# ---------------------------------------------------------------------------
+# Caller identity
+# ---------------------------------------------------------------------------
+
+def caller_key(authorization: str | None, client_host: str | None) -> str:
+    """Bucket key for a request: the verified user, else the token's hash, else the client address."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user = verified_tokens.lookup(token)
+        if user is not None:
+            return f"user:{user['sub']}"
+        return f"token:{verified_tokens.token_key(token)}"
+    return f"addr:{client_host or 'unknown'}"
+
+
+# ---------------------------------------------------------------------------
+# Bucket storage
+# ---------------------------------------------------------------------------
+
+class RateLimitBackend(Protocol):
+    async def take(self, key: str, limit: RateLimit) -> float:
+        """Take one token from `key`'s bucket; return 0 if granted, else seconds until one is."""
+        ...
+
+
+class InMemoryBackend:
+    """Token buckets in this process, least recently used dropped beyond `max_keys`."""
+
+    def __init__(self, *, clock=time.monotonic, max_keys: int = MEMORY_BACKEND_MAX_KEYS) -> None:
+        self._clock = clock
+        self._max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(limit.burst), now))
+            tokens = min(float(limit.burst), tokens + (now - updated) * limit.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+@cache
+def get_backend() -> RateLimitBackend:
+    """Build the backend named by `settings.RATE_LIMIT_BACKEND` on first use."""
+    spec = settings.RATE_LIMIT_BACKEND
+    if spec == "memory":
+        return InMemoryBackend()
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"RATE_LIMIT_BACKEND must be 'memory' or 'module:factory', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attribute)()
@@ -0,0 +1,160 @@
+"""
+Routing of repository reads between the primary database and a read replica.
+
+With `settings.SUPABASE_READ_URL` set, `SupabaseRepository` asks `read_router`
+where each read should go:
+
+- a user's reads go to the replica, unless that user wrote recently. Every write
+  through the repository pins its user to the primary for `REPLICA_PIN_SECONDS`, or
+  for the replica's measured lag if that is longer, so whoever just made a change
+  reads it back. A bulk write that touches many users (flow-up) pins everyone.
+- the flow-up scan reads from the replica while it is healthy: it reads every row
+  once a day and is the query most worth keeping off the primary.
+- lag is checked every `REPLICA_LAG_CHECK_SECONDS` by `run_monitor()` (started in the
+  FastAPI lifespan), which calls `replica_lag_seconds()` on the replica. While the
+  last reading is above `REPLICA_MAX_LAG_SECONDS`, failed, or is more than a few
+  intervals old, user reads go to the primary.
+
+Pins are held in process memory, like the log buffer's pending taps: with several
+API processes, a user's next request may land on one that hasn't seen the write.
+Keep `REPLICA_PIN_SECONDS` above the typical lag so the replica has caught up by
+then anyway.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# A lag reading older than this many check intervals is treated as unknown.
+STALE_AFTER_CHECKS = 3
+# Expired pins are swept once this many are held.
+PIN_SWEEP_SIZE = 10_000
+
+
+class ReadRouter:
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pins: dict[str, float] = {}
+        self._pinned_all_until = 0.0
+        self._lag: float | None = None
+        self._lag_checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.SUPABASE_READ_URL)
+
+    # -- pins ------------------------------------------------------------------
+
+    def _pin_until(self) -> float:
+        return self._clock() + max(settings.REPLICA_PIN_SECONDS, self._lag or 0.0)
+
+    def pin(self, user_ids: str | Iterable[str]) -> None:
+        """Send these users' reads to the primary until the replica has their write."""
+        if not self.enabled:
+            return
+        ids = [user_ids] if isinstance(user_ids, str) else user_ids
+        with self._lock:
+            until = self._pin_until()
+            for user_id in ids:
+                self._pins[str(user_id)] = until
+            if len(self._pins) >= PIN_SWEEP_SIZE:
+                now = self._clock()
+                self._pins = {u: t for u, t in self._pins.items() if t > now}
+
+    def pin_all(self) -> None:
+        """Send every user's reads to the primary, after a write that touched many users."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pinned_all_until = self._pin_until()
+
+    # -- lag -------------------------------------------------------------------
+
+    def record_lag(self, seconds: float | None) -> None:
+        """Store a lag reading; None means the check failed and the lag is unknown."""
+        with self._lock:
+            self._lag = seconds
+            self._lag_checked_at = self._clock()
+        if seconds is not None and settings.METRICS_ENABLED:
+            registry.set("flowdo_replica_lag_seconds", seconds)
+
+    def lag(self) -> float | None:
+        """The last lag reading, or None if it is unknown or out of date."""
+        with self._lock:
+            return self._current_lag()
+
+    def _current_lag(self) -> float | None:
+        max_age = STALE_AFTER_CHECKS * settings.REPLICA_LAG_CHECK_SECONDS
+        if self._lag is None or self._clock() - self._lag_checked_at > max_age:
+            return None
+        return self._lag
+
+    def replica_healthy(self) -> bool:
+        lag = self.lag()
+        return lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+    # -- routing ---------------------------------------------------------------
+
+    def target(self, user_id: str | None) -> str:
+        """Where a read for `user_id` should go; None means a read across all users."""
+        if not self.enabled:
+            return PRIMARY
+        with self._lock:
+            lag = self._current_lag()
+            now = self._clock()
+            if lag is None or lag > settings.REPLICA_MAX_LAG_SECONDS or now < self._pinned_all_until:
+                target = PRIMARY
+            elif user_id is not None and self._pins.get(user_id, 0.0) > now:
+                target = PRIMARY
+            else:
+                target = REPLICA
+        if settings.METRICS_ENABLED:
+            registry.inc("flowdo_db_reads_total", target=target)
+        return target
+
+    def status(self) -> dict:
+        lag = self.lag()
+        return {"configured": self.enabled, "lag_seconds": lag, "healthy": self.replica_healthy()}
+
+    # -- lag monitor -----------------------------------------------------------
+
+    def check_lag(self) -> float | None:
+        """Ask the replica how far behind it is and record the answer."""
+        from app.core.supabase import read_supabase
+
+        try:
+            seconds = float(read_supabase.rpc("replica_lag_seconds", {}).execute().data or 0.0)
+        except Exception:
+            logger.warning("read_routing: replica lag check failed; reading from the primary", exc_info=True)
+            seconds = None
+        self.record_lag(seconds)
+        return seconds
+
+    async def run_monitor(self, interval_seconds: float) -> None:
+        """Check the replica's lag on an interval until cancelled."""
+        while True:
+            await asyncio.to_thread(self.check_lag)
+            await asyncio.sleep(interval_seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pins.clear()
+            self._pinned_all_until = 0.0
+            self._lag = None
+            self._lag_checked_at = 0.0
+
+
+read_router = ReadRouter()
@@ -1,4 +1,88 @@
-from supabase import create_client, Client
+"""
+Service-role Supabase client, created on first use.
+
+Importing the `supabase` package and building the client takes a large share of a
+cold boot, so neither happens at import time: `get_supabase()` builds the client the
+first time the database is needed, and the FastAPI lifespan warms it in the
+background right after startup so the first request rarely waits. Modules keep
+using `from app.core.supabase import supabase`; that object forwards every
+attribute to the real client.
+
+`read_supabase` is the same for the read replica at `settings.SUPABASE_READ_URL`,
+and is the primary client itself when no replica is configured. Which reads may use
+it is decided by `app.core.read_routing`.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any
+
 from app.core.config import settings
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+if TYPE_CHECKING:
+    from supabase import Client, ClientOptions
+
+# Matches the supabase client's own default PostgREST timeout.
+SUPABASE_TIMEOUT_SECONDS = 120
+
+_client: Client | None = None
+_read_client: Client | None = None
+_client_lock = threading.Lock()
+
+
+def _client_options() -> ClientOptions:
+    from supabase import ClientOptions
+
+    if not (settings.METRICS_ENABLED or settings.DB_ADMISSION_ENABLED or settings.CIRCUIT_BREAKER_ENABLED):
+        return ClientOptions()
+    from app.core.metrics import instrumented_http_client
+
+    # Route PostgREST and Auth calls through an httpx client that times, admits and
+    # (with the circuit breaker on) gives up on each one much sooner.
+    timeout = settings.CIRCUIT_CALL_TIMEOUT_SECONDS if settings.CIRCUIT_BREAKER_ENABLED else SUPABASE_TIMEOUT_SECONDS
+    return ClientOptions(httpx_client=instrumented_http_client(timeout=timeout))
+
+
+def get_supabase() -> Client:
+    """Return the shared client, building it on first call (thread-safe)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from supabase import create_client
+
+                _client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY, options=_client_options())
+    return _client
+
+
+def get_read_supabase() -> Client:
+    """Return the read-replica client, or the primary one when no replica is configured."""
+    global _read_client
+    if not settings.SUPABASE_READ_URL:
+        return get_supabase()
+    if _read_client is None:
+        with _client_lock:
+            if _read_client is None:
+                from supabase import create_client
+
+                # Same options as the primary, so replica calls are also timed, admitted
+                # and counted by the circuit breaker.
+                _read_client = create_client(
+                    settings.SUPABASE_READ_URL, settings.SUPABASE_SERVICE_KEY, options=_client_options()
+                )
+    return _read_client
+
+
+class _LazyClient:
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_supabase(), name)
+
+
+class _LazyReadClient:
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_read_supabase(), name)
+
+
+supabase: Client = _LazyClient()  # type: ignore[assignment]
+read_supabase: Client = _LazyReadClient()  # type: ignore[assignment]
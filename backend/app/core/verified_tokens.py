@@ -0,0 +1,62 @@
+"""
+Access tokens that Supabase Auth has recently confirmed, and whose user they belong to.
+
+`get_current_user` records every token it verifies. Rate limiting uses the record to
+key requests by user before authentication runs, and while the database circuit is
+open, authentication falls back to it so users can keep reading their stale board.
+Entries are dropped once the token's own `exp` claim passes; the claim is read from
+a token Supabase has already verified, so it can be trusted.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+VERIFIED_TOKENS_MAX = 10_000
+
+_tokens: OrderedDict[str, tuple[dict, float | None]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def token_key(token: str) -> str:
+    """The hash a token is stored (and rate limited) under, so raw tokens are never kept."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _expiry(token: str) -> float | None:
+    """The token's `exp` claim, or None when it isn't a readable JWT."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def remember(token: str, user: dict) -> None:
+    """Record that `token` was verified as belonging to `user` (`{"sub", "email"}`)."""
+    key = token_key(token)
+    with _lock:
+        _tokens[key] = (dict(user), _expiry(token))
+        _tokens.move_to_end(key)
+        while len(_tokens) > VERIFIED_TOKENS_MAX:
+            _tokens.popitem(last=False)
+
+
+def lookup(token: str) -> dict | None:
+    """Return the user a still-unexpired token was verified for, if it was."""
+    key = token_key(token)
+    with _lock:
+        entry = _tokens.get(key)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del _tokens[key]
+            return None
+    return dict(user)
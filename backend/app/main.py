@@ -1,26 +1,78 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.core.admission import DatabaseOverloaded
+from app.core.circuit_breaker import CircuitOpen
 from app.core.config import settings
+from app.core.http import close_http_client
+from app.core.metrics import registry
+from app.core.read_routing import read_router
+from app.core.supabase import get_supabase
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.repositories import close_repository
 from app.api.v1.router import router as v1_router
+from app.services.archive import run_archive
 from app.services.flow_up import run_flow_up
+from app.services.log_buffer import log_buffer
 
 logger = logging.getLogger(__name__)
 
 
+async def _warm_supabase() -> None:
+    try:
+        await asyncio.to_thread(get_supabase)
+    except Exception:
+        logger.exception("Supabase client warm-up failed; it will be retried on first use")
+
+
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    # Build the Supabase client off the event loop once the server is up, so the port
+    # binds without waiting for it and the first request usually finds it ready.
+    warmup = asyncio.create_task(_warm_supabase())
+    # Imported here rather than at module level to keep cold-start imports small.
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
     scheduler = BackgroundScheduler()
     # Run flow-up daily at midnight UTC
     scheduler.add_job(run_flow_up, CronTrigger(hour=0, minute=0, timezone="UTC"))
+    # Archive long-completed dos once flow-up has finished with them
+    scheduler.add_job(run_archive, CronTrigger(hour=0, minute=30, timezone="UTC"))
     scheduler.start()
-    logger.info("Scheduler started — flow-up runs daily at 00:00 UTC")
+    logger.info("Scheduler started — flow-up runs daily at 00:00 UTC, archiving at 00:30 UTC")
+    log_flusher = None
+    if settings.LOG_BUFFER_ENABLED:
+        # Adopts journals left by a crashed process; the flusher replays them.
+        await asyncio.to_thread(log_buffer.open)
+        log_flusher = asyncio.create_task(log_buffer.run_flusher(settings.LOG_FLUSH_INTERVAL_SECONDS))
+    lag_monitor = None
+    if read_router.enabled:
+        # Until the first check answers, reads stay on the primary.
+        lag_monitor = asyncio.create_task(read_router.run_monitor(settings.REPLICA_LAG_CHECK_SECONDS))
     yield
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+        with suppress(asyncio.CancelledError):
+            await lag_monitor
+    if log_flusher is not None:
+        log_flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await log_flusher
+        await asyncio.to_thread(log_buffer.close)
     scheduler.shutdown()
     logger.info("Scheduler stopped")
+    # Only the SQLite backend holds connections; flushed taps above were its last writes.
+    close_repository()
+    # The shared outbound HTTP pool is opened lazily; close it if anything did.
+    await close_http_client()
+    if not warmup.done():
+        warmup.cancel()
 
 
 app = FastAPI(
@@ -29,17 +81,45 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Added before CORS so it sits inside it and 429/503 responses carry CORS headers.
+if settings.RATE_LIMIT_ENABLED or settings.DB_ADMISSION_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Stale-Since", "Retry-After"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if settings.PROFILE_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 app.include_router(v1_router, prefix="/api/v1")
 
 
+@app.exception_handler(CircuitOpen)
+@app.exception_handler(DatabaseOverloaded)
+async def database_unavailable(_, exc: CircuitOpen | DatabaseOverloaded):
+    return JSONResponse(
+        {"detail": "Service is busy; retry later"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/")
 async def root():
     return {"message": "FlowDo API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,10 +1,20 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core import verified_tokens
+from app.core.admission import DatabaseOverloaded
+from app.core.circuit_breaker import CircuitOpen, is_upstream_failure
 from app.core.supabase import supabase
 
 security = HTTPBearer()
 
 
+def _auth_unavailable(exc: Exception) -> bool:
+    """True when Supabase Auth couldn't be asked, as opposed to rejecting the token."""
+    from supabase_auth.errors import AuthRetryableError
+
+    return is_upstream_failure(exc) or isinstance(exc, AuthRetryableError)
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict:
@@ -18,10 +28,20 @@ def get_current_user(
                 detail="Invalid or expired token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return {"sub": str(user.id), "email": user.email}
-    except HTTPException:
+        current_user = {"sub": str(user.id), "email": user.email}
+        verified_tokens.remember(token, current_user)
+        return current_user
+    except (HTTPException, DatabaseOverloaded):
         raise
     except Exception as e:
+        if _auth_unavailable(e):
+            # While Auth is unreachable, accept a token it verified earlier until it
+            # expires, so users can still read their (stale) board.
+            cached = verified_tokens.lookup(token)
+            if cached is not None:
+                return cached
+            if isinstance(e, CircuitOpen):
+                raise
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
@@ -0,0 +1,63 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import RequestTimings, current_request, registry
+
+
+def _route_template(scope: Scope) -> str:
+    """
+    Rebuild the matched route's path template (e.g. `/api/v1/dos/{do_id}`) from the
+    request path and its path params, so label cardinality stays bounded.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    params = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{params[segment]}}}" if segment in params else segment for segment in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """
+    Time each HTTP request and count the Supabase calls made while serving it.
+
+    Adds a `Server-Timing` header (database time and call count, named phases, total)
+    and records latency and calls-per-request histograms labelled by route template.
+    Only installed when `settings.METRICS_ENABLED` is on.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_request.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing(time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            path = _route_template(scope)
+            registry.observe(
+                "flowdo_http_request_duration_seconds",
+                elapsed,
+                method=scope["method"],
+                route=path,
+                status=str(status_code),
+            )
+            registry.observe("flowdo_db_calls_per_request", timings.db_calls, route=path)
+            current_request.reset(token)
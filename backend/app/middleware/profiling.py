@@ -0,0 +1,34 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiling import PROFILE_HEADER, new_profile_id, profiled, should_profile
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry the admin `X-Profile` header or fall within the
+    sampling rate, and return the profile id in an `X-Profile-Id` response header.
+    A request that arrives while another is being profiled runs unprofiled,
+    without the header.
+
+    Only installed when `settings.PROFILE_ENABLED` is on; requests that aren't
+    profiled pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not should_profile(Headers(scope=scope).get(PROFILE_HEADER)):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        with profiled(f"{scope['method']} {scope['path']}", profile_id) as active_id:
+            await self.app(scope, receive, send if active_id is None else send_with_profile_id)
@@ -0,0 +1,56 @@
+import math
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.admission import admission_applies, db_admission
+from app.core.config import settings
+from app.core.rate_limit import caller_key, get_backend, limit_for
+
+
+def _reject(status_code: int, detail: str, retry_after: int) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": str(retry_after)})
+
+
+class RateLimitMiddleware:
+    """
+    Admission control for `/api/v1` requests in a limited route group.
+
+    Answers `503` when the database is slow and already busy, and `429` when the
+    caller's token bucket is empty, both with `Retry-After`; otherwise marks the
+    request so its database calls count against the outbound concurrency limit.
+    Routes whose group is `off` (internal jobs, health) pass straight through.
+    Only installed when `settings.RATE_LIMIT_ENABLED` or
+    `settings.DB_ADMISSION_ENABLED` is on.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        matched = limit_for(scope["path"]) if scope["type"] == "http" else None
+        if matched is None or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        _, limit = matched
+
+        if settings.DB_ADMISSION_ENABLED and db_admission.should_shed():
+            response = _reject(503, "Service is busy; retry later", db_admission.retry_after())
+            await response(scope, receive, send)
+            return
+
+        if settings.RATE_LIMIT_ENABLED:
+            client = scope.get("client")
+            key = caller_key(Headers(scope=scope).get("authorization"), client[0] if client else None)
+            wait = await get_backend().take(key, limit)
+            if wait > 0:
+                response = _reject(429, "Too many requests", max(1, math.ceil(wait)))
+                await response(scope, receive, send)
+                return
+
+        token = admission_applies.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_applies.reset(token)
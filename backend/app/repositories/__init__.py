@@ -0,0 +1,83 @@
+"""
+Storage for dos, maintenance logs and the archive.
+
+Endpoints and services read and write through `repository`, which forwards to the
+backend named by `settings.STORAGE_BACKEND`:
+
+- `"supabase"` (the default): PostgREST calls on the service-role client
+  (`app.repositories.supabase`);
+- `"sqlite"`: an embedded database file at `settings.SQLITE_PATH`
+  (`app.repositories.sqlite`), for single-node self-hosted installs where every
+  query would otherwise be a network round trip.
+
+Authentication and Google Calendar sync still talk to Supabase either way.
+The backend is built on first use, like the Supabase client.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from app.core.config import settings
+from app.repositories.base import DosRepository
+
+__all__ = ["DosRepository", "close_repository", "get_repository", "repository", "use_repository"]
+
+_repository: DosRepository | None = None
+_repository_lock = threading.Lock()
+
+
+def _build() -> DosRepository:
+    backend = settings.STORAGE_BACKEND
+    if backend == "supabase":
+        from app.repositories.supabase import SupabaseRepository
+
+        return SupabaseRepository()
+    if backend == "sqlite":
+        from app.repositories.sqlite import SqliteRepository
+
+        return SqliteRepository(settings.SQLITE_PATH)
+    raise ValueError(f"STORAGE_BACKEND must be 'supabase' or 'sqlite', got {backend!r}")
+
+
+def get_repository() -> DosRepository:
+    """Return the configured repository, building it on first call (thread-safe)."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = _build()
+    return _repository
+
+
+def close_repository() -> None:
+    """Release the repository's connections, if it holds any."""
+    global _repository
+    with _repository_lock:
+        current, _repository = _repository, None
+    close = getattr(current, "close", None)
+    if close is not None:
+        close()
+
+
+@contextmanager
+def use_repository(repo: DosRepository) -> Iterator[DosRepository]:
+    """Serve every data access from `repo` for the duration of the block."""
+    global _repository
+    with _repository_lock:
+        previous, _repository = _repository, repo
+    try:
+        yield repo
+    finally:
+        with _repository_lock:
+            _repository = previous
+
+
+class _LazyRepository:
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_repository(), name)
+
+
+repository: DosRepository = _LazyRepository()  # type: ignore[assignment]
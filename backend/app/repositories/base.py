@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Iterable, Protocol
+
+
+class DosRepository(Protocol):
+    """
+    Storage for dos, maintenance logs and the do archive.
+
+    Rows are plain dicts shaped like the `dos` table as PostgREST returns it:
+    uuids and timestamps as ISO strings, `ancestor_ids` as a list of ids root-first.
+    Every per-user method is scoped to `user_id`; a do owned by someone else is
+    treated as missing.
+    """
+
+    # -- reads -----------------------------------------------------------------
+
+    def get_do(self, user_id: str, do_id: str, columns: str = "*") -> dict | None:
+        """Return one of the user's dos (only `columns`, comma-separated), or None."""
+        ...
+
+    def get_dos(self, user_id: str, do_ids: Iterable[str]) -> list[dict]:
+        """Return those of `do_ids` the user owns, in no particular order."""
+        ...
+
+    def existing_do_ids(self, do_ids: Iterable[str]) -> set[str]:
+        """Return which of `do_ids` still exist, for any user."""
+        ...
+
+    def list_dos_page(
+        self,
+        user_id: str,
+        *,
+        columns: str = "*",
+        time_unit: str | None = None,
+        completed: bool | None = None,
+        cursor: str | None = None,
+        limit: int,
+        tags: list[str] | None = None,
+        match_all: bool = True,
+    ) -> list[dict]:
+        """
+        Return the page after `cursor` ordered by `(created_at, id)`, plus one look-ahead row.
+
+        With `tags`, only dos carrying all of them (`match_all`) or any of them are listed.
+        Raises ValueError for a malformed cursor. Pass the result to `split_page()`.
+        """
+        ...
+
+    def tag_counts(self, user_id: str) -> list[dict]:
+        """Return `{tag, count}` for every tag on the user's dos, most used first."""
+        ...
+
+    def board_page(self, user_id: str, units: list[str], limit: int) -> list[dict]:
+        """Return the first `limit` dos of each unit in `units`, ordered by `(time_unit, created_at, id)`."""
+        ...
+
+    def board_counts(self, user_id: str, units: list[str]) -> list[dict]:
+        """Return `{time_unit, total, completed, maintenance}` for each non-empty unit."""
+        ...
+
+    def list_descendants(self, user_id: str, do_id: str) -> list[dict]:
+        """Return every do with `do_id` among its ancestors, ordered by `(created_at, id)`."""
+        ...
+
+    def lineage_components(self, user_id: str, do_ids: list[str]) -> list[dict]:
+        """Return every do on the same tree as any of `do_ids` (themselves included)."""
+        ...
+
+    def search_dos(self, user_id: str, query: str, *, limit: int, offset: int) -> list[dict]:
+        """Return one page of the user's dos whose title contains `query`, best matches first."""
+        ...
+
+    def flow_up_partitions(self) -> list[str]:
+        """Name the partitions of `dos` flow-up can scan independently; empty if it isn't partitioned."""
+        ...
+
+    def flow_up_candidates(self, partition: str | None = None) -> list[dict]:
+        """Return every do in `partition` (default: all of them), with the columns flow-up needs."""
+        ...
+
+    # -- writes ----------------------------------------------------------------
+
+    def insert_do(self, values: dict) -> dict:
+        """Insert a do and return the stored row."""
+        ...
+
+    def update_do(self, user_id: str, do_id: str, values: dict) -> dict | None:
+        """Apply `values` to one of the user's dos; returns the updated row, or None if missing."""
+        ...
+
+    def clear_priority(self, user_id: str, priority_date: str) -> None:
+        """Unset `priority_date` on the user's dos prioritized for that date."""
+        ...
+
+    def delete_do(self, user_id: str, do_id: str) -> None:
+        """Delete one of the user's dos; its children become roots and its logs go with it."""
+        ...
+
+    def update_tags(
+        self, user_id: str, do_ids: list[str], add: list[str], remove: list[str], *, max_tags: int
+    ) -> dict[str, int]:
+        """
+        Add and remove tags on those of `do_ids` the user owns, in one write. Dos that
+        would end up with more than `max_tags` tags are left alone; returns how many
+        dos were `updated` and how many were left `over_limit`.
+        """
+        ...
+
+    def set_tree_color(self, user_id: str, root_id: str, color_hex: str) -> None:
+        """Set `color_hex` on `root_id` and every do below it."""
+        ...
+
+    def insert_dos(self, rows: list[dict]) -> None:
+        """Insert rows carrying their own `id`s in one batch; each parent must be stored already or come earlier in `rows`."""
+        ...
+
+    def apply_flow_up(self, updates: list[dict]) -> set[str]:
+        """
+        Write the rows computed by flow-up (`id`, `user_id`, `time_unit`, `flow_count`,
+        `days_in_unit`, `updated_at`) in one batch, and return the ids written.
+
+        Only updates existing rows, and only those whose `time_unit` and `updated_at`
+        still equal `expected_time_unit` and `expected_updated_at`, the values the
+        scan saw; the rest were changed or deleted since and are left alone.
+        """
+        ...
+
+    # -- maintenance logs ------------------------------------------------------
+
+    def add_maintenance_log(self, do_id: str, user_id: str) -> None:
+        """Record one maintenance tap, logged now."""
+        ...
+
+    def add_maintenance_logs(self, rows: list[dict]) -> None:
+        """Insert log rows carrying their own `id`; rows already stored are skipped."""
+        ...
+
+    def list_maintenance_logs_page(self, user_id: str, *, after: str | None, limit: int) -> list[dict]:
+        """Return up to `limit` of the user's logs (`id`, `do_id`, `logged_at`) with `id > after`, ordered by `id`."""
+        ...
+
+    def count_maintenance_logs(
+        self, user_id: str, do_ids: list[str], start: datetime, end: datetime
+    ) -> dict[str, int]:
+        """Count the user's logs per do with `start <= logged_at < end`; dos with none are omitted."""
+        ...
+
+    # -- transitions -----------------------------------------------------------
+
+    def append_transitions(self, rows: list[dict]) -> None:
+        """
+        Append flow-up transitions (`user_id`, `do_id`, `from_unit`, `to_unit`,
+        `days_in_unit`, `transitioned_at`) to the log and fold them into the rollups.
+        """
+        ...
+
+    def transition_summary(self, user_id: str, do_id: str) -> list[dict]:
+        """
+        Return one row per unit the do has flowed out of, oldest move first:
+        `{from_unit, to_unit, transitions, days_in_unit, last_days_in_unit, last_at}`.
+        """
+        ...
+
+    def transition_daily(self, user_id: str, start: date, end: date) -> list[dict]:
+        """
+        Return the user's daily rollups with `start <= day < end`, ordered by day:
+        `{day, from_unit, to_unit, transitions, days_in_unit}`.
+        """
+        ...
+
+    # -- archive ---------------------------------------------------------------
+
+    def archive_completed(self, cutoff: str, batch: int) -> int:
+        """Move up to `batch` childless normal dos completed before `cutoff` to the archive; returns how many."""
+        ...
+
+    def list_archived_page(self, user_id: str, *, cursor: str | None, limit: int) -> list[dict]:
+        """Like `list_dos_page`, over the user's archived dos."""
+        ...
+
+    def restore_archived(self, user_id: str, do_ids: list[str]) -> list[dict]:
+        """Move archived dos and their archived ancestors back; returns the restored rows."""
+        ...
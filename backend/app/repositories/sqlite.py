@@ -0,0 +1,810 @@
+"""
+`DosRepository` on an embedded SQLite database, for single-node installs.
+
+The database is one file (`settings.SQLITE_PATH`) in WAL mode, so readers never wait
+for the writer and a commit is one append to the log. Each thread (the API's worker
+pool, the scheduler, the log flusher) gets its own connection. Statements are constant
+SQL with bound parameters, so each connection's statement cache prepares them once;
+lists of ids are bound as a single JSON array and expanded with `json_each`, which
+keeps `IN (...)` queries to one statement whatever the list length.
+
+What the Postgres migrations do in triggers happens here inside the write
+transaction: `ancestor_ids` is kept root-first as a JSON array, mirrored into the
+`do_ancestors` closure table that subtree lookups use (the equivalent of the GIN
+index on the array), `tags` is mirrored into `do_tags` for tag filters and counts,
+and `updated_at` is set on every update. With
+`synchronous=NORMAL` a power cut can lose the last few commits but never corrupts
+the file.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from app.services.pagination import decode_cursor
+
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+DOS_COLUMNS = (
+    "id", "user_id", "title", "time_unit", "completed", "completed_at", "days_in_unit", "flow_count",
+    "created_at", "updated_at", "do_type", "completion_count", "parent_id", "priority_date", "color_hex",
+    "ancestor_ids", "tags",
+)
+# Columns callers may set; ids, paths and timestamps are managed here.
+WRITABLE_COLUMNS = frozenset(DOS_COLUMNS) - {"id", "ancestor_ids", "created_at", "updated_at"}
+TIMESTAMP_COLUMNS = (
+    "completed_at", "created_at", "updated_at", "logged_at", "archived_at", "restored_at", "transitioned_at",
+)
+FLOW_UP_COLUMNS = "id,user_id,title,time_unit,do_type,days_in_unit,flow_count,completion_count,updated_at"
+_DOS_COLUMN_LIST = ", ".join(DOS_COLUMNS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dos (
+  id               TEXT    PRIMARY KEY,
+  user_id          TEXT    NOT NULL,
+  title            TEXT    NOT NULL,
+  time_unit        TEXT    NOT NULL CHECK (time_unit IN ('today', 'week', 'month', 'season', 'year', 'multi_year')),
+  completed        INTEGER NOT NULL DEFAULT 0,
+  completed_at     TEXT,
+  days_in_unit     INTEGER NOT NULL DEFAULT 0,
+  flow_count       INTEGER NOT NULL DEFAULT 0,
+  created_at       TEXT    NOT NULL,
+  updated_at       TEXT    NOT NULL,
+  do_type          TEXT    NOT NULL DEFAULT 'normal' CHECK (do_type IN ('normal', 'maintenance')),
+  completion_count INTEGER NOT NULL DEFAULT 0,
+  parent_id        TEXT    REFERENCES dos(id) ON DELETE SET NULL,
+  priority_date    TEXT,
+  color_hex        TEXT,
+  ancestor_ids     TEXT    NOT NULL DEFAULT '[]',
+  tags             TEXT    NOT NULL DEFAULT '[]',
+  restored_at      TEXT
+);
+CREATE INDEX IF NOT EXISTS dos_user_created_at_id_idx ON dos (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS dos_user_time_unit_created_at_idx ON dos (user_id, time_unit, created_at, id);
+CREATE INDEX IF NOT EXISTS dos_user_priority_date_idx ON dos (user_id, priority_date) WHERE priority_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS dos_parent_id_idx ON dos (parent_id) WHERE parent_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS dos_completed_at_idx ON dos (completed_at) WHERE completed;
+
+-- One row per (ancestor, descendant) pair, mirroring dos.ancestor_ids.
+CREATE TABLE IF NOT EXISTS do_ancestors (
+  ancestor_id TEXT NOT NULL REFERENCES dos(id) ON DELETE CASCADE,
+  do_id       TEXT NOT NULL REFERENCES dos(id) ON DELETE CASCADE,
+  PRIMARY KEY (ancestor_id, do_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS do_ancestors_do_id_idx ON do_ancestors (do_id);
+
+-- One row per (do, tag), mirroring dos.tags: the inverted index tag filters use.
+CREATE TABLE IF NOT EXISTS do_tags (
+  user_id TEXT NOT NULL,
+  tag     TEXT NOT NULL,
+  do_id   TEXT NOT NULL REFERENCES dos(id) ON DELETE CASCADE,
+  PRIMARY KEY (user_id, tag, do_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS do_tags_do_id_idx ON do_tags (do_id);
+
+CREATE TABLE IF NOT EXISTS maintenance_logs (
+  id        TEXT PRIMARY KEY,
+  do_id     TEXT NOT NULL REFERENCES dos(id) ON DELETE CASCADE,
+  user_id   TEXT NOT NULL,
+  logged_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS maintenance_logs_do_id_logged_at_idx ON maintenance_logs (do_id, logged_at);
+CREATE INDEX IF NOT EXISTS maintenance_logs_user_id_id_idx ON maintenance_logs (user_id, id);
+
+CREATE TABLE IF NOT EXISTS dos_archive (
+  id               TEXT    PRIMARY KEY,
+  user_id          TEXT    NOT NULL,
+  title            TEXT    NOT NULL,
+  time_unit        TEXT    NOT NULL,
+  completed        INTEGER NOT NULL,
+  completed_at     TEXT,
+  days_in_unit     INTEGER NOT NULL,
+  flow_count       INTEGER NOT NULL,
+  created_at       TEXT    NOT NULL,
+  updated_at       TEXT    NOT NULL,
+  do_type          TEXT    NOT NULL,
+  completion_count INTEGER NOT NULL,
+  parent_id        TEXT,
+  priority_date    TEXT,
+  color_hex        TEXT,
+  ancestor_ids     TEXT    NOT NULL,
+  tags             TEXT    NOT NULL DEFAULT '[]',
+  archived_at      TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dos_archive_user_created_at_id_idx ON dos_archive (user_id, created_at, id);
+
+-- Append-only flow-up transitions, and the rollups the endpoints read instead.
+CREATE TABLE IF NOT EXISTS do_transitions (
+  id              INTEGER PRIMARY KEY,
+  user_id         TEXT    NOT NULL,
+  do_id           TEXT    NOT NULL,
+  from_unit       TEXT    NOT NULL,
+  to_unit         TEXT    NOT NULL,
+  days_in_unit    INTEGER NOT NULL,
+  transitioned_at TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS do_transitions_user_do_idx ON do_transitions (user_id, do_id, transitioned_at);
+
+CREATE TABLE IF NOT EXISTS do_transition_daily (
+  user_id      TEXT    NOT NULL,
+  day          TEXT    NOT NULL,
+  from_unit    TEXT    NOT NULL,
+  to_unit      TEXT    NOT NULL,
+  transitions  INTEGER NOT NULL,
+  days_in_unit INTEGER NOT NULL,
+  PRIMARY KEY (user_id, day, from_unit, to_unit)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS do_transition_summary (
+  user_id           TEXT    NOT NULL,
+  do_id             TEXT    NOT NULL,
+  from_unit         TEXT    NOT NULL,
+  to_unit           TEXT    NOT NULL,
+  transitions       INTEGER NOT NULL,
+  days_in_unit      INTEGER NOT NULL,
+  last_days_in_unit INTEGER NOT NULL,
+  last_at           TEXT    NOT NULL,
+  PRIMARY KEY (user_id, do_id, from_unit)
+) WITHOUT ROWID;
+"""
+
+_IDS = "SELECT value FROM json_each(?)"
+
+# Columns added after the first release, for files created before them.
+_ADDED_COLUMNS = {
+    "dos": {"tags": "TEXT NOT NULL DEFAULT '[]'", "restored_at": "TEXT"},
+    "dos_archive": {"tags": "TEXT NOT NULL DEFAULT '[]'"},
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _ts(value: str | datetime | None) -> str | None:
+    """Normalize a timestamp to UTC with microseconds, so stored values sort as text."""
+    if value is None:
+        return None
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _do_row(row: sqlite3.Row) -> dict:
+    data = dict(row)
+    if "completed" in data:
+        data["completed"] = bool(data["completed"])
+    if "ancestor_ids" in data:
+        data["ancestor_ids"] = json.loads(data["ancestor_ids"])
+    if "tags" in data:
+        data["tags"] = json.loads(data["tags"])
+    return data
+
+
+def _columns(columns: str) -> str:
+    if columns.strip() == "*":
+        return "*"
+    names = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in names if c not in DOS_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return ", ".join(names)
+
+
+def _writable(values: dict) -> dict:
+    unknown = sorted(set(values) - WRITABLE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Columns cannot be written: {', '.join(unknown)}")
+    row = {
+        column: _ts(value) if column in TIMESTAMP_COLUMNS else value
+        for column, value in values.items()
+    }
+    if "tags" in row:
+        row["tags"] = json.dumps(row["tags"] or [])
+    return row
+
+
+def _like_pattern(query: str) -> str:
+    return query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SqliteRepository:
+    def __init__(self, path: str | Path) -> None:
+        self._path = str(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._schema_ready = False
+
+    # -- connections -----------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        conn = sqlite3.connect(
+            self._path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        with self._lock:
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._add_missing_columns(conn)
+                self._schema_ready = True
+            self._connections.append(conn)
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection) -> None:
+        for table, columns in _ADDED_COLUMNS.items():
+            present = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column, definition in columns.items():
+                if column not in present:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """One write transaction; takes the write lock up front so it never has to upgrade."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    # -- ancestor paths --------------------------------------------------------
+
+    @staticmethod
+    def _path_under(conn: sqlite3.Connection, parent_id: str | None) -> list[str]:
+        if parent_id is None:
+            return []
+        row = conn.execute("SELECT ancestor_ids FROM dos WHERE id = ?", (parent_id,)).fetchone()
+        if row is None:
+            raise ValueError("Parent do not found")
+        return [*json.loads(row["ancestor_ids"]), parent_id]
+
+    @staticmethod
+    def _set_paths(conn: sqlite3.Connection, paths: dict[str, list[str]]) -> None:
+        conn.executemany("UPDATE dos SET ancestor_ids = ? WHERE id = ?", [(json.dumps(p), i) for i, p in paths.items()])
+        conn.execute(f"DELETE FROM do_ancestors WHERE do_id IN ({_IDS})", (json.dumps(list(paths)),))
+        conn.executemany(
+            "INSERT INTO do_ancestors (ancestor_id, do_id) VALUES (?, ?)",
+            [(ancestor, do_id) for do_id, path in paths.items() for ancestor in path],
+        )
+
+    @staticmethod
+    def _set_tags(conn: sqlite3.Connection, user_id: str, tags: dict[str, list[str]]) -> None:
+        """Mirror the given dos' tags into do_tags."""
+        conn.execute(f"DELETE FROM do_tags WHERE do_id IN ({_IDS})", (json.dumps(list(tags)),))
+        conn.executemany(
+            "INSERT INTO do_tags (user_id, tag, do_id) VALUES (?, ?, ?)",
+            [(user_id, tag, do_id) for do_id, do_tags in tags.items() for tag in do_tags],
+        )
+
+    def _move_subtree(self, conn: sqlite3.Connection, do_id: str, new_path: list[str]) -> None:
+        """Give `do_id` a new ancestor path and rewrite the paths of everything below it."""
+        below = conn.execute(
+            "SELECT d.id, d.ancestor_ids FROM do_ancestors a JOIN dos d ON d.id = a.do_id WHERE a.ancestor_id = ?",
+            (do_id,),
+        ).fetchall()
+        paths = {do_id: new_path}
+        for row in below:
+            old = json.loads(row["ancestor_ids"])
+            paths[row["id"]] = [*new_path, do_id, *old[old.index(do_id) + 1:]]
+        self._set_paths(conn, paths)
+
+    def load(self, dos: Iterable[dict], maintenance_logs: Iterable[dict] = ()) -> None:
+        """
+        Bulk-insert rows exported from elsewhere (a Supabase project, test data) as they
+        are: ids, timestamps and parent links are kept, ancestor paths are recomputed.
+        """
+        defaults = {
+            "completed": False, "days_in_unit": 0, "flow_count": 0, "completion_count": 0, "do_type": "normal", "tags": [],
+        }
+        now = _now()
+        rows = []
+        for do in dos:
+            row = {c: do.get(c, defaults.get(c)) for c in DOS_COLUMNS if c != "ancestor_ids"}
+            row["id"], row["parent_id"] = str(row["id"]), row["parent_id"] and str(row["parent_id"])
+            row["created_at"], row["updated_at"] = row["created_at"] or now, row["updated_at"] or now
+            row["tags"] = json.dumps(row["tags"] or [])
+            rows.append({c: _ts(v) if c in TIMESTAMP_COLUMNS else v for c, v in row.items()})
+        parents = {row["id"]: row["parent_id"] for row in rows}
+
+        with self._write() as conn:
+            # Parents may come after their children in `dos`; links are checked at commit.
+            conn.execute("PRAGMA defer_foreign_keys = ON")
+            columns = [c for c in DOS_COLUMNS if c != "ancestor_ids"]
+            conn.executemany(
+                f"INSERT INTO dos ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})",
+                rows,
+            )
+            paths: dict[str, list[str]] = {}
+            for do_id in parents:
+                pending: list[str] = []
+                seen: set[str] = set()
+                current: str | None = do_id
+                while current is not None and current in parents and current not in paths:
+                    if current in seen:
+                        raise ValueError("parent_id links form a cycle")
+                    seen.add(current)
+                    pending.append(current)
+                    current = parents[current]
+                if current is None:
+                    base: list[str] = []
+                elif current in paths:
+                    base = [*paths[current], current]
+                else:
+                    base = self._path_under(conn, current)
+                for node in reversed(pending):
+                    paths[node] = base
+                    base = [*base, node]
+            self._set_paths(conn, paths)
+            conn.executemany(
+                "INSERT INTO do_tags (user_id, tag, do_id) VALUES (?, ?, ?)",
+                [(row["user_id"], tag, row["id"]) for row in rows for tag in json.loads(row["tags"])],
+            )
+            self._insert_logs(conn, maintenance_logs)
+
+    # -- reads -----------------------------------------------------------------
+
+    def get_do(self, user_id: str, do_id: str, columns: str = "*") -> dict | None:
+        row = self._conn().execute(
+            f"SELECT {_columns(columns)} FROM dos WHERE id = ? AND user_id = ?", (str(do_id), user_id)
+        ).fetchone()
+        return _do_row(row) if row is not None else None
+
+    def get_dos(self, user_id: str, do_ids: Iterable[str]) -> list[dict]:
+        rows = self._conn().execute(
+            f"SELECT * FROM dos WHERE user_id = ? AND id IN ({_IDS})",
+            (user_id, json.dumps([str(d) for d in do_ids])),
+        ).fetchall()
+        return [_do_row(row) for row in rows]
+
+    def existing_do_ids(self, do_ids: Iterable[str]) -> set[str]:
+        rows = self._conn().execute(
+            f"SELECT id FROM dos WHERE id IN ({_IDS})", (json.dumps(sorted({str(d) for d in do_ids})),)
+        ).fetchall()
+        return {row["id"] for row in rows}
+
+    def _page(
+        self,
+        table: str,
+        user_id: str,
+        *,
+        columns: str,
+        filters: dict[str, object],
+        cursor: str | None,
+        limit: int,
+        tags: list[str] | None = None,
+        match_all: bool = True,
+    ) -> list[dict]:
+        conditions = ["user_id = ?"]
+        params: list[object] = [user_id]
+        for column, value in filters.items():
+            conditions.append(f"{column} = ?")
+            params.append(value)
+        if tags:
+            having = " GROUP BY do_id HAVING count(*) = ?" if match_all else ""
+            conditions.append(f"id IN (SELECT do_id FROM do_tags WHERE user_id = ? AND tag IN ({_IDS}){having})")
+            params += [user_id, json.dumps(tags)] + ([len(set(tags))] if match_all else [])
+        if cursor:
+            created_at, do_id = decode_cursor(cursor)
+            conditions.append("(created_at, id) > (?, ?)")
+            params += [_ts(created_at), do_id]
+        rows = self._conn().execute(
+            f"SELECT {_columns(columns)} FROM {table} WHERE {' AND '.join(conditions)}"
+            " ORDER BY created_at, id LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        return [_do_row(row) for row in rows]
+
+    def list_dos_page(
+        self,
+        user_id: str,
+        *,
+        columns: str = "*",
+        time_unit: str | None = None,
+        completed: bool | None = None,
+        cursor: str | None = None,
+        limit: int,
+        tags: list[str] | None = None,
+        match_all: bool = True,
+    ) -> list[dict]:
+        filters: dict[str, object] = {}
+        if time_unit:
+            filters["time_unit"] = time_unit
+        if completed is not None:
+            filters["completed"] = int(completed)
+        return self._page(
+            "dos", user_id, columns=columns, filters=filters, cursor=cursor, limit=limit, tags=tags, match_all=match_all
+        )
+
+    def tag_counts(self, user_id: str) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT tag, count(*) AS count FROM do_tags WHERE user_id = ? GROUP BY tag ORDER BY count(*) DESC, tag",
+            (user_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def board_page(self, user_id: str, units: list[str], limit: int) -> list[dict]:
+        rows = self._conn().execute(
+            f"""
+            SELECT {_DOS_COLUMN_LIST} FROM (
+              SELECT d.*, row_number() OVER (PARTITION BY d.time_unit ORDER BY d.created_at, d.id) AS rn
+              FROM dos d
+              WHERE d.user_id = ? AND d.time_unit IN ({_IDS})
+            )
+            WHERE rn <= ?
+            ORDER BY time_unit, created_at, id
+            """,
+            (user_id, json.dumps(units), limit),
+        ).fetchall()
+        return [_do_row(row) for row in rows]
+
+    def board_counts(self, user_id: str, units: list[str]) -> list[dict]:
+        rows = self._conn().execute(
+            f"""
+            SELECT time_unit, count(*) AS total, sum(completed) AS completed,
+                   sum(do_type = 'maintenance') AS maintenance
+            FROM dos
+            WHERE user_id = ? AND time_unit IN ({_IDS})
+            GROUP BY time_unit
+            """,
+            (user_id, json.dumps(units)),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_descendants(self, user_id: str, do_id: str) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT d.* FROM do_ancestors a JOIN dos d ON d.id = a.do_id"
+            " WHERE a.ancestor_id = ? AND d.user_id = ? ORDER BY d.created_at, d.id",
+            (str(do_id), user_id),
+        ).fetchall()
+        return [_do_row(row) for row in rows]
+
+    def lineage_components(self, user_id: str, do_ids: list[str]) -> list[dict]:
+        roots = sorted({(d["ancestor_ids"] or [d["id"]])[0] for d in self.get_dos(user_id, do_ids)})
+        rows = self._conn().execute(
+            """
+            SELECT * FROM dos
+            WHERE user_id = :user_id
+              AND (id IN (SELECT value FROM json_each(:roots))
+                   OR id IN (SELECT do_id FROM do_ancestors WHERE ancestor_id IN (SELECT value FROM json_each(:roots))))
+            ORDER BY created_at, id
+            """,
+            {"user_id": user_id, "roots": json.dumps(roots)},
+        ).fetchall()
+        return [_do_row(row) for row in rows]
+
+    def search_dos(self, user_id: str, query: str, *, limit: int, offset: int) -> list[dict]:
+        # LIKE is case-insensitive for ASCII; prefix matches rank first, as in `search_dos()`
+        # in Postgres, but there is no trigram similarity to order the rest by.
+        escaped = _like_pattern(query)
+        rows = self._conn().execute(
+            """
+            SELECT * FROM dos
+            WHERE user_id = ? AND title LIKE ? ESCAPE '\\'
+            ORDER BY title LIKE ? ESCAPE '\\' DESC, created_at, id
+            LIMIT ? OFFSET ?
+            """,
+            (user_id, f"%{escaped}%", f"{escaped}%", limit, offset),
+        ).fetchall()
+        return [_do_row(row) for row in rows]
+
+    def flow_up_partitions(self) -> list[str]:
+        return []
+
+    def flow_up_candidates(self, partition: str | None = None) -> list[dict]:
+        return [_do_row(row) for row in self._conn().execute(f"SELECT {_columns(FLOW_UP_COLUMNS)} FROM dos")]
+
+    # -- writes ----------------------------------------------------------------
+
+    def insert_do(self, values: dict) -> dict:
+        row = _writable(values)
+        now = _now()
+        row.update(id=str(uuid.uuid4()), created_at=now, updated_at=now)
+        with self._write() as conn:
+            conn.execute(
+                f"INSERT INTO dos ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                tuple(row.values()),
+            )
+            self._set_paths(conn, {row["id"]: self._path_under(conn, row.get("parent_id"))})
+            if "tags" in row:
+                self._set_tags(conn, row["user_id"], {row["id"]: json.loads(row["tags"])})
+            created = conn.execute("SELECT * FROM dos WHERE id = ?", (row["id"],)).fetchone()
+        return _do_row(created)
+
+    def update_do(self, user_id: str, do_id: str, values: dict) -> dict | None:
+        changes = {**_writable(values), "updated_at": _now()}
+        do_id = str(do_id)
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM dos WHERE id = ? AND user_id = ?", (do_id, user_id)).fetchone() is None:
+                return None
+            if "parent_id" in changes:
+                new_path = self._path_under(conn, changes["parent_id"])
+                if do_id in new_path:
+                    raise ValueError("A do cannot be nested under itself or one of its descendants")
+            conn.execute(
+                f"UPDATE dos SET {', '.join(f'{c} = ?' for c in changes)} WHERE id = ?",
+                (*changes.values(), do_id),
+            )
+            if "parent_id" in changes:
+                self._move_subtree(conn, do_id, new_path)
+            if "tags" in changes:
+                self._set_tags(conn, user_id, {do_id: json.loads(changes["tags"])})
+            updated = conn.execute("SELECT * FROM dos WHERE id = ?", (do_id,)).fetchone()
+        return _do_row(updated)
+
+    def clear_priority(self, user_id: str, priority_date: str) -> None:
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE dos SET priority_date = NULL, updated_at = ? WHERE user_id = ? AND priority_date = ?",
+                (_now(), user_id, priority_date),
+            )
+
+    def delete_do(self, user_id: str, do_id: str) -> None:
+        do_id = str(do_id)
+        with self._write() as conn:
+            children = [
+                row["id"] for row in conn.execute("SELECT id FROM dos WHERE parent_id = ? AND user_id = ?", (do_id, user_id))
+            ]
+            # Children are unlinked by ON DELETE SET NULL; their subtrees get new paths.
+            deleted = conn.execute("DELETE FROM dos WHERE id = ? AND user_id = ?", (do_id, user_id)).rowcount
+            if deleted:
+                for child in children:
+                    self._move_subtree(conn, child, [])
+
+    def update_tags(
+        self, user_id: str, do_ids: list[str], add: list[str], remove: list[str], *, max_tags: int
+    ) -> dict[str, int]:
+        with self._write() as conn:
+            rows = conn.execute(
+                f"SELECT id, tags FROM dos WHERE user_id = ? AND id IN ({_IDS})",
+                (user_id, json.dumps([str(d) for d in do_ids])),
+            ).fetchall()
+            merged = {row["id"]: sorted((set(json.loads(row["tags"])) | set(add)) - set(remove)) for row in rows}
+            tags = {do_id: t for do_id, t in merged.items() if len(t) <= max_tags}
+            conn.executemany(
+                "UPDATE dos SET tags = ?, updated_at = ? WHERE id = ?",
+                [(json.dumps(t), _now(), do_id) for do_id, t in tags.items()],
+            )
+            self._set_tags(conn, user_id, tags)
+        return {"updated": len(tags), "over_limit": len(merged) - len(tags)}
+
+    def set_tree_color(self, user_id: str, root_id: str, color_hex: str) -> None:
+        with self._write() as conn:
+            conn.execute(
+                """
+                UPDATE dos SET color_hex = :color, updated_at = :now
+                WHERE user_id = :user_id
+                  AND (id = :root OR id IN (SELECT do_id FROM do_ancestors WHERE ancestor_id = :root))
+                """,
+                {"color": color_hex, "now": _now(), "user_id": user_id, "root": str(root_id)},
+            )
+
+    def insert_dos(self, rows: list[dict]) -> None:
+        self.load(rows)
+
+    def apply_flow_up(self, updates: list[dict]) -> set[str]:
+        applied: set[str] = set()
+        with self._write() as conn:
+            for u in updates:
+                cursor = conn.execute(
+                    "UPDATE dos SET time_unit = ?, flow_count = ?, days_in_unit = ?, updated_at = ?"
+                    " WHERE user_id = ? AND id = ? AND time_unit = ? AND updated_at = ?",
+                    (
+                        u["time_unit"], u["flow_count"], u["days_in_unit"], _ts(u.get("updated_at")) or _now(),
+                        str(u["user_id"]), str(u["id"]), u["expected_time_unit"], _ts(u["expected_updated_at"]),
+                    ),
+                )
+                if cursor.rowcount:
+                    applied.add(str(u["id"]))
+        return applied
+
+    # -- maintenance logs ------------------------------------------------------
+
+    def add_maintenance_log(self, do_id: str, user_id: str) -> None:
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO maintenance_logs (id, do_id, user_id, logged_at) VALUES (?, ?, ?, ?)",
+                (str(uuid.uuid4()), str(do_id), user_id, _now()),
+            )
+
+    def add_maintenance_logs(self, rows: list[dict]) -> None:
+        with self._write() as conn:
+            self._insert_logs(conn, rows)
+
+    @staticmethod
+    def _insert_logs(conn: sqlite3.Connection, rows: Iterable[dict]) -> None:
+        conn.executemany(
+            "INSERT INTO maintenance_logs (id, do_id, user_id, logged_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (id) DO NOTHING",
+            [(str(r["id"]), str(r["do_id"]), str(r["user_id"]), _ts(r.get("logged_at")) or _now()) for r in rows],
+        )
+
+    def list_maintenance_logs_page(self, user_id: str, *, after: str | None, limit: int) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT id, do_id, logged_at FROM maintenance_logs WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (user_id, after or "", limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_maintenance_logs(
+        self, user_id: str, do_ids: list[str], start: datetime, end: datetime
+    ) -> dict[str, int]:
+        rows = self._conn().execute(
+            f"""
+            SELECT do_id, count(*) AS n FROM maintenance_logs
+            WHERE user_id = ? AND do_id IN ({_IDS}) AND logged_at >= ? AND logged_at < ?
+            GROUP BY do_id
+            """,
+            (user_id, json.dumps([str(d) for d in do_ids]), _ts(start), _ts(end)),
+        ).fetchall()
+        return {row["do_id"]: row["n"] for row in rows}
+
+    # -- transitions -----------------------------------------------------------
+
+    def append_transitions(self, rows: list[dict]) -> None:
+        batch = [
+            (str(r["user_id"]), str(r["do_id"]), r["from_unit"], r["to_unit"], r["days_in_unit"],
+             _ts(r.get("transitioned_at")) or _now())
+            for r in rows
+        ]
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT INTO do_transitions (user_id, do_id, from_unit, to_unit, days_in_unit, transitioned_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            # What the do_transitions_rollup trigger does in Postgres. Timestamps are
+            # stored in UTC, so their first ten characters are the UTC day.
+            conn.executemany(
+                """
+                INSERT INTO do_transition_daily (user_id, day, from_unit, to_unit, transitions, days_in_unit)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT (user_id, day, from_unit, to_unit) DO UPDATE
+                SET transitions = transitions + 1, days_in_unit = days_in_unit + excluded.days_in_unit
+                """,
+                [(user_id, at[:10], from_unit, to_unit, days) for user_id, _, from_unit, to_unit, days, at in batch],
+            )
+            conn.executemany(
+                """
+                INSERT INTO do_transition_summary
+                  (user_id, do_id, from_unit, to_unit, transitions, days_in_unit, last_days_in_unit, last_at)
+                VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (user_id, do_id, from_unit) DO UPDATE
+                SET transitions = transitions + 1,
+                    days_in_unit = days_in_unit + excluded.days_in_unit,
+                    to_unit = CASE WHEN excluded.last_at >= last_at THEN excluded.to_unit ELSE to_unit END,
+                    last_days_in_unit = CASE WHEN excluded.last_at >= last_at THEN excluded.last_days_in_unit
+                                             ELSE last_days_in_unit END,
+                    last_at = max(last_at, excluded.last_at)
+                """,
+                [(user_id, do_id, from_unit, to_unit, days, days, at) for user_id, do_id, from_unit, to_unit, days, at in batch],
+            )
+
+    def transition_summary(self, user_id: str, do_id: str) -> list[dict]:
+        rows = self._conn().execute(
+            """
+            SELECT from_unit, to_unit, transitions, days_in_unit, last_days_in_unit, last_at
+            FROM do_transition_summary
+            WHERE user_id = ? AND do_id = ?
+            ORDER BY last_at
+            """,
+            (user_id, str(do_id)),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def transition_daily(self, user_id: str, start: date, end: date) -> list[dict]:
+        rows = self._conn().execute(
+            """
+            SELECT day, from_unit, to_unit, transitions, days_in_unit
+            FROM do_transition_daily
+            WHERE user_id = ? AND day >= ? AND day < ?
+            ORDER BY day, from_unit, to_unit
+            """,
+            (user_id, start.isoformat(), end.isoformat()),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # -- archive ---------------------------------------------------------------
+
+    def archive_completed(self, cutoff: str, batch: int) -> int:
+        with self._write() as conn:
+            ids = [
+                row["id"]
+                for row in conn.execute(
+                    """
+                    SELECT d.id FROM dos d
+                    WHERE d.completed AND d.completed_at < :cutoff AND d.do_type = 'normal'
+                      AND (d.restored_at IS NULL OR d.restored_at < :cutoff)
+                      AND NOT EXISTS (SELECT 1 FROM dos c WHERE c.parent_id = d.id)
+                    ORDER BY d.completed_at
+                    LIMIT :batch
+                    """,
+                    {"cutoff": _ts(cutoff), "batch": batch},
+                )
+            ]
+            if not ids:
+                return 0
+            conn.execute(
+                f"INSERT INTO dos_archive ({_DOS_COLUMN_LIST}, archived_at)"
+                f" SELECT {_DOS_COLUMN_LIST}, ? FROM dos WHERE id IN ({_IDS})",
+                (_now(), json.dumps(ids)),
+            )
+            conn.execute(f"DELETE FROM dos WHERE id IN ({_IDS})", (json.dumps(ids),))
+        return len(ids)
+
+    def list_archived_page(self, user_id: str, *, cursor: str | None, limit: int) -> list[dict]:
+        return self._page("dos_archive", user_id, columns="*", filters={}, cursor=cursor, limit=limit)
+
+    def restore_archived(self, user_id: str, do_ids: list[str]) -> list[dict]:
+        with self._write() as conn:
+            chain = {
+                row["id"]: row
+                for row in conn.execute(
+                    f"""
+                    WITH RECURSIVE chain(id, parent_id) AS (
+                      SELECT id, parent_id FROM dos_archive
+                      WHERE user_id = :user_id AND id IN (SELECT value FROM json_each(:ids))
+                      UNION
+                      SELECT a.id, a.parent_id FROM dos_archive a JOIN chain ON a.id = chain.parent_id
+                      WHERE a.user_id = :user_id
+                    )
+                    SELECT {_DOS_COLUMN_LIST} FROM dos_archive WHERE id IN (SELECT id FROM chain)
+                    """,
+                    {"user_id": user_id, "ids": json.dumps([str(d) for d in do_ids])},
+                )
+            }
+            restored: list[str] = []
+            # Ancestors first, so each parent_id points at a live row by the time its child is inserted.
+            while chain:
+                ready = [row for row in chain.values() if row["parent_id"] not in chain]
+                # A cycle left in the archive: restore one member as a root to break it.
+                ready = ready or [next(iter(chain.values()))]
+                for row in ready:
+                    del chain[row["id"]]
+                    values = dict(row)
+                    parent_id = values["parent_id"]
+                    if parent_id is not None and conn.execute("SELECT 1 FROM dos WHERE id = ?", (parent_id,)).fetchone() is None:
+                        # A parent deleted while its child sat in the archive cannot be linked again.
+                        values["parent_id"] = parent_id = None
+                    conn.execute(
+                        f"INSERT INTO dos ({_DOS_COLUMN_LIST}) VALUES ({', '.join('?' * len(DOS_COLUMNS))})",
+                        tuple(values[c] for c in DOS_COLUMNS),
+                    )
+                    self._set_paths(conn, {values["id"]: self._path_under(conn, parent_id)})
+                    self._set_tags(conn, user_id, {values["id"]: json.loads(values["tags"])})
+                    restored.append(values["id"])
+            conn.execute(f"DELETE FROM dos_archive WHERE id IN ({_IDS})", (json.dumps(restored),))
+            # Still completed, but the archiver leaves it alone until the restore is old too.
+            conn.execute(f"UPDATE dos SET restored_at = ? WHERE id IN ({_IDS})", (_now(), json.dumps(restored)))
+            rows = conn.execute(f"SELECT * FROM dos WHERE id IN ({_IDS})", (json.dumps(restored),)).fetchall()
+        return [_do_row(row) for row in rows]
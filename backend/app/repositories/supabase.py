@@ -0,0 +1,278 @@
+"""
+`DosRepository` over PostgREST, using the shared service-role client.
+
+Multi-statement operations (board, search, lineage components, archiving) call the
+database functions defined in `supabase/migrations`; ancestor paths and
+`updated_at` are kept by triggers there.
+
+With a read replica configured, user reads go to `read_supabase` as
+`app.core.read_routing` decides, and every write pins the users it touched to the
+primary. `existing_do_ids`, the one read not scoped to a user, stays on the
+primary; the flow-up scan uses the replica while `read_router.replica_healthy()`.
+
+Upserts conflict on `(user_id, id)`, the primary key once `dos` and
+`maintenance_logs` are hash-partitioned on `user_id`; filtering every per-user
+query on `user_id` keeps it to one partition.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Iterable, Iterator
+
+from app.core.read_routing import REPLICA, read_router
+from app.core.supabase import read_supabase, supabase
+from app.services.pagination import apply_keyset
+
+FLOW_UP_COLUMNS = "id,user_id,title,time_unit,do_type,days_in_unit,flow_count,completion_count,updated_at"
+# What `apply_flow_up` sends per row: the columns it sets, and the values the scan saw.
+FLOW_UP_UPDATE_KEYS = ("id", "user_id", "time_unit", "flow_count", "days_in_unit", "expected_time_unit", "expected_updated_at")
+
+
+def _reader(user_id: str):
+    return read_supabase if read_router.target(user_id) == REPLICA else supabase
+
+
+@contextmanager
+def _writing(user_ids: str | Iterable[str] | None) -> Iterator[None]:
+    """Pin the written users (None: everyone) to the primary, even if the response was lost."""
+    try:
+        yield
+    finally:
+        if user_ids is None:
+            read_router.pin_all()
+        else:
+            read_router.pin(user_ids)
+
+
+class SupabaseRepository:
+    # -- reads -----------------------------------------------------------------
+
+    def get_do(self, user_id: str, do_id: str, columns: str = "*") -> dict | None:
+        rows = _reader(user_id).table("dos").select(columns).eq("id", do_id).eq("user_id", user_id).execute().data
+        return rows[0] if rows else None
+
+    def get_dos(self, user_id: str, do_ids: Iterable[str]) -> list[dict]:
+        ids = list(do_ids)
+        if not ids:
+            return []
+        return _reader(user_id).table("dos").select("*").eq("user_id", user_id).in_("id", ids).execute().data or []
+
+    def existing_do_ids(self, do_ids: Iterable[str]) -> set[str]:
+        ids = sorted(set(do_ids))
+        if not ids:
+            return set()
+        rows = supabase.table("dos").select("id").in_("id", ids).execute().data or []
+        return {str(row["id"]) for row in rows}
+
+    def list_dos_page(
+        self,
+        user_id: str,
+        *,
+        columns: str = "*",
+        time_unit: str | None = None,
+        completed: bool | None = None,
+        cursor: str | None = None,
+        limit: int,
+        tags: list[str] | None = None,
+        match_all: bool = True,
+    ) -> list[dict]:
+        query = _reader(user_id).table("dos").select(columns).eq("user_id", user_id)
+        if time_unit:
+            query = query.eq("time_unit", time_unit)
+        if completed is not None:
+            query = query.eq("completed", completed)
+        if tags:
+            # `@>` / `&&` on dos.tags, both served by its GIN index.
+            query = query.contains("tags", tags) if match_all else query.overlaps("tags", tags)
+        return apply_keyset(query, cursor, limit).execute().data or []
+
+    def tag_counts(self, user_id: str) -> list[dict]:
+        return _reader(user_id).rpc("dos_tag_counts", {"p_user_id": user_id}).execute().data or []
+
+    def board_page(self, user_id: str, units: list[str], limit: int) -> list[dict]:
+        params = {"p_user_id": user_id, "p_units": units, "p_limit": limit}
+        return _reader(user_id).rpc("dos_board_page", params).execute().data or []
+
+    def board_counts(self, user_id: str, units: list[str]) -> list[dict]:
+        return _reader(user_id).rpc("dos_board_counts", {"p_user_id": user_id, "p_units": units}).execute().data or []
+
+    def list_descendants(self, user_id: str, do_id: str) -> list[dict]:
+        return (
+            _reader(user_id)
+            .table("dos")
+            .select("*")
+            .eq("user_id", user_id)
+            .contains("ancestor_ids", [do_id])
+            .order("created_at", desc=False)
+            .order("id", desc=False)
+            .execute()
+            .data
+            or []
+        )
+
+    def lineage_components(self, user_id: str, do_ids: list[str]) -> list[dict]:
+        return _reader(user_id).rpc(
+            "dos_lineage_components",
+            {"p_user_id": user_id, "p_ids": do_ids},
+        ).execute().data or []
+
+    def search_dos(self, user_id: str, query: str, *, limit: int, offset: int) -> list[dict]:
+        return _reader(user_id).rpc(
+            "search_dos",
+            {"p_user_id": user_id, "p_query": query, "p_limit": limit, "p_offset": offset},
+        ).execute().data or []
+
+    def flow_up_partitions(self) -> list[str]:
+        rows = supabase.table("dos_partitions").select("name").order("name").execute().data or []
+        return [row["name"] for row in rows]
+
+    def flow_up_candidates(self, partition: str | None = None) -> list[dict]:
+        # A lagging replica would hand flow-up rows the primary has since changed.
+        client = read_supabase if read_router.enabled and read_router.replica_healthy() else supabase
+        return client.table(partition or "dos").select(FLOW_UP_COLUMNS).execute().data or []
+
+    # -- writes ----------------------------------------------------------------
+
+    def insert_do(self, values: dict) -> dict:
+        with _writing(values["user_id"]):
+            return supabase.table("dos").insert(values).execute().data[0]
+
+    def update_do(self, user_id: str, do_id: str, values: dict) -> dict | None:
+        with _writing(user_id):
+            rows = supabase.table("dos").update(values).eq("id", do_id).eq("user_id", user_id).execute().data
+        return rows[0] if rows else None
+
+    def clear_priority(self, user_id: str, priority_date: str) -> None:
+        with _writing(user_id):
+            (
+                supabase.table("dos")
+                .update({"priority_date": None})
+                .eq("user_id", user_id)
+                .eq("priority_date", priority_date)
+                .execute()
+            )
+
+    def delete_do(self, user_id: str, do_id: str) -> None:
+        with _writing(user_id):
+            supabase.table("dos").delete().eq("id", do_id).eq("user_id", user_id).execute()
+
+    def update_tags(
+        self, user_id: str, do_ids: list[str], add: list[str], remove: list[str], *, max_tags: int
+    ) -> dict[str, int]:
+        with _writing(user_id):
+            rows = supabase.rpc(
+                "dos_update_tags",
+                {"p_user_id": user_id, "p_ids": do_ids, "p_add": add, "p_remove": remove, "p_max_tags": max_tags},
+            ).execute().data
+        return rows[0] if rows else {"updated": 0, "over_limit": 0}
+
+    def set_tree_color(self, user_id: str, root_id: str, color_hex: str) -> None:
+        with _writing(user_id):
+            supabase.table("dos").update({"color_hex": color_hex}).eq("id", root_id).eq("user_id", user_id).execute()
+            (
+                supabase.table("dos")
+                .update({"color_hex": color_hex})
+                .contains("ancestor_ids", [root_id])
+                .eq("user_id", user_id)
+                .execute()
+            )
+
+    def insert_dos(self, rows: list[dict]) -> None:
+        # The ancestor-path trigger sees rows inserted earlier in the same statement.
+        with _writing({str(row["user_id"]) for row in rows}):
+            supabase.table("dos").insert(rows).execute()
+
+    def apply_flow_up(self, updates: list[dict]) -> set[str]:
+        rows = [{key: update[key] for key in FLOW_UP_UPDATE_KEYS} for update in updates]
+        with _writing(None):
+            applied = supabase.rpc("dos_apply_flow_up", {"p_updates": rows}).execute().data or []
+        return {str(row["id"]) for row in applied}
+
+    # -- maintenance logs ------------------------------------------------------
+
+    def add_maintenance_log(self, do_id: str, user_id: str) -> None:
+        with _writing(user_id):
+            supabase.table("maintenance_logs").insert({"do_id": do_id, "user_id": user_id}).execute()
+
+    def add_maintenance_logs(self, rows: list[dict]) -> None:
+        with _writing({str(row["user_id"]) for row in rows}):
+            supabase.table("maintenance_logs").upsert(rows, on_conflict="user_id,id", ignore_duplicates=True).execute()
+
+    def list_maintenance_logs_page(self, user_id: str, *, after: str | None, limit: int) -> list[dict]:
+        query = _reader(user_id).table("maintenance_logs").select("id,do_id,logged_at").eq("user_id", user_id)
+        if after is not None:
+            query = query.gt("id", after)
+        return query.order("id", desc=False).limit(limit).execute().data or []
+
+    def count_maintenance_logs(
+        self, user_id: str, do_ids: list[str], start: datetime, end: datetime
+    ) -> dict[str, int]:
+        rows = (
+            _reader(user_id)
+            .table("maintenance_logs")
+            .select("do_id")
+            .eq("user_id", user_id)
+            .in_("do_id", do_ids)
+            .gte("logged_at", start.isoformat())
+            .lt("logged_at", end.isoformat())
+            .execute()
+            .data
+            or []
+        )
+        counts: dict[str, int] = {}
+        for row in rows:
+            counts[str(row["do_id"])] = counts.get(str(row["do_id"]), 0) + 1
+        return counts
+
+    # -- transitions -----------------------------------------------------------
+
+    def append_transitions(self, rows: list[dict]) -> None:
+        # The rollups are folded in by the do_transitions_rollup trigger, in the same statement.
+        with _writing({str(row["user_id"]) for row in rows}):
+            supabase.table("do_transitions").insert(rows).execute()
+
+    def transition_summary(self, user_id: str, do_id: str) -> list[dict]:
+        return (
+            _reader(user_id)
+            .table("do_transition_summary")
+            .select("from_unit,to_unit,transitions,days_in_unit,last_days_in_unit,last_at")
+            .eq("user_id", user_id)
+            .eq("do_id", do_id)
+            .order("last_at", desc=False)
+            .execute()
+            .data
+            or []
+        )
+
+    def transition_daily(self, user_id: str, start: date, end: date) -> list[dict]:
+        return (
+            _reader(user_id)
+            .table("do_transition_daily")
+            .select("day,from_unit,to_unit,transitions,days_in_unit")
+            .eq("user_id", user_id)
+            .gte("day", start.isoformat())
+            .lt("day", end.isoformat())
+            .order("day", desc=False)
+            .execute()
+            .data
+            or []
+        )
+
+    # -- archive ---------------------------------------------------------------
+
+    def archive_completed(self, cutoff: str, batch: int) -> int:
+        with _writing(None):
+            return supabase.rpc("archive_completed_dos", {"p_cutoff": cutoff, "p_batch": batch}).execute().data or 0
+
+    def list_archived_page(self, user_id: str, *, cursor: str | None, limit: int) -> list[dict]:
+        query = _reader(user_id).table("dos_archive").select("*").eq("user_id", user_id)
+        return apply_keyset(query, cursor, limit).execute().data or []
+
+    def restore_archived(self, user_id: str, do_ids: list[str]) -> list[dict]:
+        with _writing(user_id):
+            return supabase.rpc(
+                "restore_archived_dos",
+                {"p_user_id": user_id, "p_ids": do_ids},
+            ).execute().data or []
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
 import uuid
 
 
@@ -18,12 +18,35 @@ class DoType(str, Enum):
     maintenance = "maintenance"
 
 
+MAX_TAGS_PER_DO = 20
+MAX_TAG_LENGTH = 32
+
+
+def normalize_tags(tags: list[str]) -> list[str]:
+    """Lower-case, trim, de-duplicate and sort tags; raises ValueError for one that can't be stored."""
+    normalized = sorted({t.strip().lower() for t in tags if t.strip()})
+    for tag in normalized:
+        if len(tag) > MAX_TAG_LENGTH:
+            raise ValueError(f"Tags are at most {MAX_TAG_LENGTH} characters: {tag!r}")
+        if "," in tag:
+            raise ValueError(f"Tags cannot contain commas: {tag!r}")
+    if len(normalized) > MAX_TAGS_PER_DO:
+        raise ValueError(f"A do has at most {MAX_TAGS_PER_DO} tags")
+    return normalized
+
+
 class DoCreate(BaseModel):
     title: str
     time_unit: TimeUnit
     do_type: DoType = DoType.normal
     parent_id: uuid.UUID | None = None
     color_hex: str | None = None
+    tags: list[str] = []
+
+    @field_validator("tags")
+    @classmethod
+    def check_tags(cls, v: list[str]) -> list[str]:
+        return normalize_tags(v)
 
 
 class DoUpdate(BaseModel):
@@ -33,6 +56,67 @@ class DoUpdate(BaseModel):
     time_unit: TimeUnit | None = None
     parent_id: uuid.UUID | None = None
     color_hex: str | None = None
+    # Replaces the do's tags; use POST /dos/tags to add or remove some on many dos.
+    tags: list[str] | None = None
+
+    @field_validator("tags")
+    @classmethod
+    def check_tags(cls, v: list[str] | None) -> list[str] | None:
+        return None if v is None else normalize_tags(v)
+
+
+class DoTagsUpdate(BaseModel):
+    do_ids: list[uuid.UUID]
+    add: list[str] = []
+    remove: list[str] = []
+
+    @field_validator("add", "remove")
+    @classmethod
+    def check_tags(cls, v: list[str]) -> list[str]:
+        return normalize_tags(v)
+
+
+class DoTagsUpdateResult(BaseModel):
+    updated: int
+    # Dos left unchanged because they would have ended up with more than MAX_TAGS_PER_DO tags.
+    over_limit: int = 0
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
+class DoImport(BaseModel):
+    """A `do` line of an NDJSON import, as `GET /dos/export` writes it."""
+
+    id: uuid.UUID
+    title: str
+    time_unit: TimeUnit
+    do_type: DoType = DoType.normal
+    completed: bool = False
+    completed_at: datetime | None = None
+    days_in_unit: int = 0
+    flow_count: int = 0
+    completion_count: int = 0
+    parent_id: uuid.UUID | None = None
+    priority_date: date | None = None
+    color_hex: str | None = None
+    tags: list[str] = []
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    @field_validator("tags")
+    @classmethod
+    def check_tags(cls, v: list[str]) -> list[str]:
+        return normalize_tags(v)
+
+
+class MaintenanceLogImport(BaseModel):
+    """A `log` line of an NDJSON import; `do_id` is the exported id of its do."""
+
+    do_id: uuid.UUID
+    logged_at: datetime
 
 
 class Do(BaseModel):
@@ -49,5 +133,75 @@ class Do(BaseModel):
     created_at: datetime
     updated_at: datetime
     parent_id: uuid.UUID | None = None
+    # Ancestors root-first, maintained by the database on insert and re-parent.
+    ancestor_ids: list[uuid.UUID] = []
     color_hex: str | None = None
+    tags: list[str] = []
     is_today_priority: bool = False
+
+
+class ArchivedDo(Do):
+    archived_at: datetime
+
+
+class DoSearchResult(BaseModel):
+    matches: list[Do]
+    related: list[Do] = []
+    next_offset: int | None = None
+
+
+class BoardColumn(BaseModel):
+    time_unit: TimeUnit
+    dos: list[Do]
+    total: int
+    completed: int
+    maintenance: int
+    next_cursor: str | None = None
+
+
+class Board(BaseModel):
+    columns: list[BoardColumn]
+
+
+class DoTransitionSummary(BaseModel):
+    from_unit: TimeUnit
+    # Where the do went the last time it left from_unit.
+    to_unit: TimeUnit
+    transitions: int
+    # Total, last and average days spent in from_unit before moving on.
+    days_in_unit: int
+    last_days_in_unit: int
+    average_days_in_unit: float
+    last_at: datetime
+
+
+class DoHistory(BaseModel):
+    do_id: uuid.UUID
+    time_unit: TimeUnit
+    days_in_unit: int
+    flow_count: int
+    transitions: list[DoTransitionSummary]
+
+
+class FlowDay(BaseModel):
+    day: date
+    from_unit: TimeUnit
+    to_unit: TimeUnit
+    transitions: int
+    days_in_unit: int
+    average_days_in_unit: float
+
+
+class FlowTotal(BaseModel):
+    from_unit: TimeUnit
+    to_unit: TimeUnit
+    transitions: int
+    days_in_unit: int
+    average_days_in_unit: float
+
+
+class FlowAnalytics(BaseModel):
+    start: date
+    end: date
+    days: list[FlowDay]
+    totals: list[FlowTotal]
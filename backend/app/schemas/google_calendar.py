@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+
+class CalendarEvent(BaseModel):
+    calendar_id: str
+    event_id: str
+    summary: str | None = None
+    start_at: datetime
+    end_at: datetime
+    all_day: bool
+    transparency: str = "opaque"
+
+
+class CalendarDay(BaseModel):
+    date: date
+    events: list[CalendarEvent]
+    # True when a background re-sync was started because the stored events were stale.
+    refreshing: bool = False
+
+
+class CalendarSyncSummary(BaseModel):
+    calendars: int
+    upserted: int
+    deleted: int
+
+
+class FreeSlot(BaseModel):
+    start_at: datetime
+    end_at: datetime
+    minutes: int
+
+
+class FreeSlots(BaseModel):
+    date: date
+    slots: list[FreeSlot]
@@ -0,0 +1,59 @@
+"""
+Ancestry lookups over the materialized `dos.ancestor_ids` path.
+
+Each do stores its ancestors root-first, maintained by the storage backend on insert
+and re-parent (triggers in Postgres), so ancestors are read from one row and
+descendants are one indexed lookup — no walking `parent_id` link by link.
+"""
+
+from app.repositories import repository
+
+
+class LineageCycleError(ValueError):
+    """Raised when a parent link would make a do its own ancestor."""
+
+
+def _owned_path(user_id: str, do_id: str) -> list[str]:
+    row = repository.get_do(user_id, do_id, "id,ancestor_ids")
+    if row is None:
+        raise ValueError("Do not found")
+    return [str(a) for a in row.get("ancestor_ids") or []]
+
+
+def lineage_root_id(user_id: str, do_id: str) -> str:
+    """Return the id of the root of the tree `do_id` belongs to (itself when it has no parent)."""
+    path = _owned_path(user_id, do_id)
+    return path[0] if path else do_id
+
+
+def check_new_parent(user_id: str, do_id: str, parent_id: str) -> None:
+    """
+    Validate re-parenting `do_id` under `parent_id`.
+
+    Raises ValueError when the parent is not the user's, and LineageCycleError when the
+    parent is the do itself or one of its descendants.
+    """
+    try:
+        parent_path = _owned_path(user_id, parent_id)
+    except ValueError:
+        raise ValueError("Parent do not found") from None
+    if parent_id == do_id or do_id in parent_path:
+        raise LineageCycleError("A do cannot be nested under itself or one of its descendants")
+
+
+def list_ancestors(user_id: str, do_id: str) -> list[dict]:
+    """Return a do's ancestors nearest first (parent, grandparent, …); raises ValueError if not found."""
+    path = _owned_path(user_id, do_id)
+    if not path:
+        return []
+    rows = repository.get_dos(user_id, path)
+    by_id = {str(row["id"]): row for row in rows}
+    return [by_id[a] for a in reversed(path) if a in by_id]
+
+
+def list_descendants(user_id: str, do_id: str) -> list[dict]:
+    """Return every do below `do_id`, shallowest first; raises ValueError if not found."""
+    _owned_path(user_id, do_id)
+    rows = repository.list_descendants(user_id, do_id)
+    rows.sort(key=lambda row: len(row.get("ancestor_ids") or []))
+    return rows
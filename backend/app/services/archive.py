@@ -0,0 +1,58 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.repositories import repository
+from app.services.dos_snapshot import note_bulk_write
+from app.services.pagination import split_page
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def run_archive(older_than_days: int | None = None) -> int:
+    """
+    Move dos completed more than `older_than_days` ago into dos_archive.
+
+    The repository only moves dos with no children left in the hot table, so
+    this keeps calling it until a pass moves nothing; each pass can free up the
+    parents of the previous one.
+
+    Returns the number of dos archived.
+    """
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+    archived = 0
+    while True:
+        try:
+            moved = repository.archive_completed(cutoff, ARCHIVE_BATCH_SIZE)
+        except Exception:
+            logger.exception("archive: failed to archive completed dos")
+            raise
+        archived += moved
+        if moved == 0:
+            break
+        note_bulk_write()
+
+    logger.info("archive complete: %s dos archived", archived)
+    return archived
+
+
+def list_archived_dos(user_id: str, *, cursor: str | None, limit: int) -> tuple[list[dict], str | None]:
+    """Return one keyset page of a user's archived dos and the cursor for the next page."""
+    rows = repository.list_archived_page(user_id, cursor=cursor, limit=limit)
+    return split_page(rows, limit)
+
+
+def restore_archived_do(user_id: str, do_id: str) -> list[dict]:
+    """
+    Move an archived do (and any archived ancestors) back into the hot table.
+
+    Returns the restored rows; raises ValueError when the do is not in the user's archive.
+    """
+    restored = repository.restore_archived(user_id, [do_id])
+    if not restored:
+        raise ValueError("Archived do not found")
+    return restored
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from app.services.pagination import encode_cursor
+
+
+def group_board_rows(
+    rows: list[dict],
+    counts: list[dict],
+    units: list[str],
+    limit: int,
+) -> list[dict]:
+    """
+    Assemble board columns from a single multi-unit fetch.
+
+    `rows` holds at most `limit` dos per time unit, already ordered by `(created_at, id)`;
+    `counts` holds one aggregate row per non-empty unit. Columns come back in the order
+    of `units`, and a column whose total exceeds what was shipped gets a `next_cursor`
+    usable with `GET /dos?time_unit=...&cursor=...`.
+    """
+    rows_by_unit: dict[str, list[dict]] = {unit: [] for unit in units}
+    for row in rows:
+        if row["time_unit"] in rows_by_unit:
+            rows_by_unit[row["time_unit"]].append(row)
+    counts_by_unit = {c["time_unit"]: c for c in counts}
+
+    columns: list[dict] = []
+    for unit in units:
+        unit_rows = rows_by_unit[unit]
+        unit_counts = counts_by_unit.get(unit, {})
+        total = int(unit_counts.get("total", 0))
+        next_cursor = encode_cursor(unit_rows[-1]) if len(unit_rows) >= limit and total > len(unit_rows) else None
+        columns.append(
+            {
+                "time_unit": unit,
+                "dos": unit_rows,
+                "total": total,
+                "completed": int(unit_counts.get("completed", 0)),
+                "maintenance": int(unit_counts.get("maintenance", 0)),
+                "next_cursor": next_cursor,
+            }
+        )
+    return columns
+
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+"""
+Google Calendar event sync engine.
+
+Each connected Google account's selected calendars are mirrored into
+`google_calendar_events` using Google's incremental sync: the first sync of a
+calendar lists everything and stores the returned `nextSyncToken`; later syncs send
+that token and receive only what changed (cancelled events included) since then.
+When Google expires a token (410 Gone) the calendar is re-listed from scratch.
+
+Calendars are fetched from Google concurrently, bounded by
+`settings.GOOGLE_SYNC_CONCURRENCY`, and syncs are single-flight per user. Reads
+(`list_events_for_day`) only ever touch the local store.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from http import HTTPStatus
+from typing import Awaitable, Iterable, TypeVar
+
+from app.core.config import settings
+from app.core.supabase import supabase
+from app.services import free_slots
+from app.services.google_calendar_api import GoogleSyncTokenExpired, list_calendars, list_events_page
+from app.services.google_oauth import GoogleTokenPayload, GoogleUserInfo
+from app.services.google_tokens import google_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EVENT_COLUMNS = "calendar_id,event_id,summary,start_at,end_at,all_day,transparency"
+UPSERT_CHUNK_SIZE = 500
+
+_inflight_syncs: dict[str, asyncio.Task[dict]] = {}
+
+
+@dataclass
+class CalendarChanges:
+    upserts: list[dict] = field(default_factory=list)
+    deleted_ids: list[str] = field(default_factory=list)
+    next_sync_token: str | None = None
+    full_resync: bool = False
+
+
+# ---------------------------------------------------------------------------
+# Google → store row conversion
+# ---------------------------------------------------------------------------
+
+def parse_google_event(item: dict) -> dict | None:
+    """
+    Convert a Google event resource into the stored row shape.
+
+    All-day events (`start.date`) span whole UTC days. Returns None for events that
+    carry no usable start/end (e.g. cancelled instances of a recurring event).
+    """
+    start = item.get("start") or {}
+    end = item.get("end") or {}
+    if "dateTime" in start and "dateTime" in end:
+        start_at = datetime.fromisoformat(start["dateTime"])
+        end_at = datetime.fromisoformat(end["dateTime"])
+        all_day = False
+    elif "date" in start and "date" in end:
+        start_at = datetime.combine(date.fromisoformat(start["date"]), time.min, tzinfo=timezone.utc)
+        end_at = datetime.combine(date.fromisoformat(end["date"]), time.min, tzinfo=timezone.utc)
+        all_day = True
+    else:
+        return None
+
+    return {
+        "event_id": item["id"],
+        "summary": item.get("summary"),
+        "start_at": start_at.astimezone(timezone.utc).isoformat(),
+        "end_at": end_at.astimezone(timezone.utc).isoformat(),
+        "all_day": all_day,
+        "transparency": item.get("transparency", "opaque"),
+        "updated_at": item.get("updated"),
+    }
+
+
+async def _fetch_all_pages(*, access_token: str, calendar_id: str, sync_token: str | None) -> CalendarChanges:
+    by_id: dict[str, dict] = {}
+    deleted: dict[str, None] = {}
+    page_token: str | None = None
+    while True:
+        page = await list_events_page(
+            access_token=access_token,
+            calendar_id=calendar_id,
+            sync_token=sync_token,
+            page_token=page_token,
+        )
+        for item in page.get("items", []):
+            event_id = item["id"]
+            row = None if item.get("status") == "cancelled" else parse_google_event(item)
+            if row is None:
+                by_id.pop(event_id, None)
+                deleted[event_id] = None
+            else:
+                deleted.pop(event_id, None)
+                by_id[event_id] = row
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return CalendarChanges(
+                upserts=list(by_id.values()),
+                deleted_ids=list(deleted),
+                next_sync_token=page.get("nextSyncToken"),
+                full_resync=sync_token is None,
+            )
+
+
+async def fetch_calendar_changes(*, access_token: str, calendar_id: str, sync_token: str | None) -> CalendarChanges:
+    """
+    Fetch everything that changed in a calendar since `sync_token` (or everything, if None).
+
+    A 410 from Google restarts as a full listing; `full_resync` on the result tells the
+    caller to replace, rather than patch, its stored events.
+    """
+    try:
+        return await _fetch_all_pages(access_token=access_token, calendar_id=calendar_id, sync_token=sync_token)
+    except GoogleSyncTokenExpired:
+        logger.info("calendar_sync: sync token expired for calendar %s, running full sync", calendar_id)
+        return await _fetch_all_pages(access_token=access_token, calendar_id=calendar_id, sync_token=None)
+
+
+async def gather_bounded(awaitables: Iterable[Awaitable[T]], limit: int) -> list[T]:
+    """Await all `awaitables` with at most `limit` running at once, preserving order."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(a) for a in awaitables))
+
+
+# ---------------------------------------------------------------------------
+# Local store
+# ---------------------------------------------------------------------------
+
+def save_google_connection(*, user_id: str, profile: GoogleUserInfo, token_payload: GoogleTokenPayload) -> dict:
+    """Persist (or update) the connection created by the OAuth callback."""
+    row = {
+        "user_id": user_id,
+        "google_sub": profile["sub"],
+        "email": profile.get("email"),
+        "scope": token_payload.get("scope"),
+    }
+    if token_payload.get("refresh_token"):
+        row["refresh_token"] = token_payload["refresh_token"]
+        return supabase.table("google_calendar_connections").upsert(row, on_conflict="user_id,google_sub").execute().data[0]
+
+    # Google only sends a refresh token on first consent; keep the one already stored.
+    result = (
+        supabase.table("google_calendar_connections")
+        .update(row)
+        .eq("user_id", user_id)
+        .eq("google_sub", profile["sub"])
+        .execute()
+    )
+    if not result.data:
+        raise ValueError("Google did not return a refresh token")
+    return result.data[0]
+
+
+def _apply_changes(connection: dict, calendar_row: dict, changes: CalendarChanges, synced_at: str) -> None:
+    events = supabase.table("google_calendar_events")
+    calendar_id = calendar_row["calendar_id"]
+
+    if changes.full_resync:
+        events.delete().eq("connection_id", connection["id"]).eq("calendar_id", calendar_id).execute()
+    elif changes.deleted_ids:
+        (
+            events.delete()
+            .eq("connection_id", connection["id"])
+            .eq("calendar_id", calendar_id)
+            .in_("event_id", changes.deleted_ids)
+            .execute()
+        )
+
+    rows = [
+        {**row, "connection_id": connection["id"], "user_id": connection["user_id"], "calendar_id": calendar_id}
+        for row in changes.upserts
+    ]
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        events.upsert(rows[i:i + UPSERT_CHUNK_SIZE], on_conflict="connection_id,calendar_id,event_id").execute()
+
+    supabase.table("google_calendars").update(
+        {"sync_token": changes.next_sync_token, "synced_at": synced_at}
+    ).eq("id", calendar_row["id"]).execute()
+
+
+def _sync_calendar_rows(connection: dict, calendars: list[dict]) -> list[dict]:
+    """Upsert the connection's selected calendars and drop ones no longer selected."""
+    selected = [c for c in calendars if c.get("selected") or c.get("primary")]
+    rows = [
+        {
+            "connection_id": connection["id"],
+            "user_id": connection["user_id"],
+            "calendar_id": c["id"],
+            "summary": c.get("summary"),
+        }
+        for c in selected
+    ]
+    stored = []
+    if rows:
+        stored = (
+            supabase.table("google_calendars")
+            .upsert(rows, on_conflict="connection_id,calendar_id")
+            .execute()
+            .data
+            or []
+        )
+
+    keep = [c["id"] for c in selected]
+    for table in ("google_calendar_events", "google_calendars"):
+        query = supabase.table(table).delete().eq("connection_id", connection["id"])
+        if keep:
+            query = query.not_.in_("calendar_id", keep)
+        query.execute()
+    return stored
+
+
+# ---------------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------------
+
+async def sync_connection(connection: dict) -> dict:
+    """Sync every selected calendar of one connection; returns per-connection counts."""
+    import httpx  # deferred: only apps with Google connected need it at runtime
+
+    account_id = connection["google_sub"]
+    access_token = await google_tokens.get_access_token(account_id, refresh_token=connection["refresh_token"])
+    try:
+        calendars = await list_calendars(access_token=access_token)
+        calendar_rows = await asyncio.to_thread(_sync_calendar_rows, connection, calendars)
+
+        async def sync_one(calendar_row: dict) -> CalendarChanges:
+            return await fetch_calendar_changes(
+                access_token=access_token,
+                calendar_id=calendar_row["calendar_id"],
+                sync_token=calendar_row.get("sync_token"),
+            )
+
+        all_changes = await gather_bounded(
+            (sync_one(row) for row in calendar_rows),
+            settings.GOOGLE_SYNC_CONCURRENCY,
+        )
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == HTTPStatus.UNAUTHORIZED:
+            google_tokens.invalidate(account_id)
+        raise
+
+    synced_at = datetime.now(timezone.utc).isoformat()
+    for calendar_row, changes in zip(calendar_rows, all_changes):
+        await asyncio.to_thread(_apply_changes, connection, calendar_row, changes, synced_at)
+    free_slots.invalidate_user(connection["user_id"])
+
+    return {
+        "calendars": len(calendar_rows),
+        "upserted": sum(len(c.upserts) for c in all_changes),
+        "deleted": sum(len(c.deleted_ids) for c in all_changes),
+    }
+
+
+async def _sync_user(user_id: str) -> dict:
+    connections = (
+        supabase.table("google_calendar_connections").select("*").eq("user_id", user_id).execute().data or []
+    )
+    summary = {"calendars": 0, "upserted": 0, "deleted": 0}
+    for connection in connections:
+        result = await sync_connection(connection)
+        for key in summary:
+            summary[key] += result[key]
+    logger.info("calendar_sync complete for user %s: %s", user_id, summary)
+    return summary
+
+
+async def sync_user_calendars(user_id: str) -> dict:
+    """
+    Sync all of a user's connected calendars.
+
+    Concurrent calls for the same user share one sync instead of each hitting Google.
+    """
+    task = _inflight_syncs.get(user_id)
+    if task is None:
+        task = asyncio.create_task(_sync_user(user_id))
+        _inflight_syncs[user_id] = task
+        task.add_done_callback(lambda _: _inflight_syncs.pop(user_id, None))
+    return await asyncio.shield(task)
+
+
+async def sync_user_calendars_quietly(user_id: str) -> None:
+    """Background-task variant of `sync_user_calendars` that logs instead of raising."""
+    try:
+        await sync_user_calendars(user_id)
+    except Exception:
+        logger.exception("calendar_sync: background sync failed for user %s", user_id)
+
+
+def sync_is_stale(user_id: str, now: datetime) -> bool:
+    """True when any of the user's calendars is unsynced or older than the staleness threshold."""
+    calendars = supabase.table("google_calendars").select("synced_at").eq("user_id", user_id).execute().data or []
+    if not calendars:
+        connections = (
+            supabase.table("google_calendar_connections").select("id").eq("user_id", user_id).limit(1).execute().data
+        )
+        return bool(connections)
+    threshold = now - timedelta(seconds=settings.GOOGLE_SYNC_STALE_AFTER_SECONDS)
+    return any(
+        c.get("synced_at") is None or datetime.fromisoformat(c["synced_at"]) < threshold
+        for c in calendars
+    )
+
+
+def list_events_for_day(user_id: str, day: date) -> list[dict]:
+    """Return the stored events overlapping the given UTC day, ordered by start."""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    return (
+        supabase.table("google_calendar_events")
+        .select(EVENT_COLUMNS)
+        .eq("user_id", user_id)
+        .lt("start_at", end.isoformat())
+        .gt("end_at", start.isoformat())
+        .order("start_at", desc=False)
+        .execute()
+        .data
+        or []
+    )
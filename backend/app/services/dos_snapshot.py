@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+"""
+Coalesced reads of a user's full do list.
+
+On page load the frontend asks for every board column at once (and again after each
+mutation), so one user sends several `GET /dos` requests within milliseconds. A
+first-page request that finds no other one running for its user runs its own paged
+query. Those that arrive while one is running share a single fetch of the user's dos
+instead of each running their own `dos` query and `inject_counts` (auth is still
+checked per request); each request then filters and pages the shared rows itself.
+
+Read-after-write: every endpoint that changes a user's dos (or maintenance logs)
+does so inside `write_scope(user_id)`, which records the write once it has returned,
+and whole-table jobs call `note_bulk_write()`. A fetch remembers the write generation it started under, and a
+new read only joins a fetch from the current generation — so a read that starts
+after a write has completed always triggers (or joins) a fetch that started after
+it too. Generations are per process, which matches running the API as a single worker.
+
+Degraded mode: with `settings.CIRCUIT_BREAKER_ENABLED`, read endpoints keep the last
+good answer to each first-page query (up to `STALE_COPIES_MAX` of them) with
+`remember_good`. When a later read fails because Supabase is down or the circuit is
+open, `stale_copy` hands that answer back so readers get their last known board
+instead of an error. It is never served while the database is answering.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Hashable, Iterator
+
+from app.core.config import settings
+from app.core.metrics import count_cache
+from app.repositories import repository
+from app.services.maintenance import inject_counts
+
+# Users with more dos than this are served by per-request paged queries instead.
+SNAPSHOT_MAX_ROWS = 2000
+# Last good first-page answers kept for degraded mode, least recently stored dropped first.
+STALE_COPIES_MAX = 5000
+# How long a user found to be over SNAPSHOT_MAX_ROWS is served paged queries before
+# the cap is checked again, and how many such users are remembered.
+OVERSIZED_RECHECK_SECONDS = 600.0
+OVERSIZED_MAX_USERS = 10_000
+
+
+@dataclass(frozen=True)
+class DosSnapshot:
+    # All of the user's dos ordered by (created_at, id), with completion_count and
+    # is_today_priority filled in. Shared between requests: never mutate.
+    rows: list[dict]
+    complete: bool
+    fetched_at: datetime | None = None
+
+
+@dataclass(frozen=True)
+class StaleCopy:
+    # A read endpoint's last good answer to one query, and when it was read.
+    value: Any
+    fetched_at: datetime
+
+
+_bulk_generation = 0
+_user_generations: dict[str, int] = {}
+_inflight: dict[str, tuple[tuple[int, int], asyncio.Task[DosSnapshot]]] = {}
+# Users -> first-page reads running for them (see `first_page_read`).
+_active_reads: dict[str, int] = {}
+_last_good: OrderedDict[Hashable, StaleCopy] = OrderedDict()
+_last_good_lock = threading.Lock()
+# User -> monotonic time until which they are known to be over the cap.
+_oversized: OrderedDict[str, float] = OrderedDict()
+_oversized_lock = threading.Lock()
+_INCOMPLETE = DosSnapshot(rows=[], complete=False)
+
+
+def note_write(user_id: str) -> None:
+    """Record that a write to this user's dos has completed."""
+    _user_generations[user_id] = _user_generations.get(user_id, 0) + 1
+
+
+@contextmanager
+def write_scope(user_id: str) -> Iterator[None]:
+    """Wrap a request's writes; the write is recorded on exit, even if the block fails part-way."""
+    try:
+        yield
+    finally:
+        note_write(user_id)
+
+
+def note_bulk_write() -> None:
+    """Record that a job has changed dos across all users (flow-up, archiving)."""
+    global _bulk_generation
+    _bulk_generation += 1
+
+
+def _generation(user_id: str) -> tuple[int, int]:
+    return _bulk_generation, _user_generations.get(user_id, 0)
+
+
+def _fetch_snapshot(user_id: str) -> DosSnapshot:
+    # One look-ahead row past the cap tells us the user has too many to snapshot.
+    rows = repository.list_dos_page(user_id, limit=SNAPSHOT_MAX_ROWS)
+    if len(rows) > SNAPSHOT_MAX_ROWS:
+        _remember_oversized(user_id)
+        return _INCOMPLETE
+
+    now = datetime.now(timezone.utc)
+    inject_counts(rows, now)
+    today_str = now.date().isoformat()
+    for d in rows:
+        d["is_today_priority"] = (d.get("priority_date") == today_str)
+    return DosSnapshot(rows=rows, complete=True, fetched_at=now)
+
+
+def remember_good(key: Hashable, value: Any, fetched_at: datetime) -> None:
+    """Keep `value` as the last good answer to the query `key` (which should include the user), in degraded mode."""
+    if not settings.CIRCUIT_BREAKER_ENABLED:
+        return
+    with _last_good_lock:
+        _last_good[key] = StaleCopy(value=value, fetched_at=fetched_at)
+        _last_good.move_to_end(key)
+        while len(_last_good) > STALE_COPIES_MAX:
+            _last_good.popitem(last=False)
+
+
+def stale_copy(key: Hashable) -> StaleCopy | None:
+    """The last good answer to the query `key`, if degraded mode has one."""
+    with _last_good_lock:
+        copy = _last_good.get(key)
+    if copy is not None:
+        count_cache("dos_stale_copy", hit=True)
+    return copy
+
+
+def _remember_oversized(user_id: str) -> None:
+    with _oversized_lock:
+        _oversized[user_id] = time.monotonic() + OVERSIZED_RECHECK_SECONDS
+        _oversized.move_to_end(user_id)
+        while len(_oversized) > OVERSIZED_MAX_USERS:
+            _oversized.popitem(last=False)
+
+
+def _known_oversized(user_id: str) -> bool:
+    with _oversized_lock:
+        until = _oversized.get(user_id)
+        if until is not None and until <= time.monotonic():
+            del _oversized[user_id]
+            until = None
+    return until is not None
+
+
+async def load_snapshot(user_id: str) -> DosSnapshot:
+    """
+    Return the user's dos, joining an in-flight fetch from the current write generation if there is one.
+
+    Users recently found to be over `SNAPSHOT_MAX_ROWS` get an incomplete snapshot
+    without a fetch, for `OVERSIZED_RECHECK_SECONDS`.
+    """
+    if _known_oversized(user_id):
+        count_cache("dos_snapshot_oversized", hit=True)
+        return _INCOMPLETE
+    generation = _generation(user_id)
+    entry = _inflight.get(user_id)
+    if entry is not None and entry[0] == generation:
+        count_cache("dos_snapshot", hit=True)
+        return await asyncio.shield(entry[1])
+
+    count_cache("dos_snapshot", hit=False)
+    # The fetch runs in a worker thread so requests arriving meanwhile can join it.
+    task = asyncio.create_task(asyncio.to_thread(_fetch_snapshot, user_id))
+    _inflight[user_id] = (generation, task)
+
+    def forget(done: asyncio.Task[DosSnapshot]) -> None:
+        current = _inflight.get(user_id)
+        if current is not None and current[1] is done:
+            del _inflight[user_id]
+
+    task.add_done_callback(forget)
+    return await asyncio.shield(task)
+
+
+@asynccontextmanager
+async def first_page_read(user_id: str) -> AsyncIterator[DosSnapshot | None]:
+    """
+    Count a first-page read for the user while the block runs.
+
+    Yields a shared snapshot (see `load_snapshot`) when another first-page read for the
+    user is already running, and None otherwise: a lone request runs its own paged query
+    rather than loading up to `SNAPSHOT_MAX_ROWS` rows to serve one page.
+    """
+    shared = _active_reads.get(user_id, 0) > 0 or user_id in _inflight
+    _active_reads[user_id] = _active_reads.get(user_id, 0) + 1
+    try:
+        yield await load_snapshot(user_id) if shared else None
+    finally:
+        _active_reads[user_id] -= 1
+        if not _active_reads[user_id]:
+            del _active_reads[user_id]
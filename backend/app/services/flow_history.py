@@ -0,0 +1,60 @@
+"""
+Flow history of single dos and flow analytics per user.
+
+Both read the rollups that the do_transitions log keeps current as flow-up appends
+to it (see the add_do_transitions migration), so their cost depends on how many
+units a do has left or how many days are asked for, never on the size of the log.
+"""
+
+from datetime import date, timedelta
+
+from app.repositories import repository
+
+# Longest window GET /dos/analytics/flow serves, in days.
+MAX_ANALYTICS_DAYS = 366
+
+
+def _average(days_in_unit: int, transitions: int) -> float:
+    return round(days_in_unit / transitions, 2) if transitions else 0.0
+
+
+def do_history(user_id: str, do: dict) -> dict:
+    """Where one of the user's dos has flowed from and how long it sat in each unit."""
+    rows = repository.transition_summary(user_id, str(do["id"]))
+    return {
+        "do_id": do["id"],
+        "time_unit": do["time_unit"],
+        "days_in_unit": do["days_in_unit"],
+        "flow_count": do["flow_count"],
+        "transitions": [
+            {**row, "average_days_in_unit": _average(row["days_in_unit"], row["transitions"])}
+            for row in rows
+        ],
+    }
+
+
+def flow_analytics(user_id: str, start: date, end: date) -> dict:
+    """
+    The user's transitions per day and per `from_unit -> to_unit` over `start <= day < end`.
+
+    Days without transitions are omitted from `days`.
+    """
+    rows = repository.transition_daily(user_id, start, end)
+    totals: dict[tuple[str, str], dict] = {}
+    for row in rows:
+        key = (row["from_unit"], row["to_unit"])
+        total = totals.setdefault(key, {"from_unit": key[0], "to_unit": key[1], "transitions": 0, "days_in_unit": 0})
+        total["transitions"] += row["transitions"]
+        total["days_in_unit"] += row["days_in_unit"]
+    return {
+        "start": start,
+        "end": end - timedelta(days=1),
+        "days": [
+            {**row, "average_days_in_unit": _average(row["days_in_unit"], row["transitions"])}
+            for row in rows
+        ],
+        "totals": [
+            {**total, "average_days_in_unit": _average(total["days_in_unit"], total["transitions"])}
+            for total in sorted(totals.values(), key=lambda t: -t["transitions"])
+        ],
+    }
@@ -1,7 +1,11 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
-from app.core.supabase import supabase
+from app.core.config import settings
+from app.core.metrics import timed
+from app.repositories import repository
+from app.services.dos_snapshot import note_bulk_write
 
 logger = logging.getLogger(__name__)
 
@@ -106,49 +110,109 @@ def _compute_normal_update(item: dict, now_utc: datetime, now_iso: str) -> tuple
         }, None
 
 
-def run_flow_up() -> dict:
-    """
-    Implements flow-up entirely in Python — no stored procedure.
+def _transition_row(item: dict, update: dict, now_iso: str) -> dict:
+    """The do_transitions row for an item that flowed: where it went and how long it had sat."""
+    return {
+        "user_id": item["user_id"],
+        "do_id": item["id"],
+        "from_unit": item["time_unit"],
+        "to_unit": update["time_unit"],
+        "days_in_unit": item["days_in_unit"],
+        "transitioned_at": now_iso,
+    }
 
-    Fetches all dos (completed and uncompleted), computes each item's new state,
-    and applies all changes in a single batch upsert.
-
-    Returns a summary dict of how many items moved per transition,
-    e.g. {"today_to_week": 3, "week_to_month": 1}.
-    """
-    now_utc = datetime.now(timezone.utc)
-    now_iso = now_utc.isoformat()
 
+def _flow_up_partition(partition: str | None, now_utc: datetime, now_iso: str) -> dict[str, int]:
+    """Flow up every do in one partition of `dos` (None: the whole table); returns its transition counts."""
     try:
-        result = (
-            supabase.table("dos")
-            .select("id,user_id,title,time_unit,do_type,days_in_unit,flow_count,completion_count")
-            .execute()
-        )
-        items = result.data or []
+        with timed("fetch", job="flow_up"):
+            items = repository.flow_up_candidates(partition)
     except Exception:
-        logger.exception("flow_up: failed to fetch dos")
+        logger.exception("flow_up: failed to fetch dos from %s", partition or "dos")
         raise
 
     summary: dict[str, int] = {}
     updates: list[dict] = []
-
-    for item in items:
-        do_type = item.get("do_type", "normal")
-        if do_type == "maintenance":
-            update, transition = _compute_maintenance_update(item, now_utc, now_iso)
-        else:
-            update, transition = _compute_normal_update(item, now_utc, now_iso)
-        updates.append(update)
-        if transition:
-            summary[transition] = summary.get(transition, 0) + 1
-
+    # (transition key, do_transitions row) for each item that would move.
+    moves: list[tuple[str, dict]] = []
+
+    with timed("compute", job="flow_up"):
+        for item in items:
+            do_type = item.get("do_type", "normal")
+            if do_type == "maintenance":
+                update, transition = _compute_maintenance_update(item, now_utc, now_iso)
+            else:
+                update, transition = _compute_normal_update(item, now_utc, now_iso)
+            # Written only if the row still has the unit and updated_at the scan saw.
+            updates.append({**update, "expected_time_unit": item["time_unit"], "expected_updated_at": item["updated_at"]})
+            if transition:
+                moves.append((transition, _transition_row(item, update, now_iso)))
+
+    applied: set[str] = set()
     if updates:
         try:
-            supabase.table("dos").upsert(updates, on_conflict="id").execute()
+            with timed("upsert", job="flow_up"):
+                applied = repository.apply_flow_up(updates)
         except Exception:
-            logger.exception("flow_up: failed to apply updates")
+            logger.exception("flow_up: failed to apply updates to %s", partition or "dos")
             raise
+    if len(applied) < len(updates):
+        logger.info(
+            "flow_up: %d dos in %s changed or were deleted since the scan; left for the next run",
+            len(updates) - len(applied), partition or "dos",
+        )
+    transitions: list[dict] = []
+    for transition, row in moves:
+        if str(row["do_id"]) in applied:
+            summary[transition] = summary.get(transition, 0) + 1
+            transitions.append(row)
+    if transitions:
+        try:
+            with timed("transitions", job="flow_up"):
+                repository.append_transitions(transitions)
+        except Exception:
+            # The dos have already moved; only their history is missing these rows.
+            logger.exception("flow_up: failed to log transitions for %s", partition or "dos")
+            raise
+    return summary
+
+
+def run_flow_up() -> dict:
+    """
+    Implements flow-up in Python; the database only applies the computed rows.
+
+    Fetches all dos (completed and uncompleted), computes each item's new state,
+    and applies all changes in a single batch update that skips rows changed or
+    deleted since the scan; items that moved to a new unit are then appended to the
+    do_transitions log in one more batch. When `dos` is hash-partitioned, each
+    partition is fetched and updated on its own, up to FLOW_UP_CONCURRENCY at once;
+    a partition that fails doesn't stop the others, and the first failure is
+    re-raised once they have finished.
 
+    Returns a summary dict of how many items moved per transition,
+    e.g. {"today_to_week": 3, "week_to_month": 1}.
+    """
+    now_utc = datetime.now(timezone.utc)
+    now_iso = now_utc.isoformat()
+
+    partitions: list[str | None] = list(repository.flow_up_partitions()) or [None]
+    summary: dict[str, int] = {}
+    try:
+        if len(partitions) == 1:
+            results = [_flow_up_partition(partitions[0], now_utc, now_iso)]
+        else:
+            workers = max(1, min(settings.FLOW_UP_CONCURRENCY, len(partitions)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow-up") as pool:
+                futures = [pool.submit(_flow_up_partition, p, now_utc, now_iso) for p in partitions]
+            errors = [f.exception() for f in futures if f.exception() is not None]
+            if errors:
+                raise errors[0]
+            results = [f.result() for f in futures]
+    finally:
+        note_bulk_write()
+
+    for partial in results:
+        for transition, count in partial.items():
+            summary[transition] = summary.get(transition, 0) + count
     logger.info("flow_up complete: %s", summary)
     return summary
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+"""
+Free-time computation over calendar events.
+
+Busy time is found with a sweep over events sorted by start: overlapping and
+touching intervals (across all of a user's calendars, all-day events included) are
+merged into disjoint busy blocks, and free slots are the gaps between those blocks
+inside the requested window. Events marked `transparent` ("show as available") do
+not block time.
+
+Merged busy blocks are cached per (user, day); the cache is invalidated whenever a
+sync changes that user's stored events.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable
+
+from app.core.metrics import count_cache
+
+Interval = tuple[datetime, datetime]
+
+BUSY_CACHE_MAX_ENTRIES = 2048
+
+_busy_cache: OrderedDict[tuple[str, date], list[Interval]] = OrderedDict()
+_busy_cache_lock = threading.Lock()
+# Per user with loads running: how many, and a generation bumped on invalidation so a
+# load that raced a sync doesn't cache pre-sync events. Entries go when the last load
+# finishes, so these stay as small as the number of concurrent loads.
+_loads_in_flight: dict[str, int] = {}
+_generations: dict[str, int] = {}
+
+
+def _as_datetime(value: datetime | str) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def merge_busy_intervals(events: Iterable[dict]) -> list[Interval]:
+    """Merge the opaque events into sorted, disjoint busy intervals."""
+    intervals = sorted(
+        (_as_datetime(e["start_at"]), _as_datetime(e["end_at"]))
+        for e in events
+        if e.get("transparency", "opaque") != "transparent"
+    )
+    merged: list[Interval] = []
+    for start, end in intervals:
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_intervals(
+    busy: list[Interval],
+    window_start: datetime,
+    window_end: datetime,
+    min_length: timedelta,
+) -> list[Interval]:
+    """Return the gaps of at least `min_length` between merged `busy` intervals inside the window."""
+    slots: list[Interval] = []
+    cursor = window_start
+    for start, end in busy:
+        if end <= window_start:
+            continue
+        if start >= window_end:
+            break
+        if start - cursor >= min_length:
+            slots.append((cursor, start))
+        cursor = max(cursor, end)
+    if window_end - cursor >= min_length:
+        slots.append((cursor, window_end))
+    return slots
+
+
+def cached_busy_intervals(user_id: str, day: date, load_events: Callable[[], list[dict]]) -> list[Interval]:
+    """Return the merged busy intervals for a user's day, loading and merging events on a cache miss."""
+    key = (user_id, day)
+    with _busy_cache_lock:
+        busy = _busy_cache.get(key)
+        if busy is not None:
+            _busy_cache.move_to_end(key)
+        else:
+            _loads_in_flight[user_id] = _loads_in_flight.get(user_id, 0) + 1
+            generation = _generations.get(user_id, 0)
+    count_cache("free_slots_busy", hit=busy is not None)
+    if busy is not None:
+        return busy
+
+    busy = None
+    try:
+        busy = merge_busy_intervals(load_events())
+    finally:
+        with _busy_cache_lock:
+            if busy is not None and _generations.get(user_id, 0) == generation:
+                _busy_cache[key] = busy
+                _busy_cache.move_to_end(key)
+                while len(_busy_cache) > BUSY_CACHE_MAX_ENTRIES:
+                    _busy_cache.popitem(last=False)
+            _loads_in_flight[user_id] -= 1
+            if not _loads_in_flight[user_id]:
+                del _loads_in_flight[user_id]
+                _generations.pop(user_id, None)
+    return busy
+
+
+def invalidate_user(user_id: str) -> None:
+    """Forget every cached day for a user (called after a sync changes their events)."""
+    with _busy_cache_lock:
+        if user_id in _loads_in_flight:
+            _generations[user_id] = _generations.get(user_id, 0) + 1
+        for key in [k for k in _busy_cache if k[0] == user_id]:
+            del _busy_cache[key]
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+"""
+Google Calendar API calls used by the event sync engine.
+
+Only the two endpoints sync needs are wrapped: the user's calendar list and an
+events page. Both go through the shared pooled client in `app.core.http`.
+`settings.GOOGLE_API_BASE_URL` can point these calls at a local fake server.
+"""
+
+from http import HTTPStatus
+from typing import TypedDict
+from urllib.parse import quote
+
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.services.google_oauth import GOOGLE_TIMEOUT
+
+
+class GoogleSyncTokenExpired(Exception):
+    """Google answered 410 Gone: the stored syncToken is no longer valid and a full sync is needed."""
+
+
+class GoogleEventsPage(TypedDict, total=False):
+    items: list[dict]
+    nextPageToken: str
+    nextSyncToken: str
+
+
+def _calendar_url(path: str) -> str:
+    return f"{settings.GOOGLE_API_BASE_URL.rstrip('/')}/calendar/v3{path}"
+
+
+async def list_calendars(*, access_token: str) -> list[dict]:
+    """Return the entries of the user's calendar list (all pages)."""
+    calendars: list[dict] = []
+    page_token: str | None = None
+    while True:
+        params = {"pageToken": page_token} if page_token else {}
+        response = await get_http_client().get(
+            _calendar_url("/users/me/calendarList"),
+            params=params,
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=GOOGLE_TIMEOUT,
+        )
+        response.raise_for_status()
+        body = response.json()
+        calendars.extend(body.get("items", []))
+        page_token = body.get("nextPageToken")
+        if not page_token:
+            return calendars
+
+
+async def list_events_page(
+    *,
+    access_token: str,
+    calendar_id: str,
+    sync_token: str | None = None,
+    page_token: str | None = None,
+) -> GoogleEventsPage:
+    """
+    Fetch one page of events for a calendar.
+
+    With `sync_token`, only events changed since that token are returned (including
+    cancelled ones); without it, a full listing is returned. The last page of either
+    carries `nextSyncToken`. Raises `GoogleSyncTokenExpired` on 410 Gone.
+    """
+    # singleEvents expands recurring events into instances; Google requires the same
+    # value on every request that shares a sync token.
+    params: dict[str, str] = {"singleEvents": "true", "maxResults": "2500"}
+    if sync_token:
+        params["syncToken"] = sync_token
+    if page_token:
+        params["pageToken"] = page_token
+
+    response = await get_http_client().get(
+        _calendar_url(f"/calendars/{quote(calendar_id, safe='')}/events"),
+        params=params,
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=GOOGLE_TIMEOUT,
+    )
+    if response.status_code == HTTPStatus.GONE:
+        raise GoogleSyncTokenExpired(calendar_id)
+    response.raise_for_status()
+    return response.json()
@@ -13,7 +13,9 @@ How the pieces fit together:
 7. `refresh_google_access_token()` is used later once persisted connections start expiring.
 
 This module intentionally focuses on OAuth mechanics and Google HTTP calls.
-Persistence of connected accounts/tokens is handled elsewhere.
+Persistence of connected accounts/tokens is handled elsewhere. HTTP calls go through
+the shared pooled client in `app.core.http`, so back-to-back calls (the callback's
+code exchange + userinfo fetch) reuse one kept-alive connection to Google.
 """
 
 import base64
@@ -25,15 +27,17 @@ import time
 from typing import TypedDict
 from urllib.parse import urlencode
 
-import httpx
-
 from app.core.config import settings
+from app.core.http import get_http_client
 
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
 GOOGLE_CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar.readonly"
 
+# Per-call timeout for Google endpoints, in seconds.
+GOOGLE_TIMEOUT = 10.0
+
 
 class GoogleOAuthStatePayload(TypedDict):
     user_id: str
@@ -133,43 +137,43 @@ def build_google_auth_url(*, state: str) -> str:
 
 async def exchange_google_code(*, code: str) -> GoogleTokenPayload:
     """Exchange the Google OAuth callback code for access/refresh tokens."""
-    async with httpx.AsyncClient(timeout=20) as client:
-        response = await client.post(
-            GOOGLE_TOKEN_URL,
-            data={
-                "code": code,
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-                "grant_type": "authorization_code",
-            },
-        )
-        response.raise_for_status()
-        return response.json()
+    response = await get_http_client().post(
+        GOOGLE_TOKEN_URL,
+        data={
+            "code": code,
+            "client_id": settings.GOOGLE_CLIENT_ID,
+            "client_secret": settings.GOOGLE_CLIENT_SECRET,
+            "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+            "grant_type": "authorization_code",
+        },
+        timeout=GOOGLE_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def refresh_google_access_token(*, refresh_token: str) -> GoogleTokenPayload:
     """Refresh an expired Google access token using the saved refresh token."""
-    async with httpx.AsyncClient(timeout=20) as client:
-        response = await client.post(
-            GOOGLE_TOKEN_URL,
-            data={
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "refresh_token": refresh_token,
-                "grant_type": "refresh_token",
-            },
-        )
-        response.raise_for_status()
-        return response.json()
+    response = await get_http_client().post(
+        GOOGLE_TOKEN_URL,
+        data={
+            "client_id": settings.GOOGLE_CLIENT_ID,
+            "client_secret": settings.GOOGLE_CLIENT_SECRET,
+            "refresh_token": refresh_token,
+            "grant_type": "refresh_token",
+        },
+        timeout=GOOGLE_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def fetch_google_userinfo(*, access_token: str) -> GoogleUserInfo:
     """Fetch basic profile information for the newly connected Google account."""
-    async with httpx.AsyncClient(timeout=20) as client:
-        response = await client.get(
-            GOOGLE_USERINFO_URL,
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        response.raise_for_status()
-        return response.json()
+    response = await get_http_client().get(
+        GOOGLE_USERINFO_URL,
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=GOOGLE_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+"""
+In-process cache of Google access tokens, keyed by connected Google account.
+
+Access tokens are reused until shortly before Google's `expires_in`, so request
+paths almost never wait on the token endpoint:
+
+- a cached token is returned as-is while it has more than `refresh_ahead_seconds` left;
+- inside that window it is still returned, and a refresh starts in the background;
+- within `expiry_skew_seconds` of expiry (or when nothing is cached) the caller waits
+  for a refresh.
+
+Refreshes are single-flight per account: however many callers ask at once, Google's
+token endpoint sees one request and every caller gets its result.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.core.metrics import count_cache
+from app.services.google_oauth import GoogleTokenPayload, refresh_google_access_token
+
+logger = logging.getLogger(__name__)
+
+# Treat a token as expired this long before Google says it is.
+EXPIRY_SKEW_SECONDS = 60
+# Start a background refresh once a token has less than this long left.
+REFRESH_AHEAD_SECONDS = 300
+
+RefreshFn = Callable[..., Awaitable[GoogleTokenPayload]]
+
+
+@dataclass
+class CachedToken:
+    access_token: str
+    expires_at: float
+
+
+class GoogleTokenManager:
+    def __init__(
+        self,
+        *,
+        refresh: RefreshFn = refresh_google_access_token,
+        clock: Callable[[], float] = time.monotonic,
+        expiry_skew_seconds: float = EXPIRY_SKEW_SECONDS,
+        refresh_ahead_seconds: float = REFRESH_AHEAD_SECONDS,
+    ) -> None:
+        self._refresh = refresh
+        self._clock = clock
+        self._expiry_skew = expiry_skew_seconds
+        self._refresh_ahead = refresh_ahead_seconds
+        self._tokens: dict[str, CachedToken] = {}
+        self._inflight: dict[str, asyncio.Task[CachedToken]] = {}
+
+    def prime(self, account_id: str, payload: GoogleTokenPayload) -> None:
+        """Seed the cache from a token payload obtained elsewhere (e.g. the OAuth callback)."""
+        if payload.get("access_token"):
+            self._tokens[account_id] = self._to_cached(payload)
+
+    def invalidate(self, account_id: str) -> None:
+        """Drop the cached token for an account, e.g. after Google rejects it with a 401."""
+        self._tokens.pop(account_id, None)
+
+    async def get_access_token(self, account_id: str, *, refresh_token: str) -> str:
+        """Return a valid access token for the account, refreshing only when it must."""
+        cached = self._tokens.get(account_id)
+        now = self._clock()
+        if cached is not None and cached.expires_at - now > self._expiry_skew:
+            count_cache("google_tokens", hit=True)
+            if cached.expires_at - now <= self._refresh_ahead:
+                self._refresh_task(account_id, refresh_token)
+            return cached.access_token
+
+        count_cache("google_tokens", hit=False)
+        # Shield so a cancelled waiter doesn't cancel the refresh other waiters share.
+        token = await asyncio.shield(self._refresh_task(account_id, refresh_token))
+        return token.access_token
+
+    def _refresh_task(self, account_id: str, refresh_token: str) -> asyncio.Task[CachedToken]:
+        """Return the in-flight refresh for the account, starting one if none is running."""
+        task = self._inflight.get(account_id)
+        if task is None:
+            task = asyncio.create_task(self._run_refresh(account_id, refresh_token))
+            task.add_done_callback(self._log_background_failure)
+            self._inflight[account_id] = task
+        return task
+
+    async def _run_refresh(self, account_id: str, refresh_token: str) -> CachedToken:
+        try:
+            payload = await self._refresh(refresh_token=refresh_token)
+            if not payload.get("access_token"):
+                raise ValueError("Google token refresh returned no access token")
+            token = self._to_cached(payload)
+            self._tokens[account_id] = token
+            return token
+        finally:
+            self._inflight.pop(account_id, None)
+
+    def _to_cached(self, payload: GoogleTokenPayload) -> CachedToken:
+        return CachedToken(
+            access_token=payload["access_token"],
+            expires_at=self._clock() + int(payload.get("expires_in", 3600)),
+        )
+
+    @staticmethod
+    def _log_background_failure(task: asyncio.Task[CachedToken]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("google_tokens: token refresh failed", exc_info=task.exception())
+
+
+google_tokens = GoogleTokenManager()
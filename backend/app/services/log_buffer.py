@@ -0,0 +1,229 @@
+"""
+Write-behind ingestion for maintenance log taps.
+
+With `settings.LOG_BUFFER_ENABLED`, `POST /dos/{id}/log` doesn't insert into
+`maintenance_logs` itself. The tap is appended to a local journal file and fsynced,
+which is the acknowledgement, and held in memory until a background flusher writes
+pending taps in multi-row batches — every `LOG_FLUSH_INTERVAL_SECONDS`, or sooner
+once `LOG_FLUSH_BATCH_SIZE` are waiting. Counts read in this process include pending
+taps, so the tapper sees the new count straight away.
+
+Every tap gets its id when enqueued and batches are upserted with duplicates
+ignored, so replaying a journal never double-counts. Each process owns one journal
+in `LOG_BUFFER_DIR`, held under an exclusive `flock`; a journal whose lock can be
+taken belongs to a process that died, and is adopted and replayed on start-up.
+On shutdown the buffer is flushed and the journal removed; if that flush fails, the
+journal is left behind for the next start.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Iterable
+
+from app.core.config import settings
+from app.core.metrics import timed
+from app.repositories import repository
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".jsonl"
+
+
+class MaintenanceLogBuffer:
+    def __init__(self, directory: str | Path, *, batch_size: int) -> None:
+        self._dir = Path(directory)
+        self._batch_size = max(1, batch_size)
+        # Guards _pending and the journal; never held across a database call.
+        self._lock = threading.Lock()
+        # One flush at a time, so a batch is never written twice concurrently.
+        self._flush_lock = threading.Lock()
+        self._pending: list[dict] = []
+        self._journal: IO[str] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+
+    # -- journal ---------------------------------------------------------------
+
+    def open(self) -> None:
+        """Create this process's journal and adopt any journals left by dead processes."""
+        with self._lock:
+            if self._journal is not None:
+                return
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._journal = self._new_journal()
+            adopted = 0
+            for path in sorted(self._dir.glob(f"*{JOURNAL_SUFFIX}")):
+                if path.name == Path(self._journal.name).name:
+                    continue
+                entries = self._adopt(path)
+                self._write_entries(entries)
+                self._pending.extend(entries)
+                adopted += len(entries)
+        if adopted:
+            logger.info("log_buffer: replaying %s maintenance log taps from earlier journals", adopted)
+
+    def _new_journal(self) -> IO[str]:
+        journal = open(self._dir / f"{uuid.uuid4()}{JOURNAL_SUFFIX}", "a", encoding="utf-8")
+        fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return journal
+
+    def _adopt(self, path: Path) -> list[dict]:
+        """Read an orphaned journal and delete it; returns [] if another process still owns it."""
+        try:
+            handle = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return []
+        with handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return []
+            entries = []
+            for line in handle:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; it was never acknowledged.
+                    logger.warning("log_buffer: skipping unreadable line in %s", path.name)
+            path.unlink()
+        return entries
+
+    def _write_entries(self, entries: Iterable[dict]) -> None:
+        assert self._journal is not None
+        self._journal.writelines(json.dumps(entry) + "\n" for entry in entries)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _compact(self) -> None:
+        """Replace the journal with one holding only what is still pending."""
+        assert self._journal is not None
+        old = self._journal
+        self._journal = self._new_journal()
+        self._write_entries(self._pending)
+        # Only now is the old journal redundant; a crash before this line replays
+        # both, and the duplicates are ignored on insert.
+        os.unlink(old.name)
+        old.close()
+
+    # -- taps ------------------------------------------------------------------
+
+    def enqueue(self, do_id: str, user_id: str, logged_at: datetime | None = None) -> dict:
+        """Durably record one tap; returns the log row that will be inserted."""
+        entry = {
+            "id": str(uuid.uuid4()),
+            "do_id": str(do_id),
+            "user_id": str(user_id),
+            "logged_at": (logged_at or datetime.now(timezone.utc)).isoformat(),
+        }
+        if self._journal is None:
+            self.open()
+        with self._lock:
+            self._write_entries([entry])
+            self._pending.append(entry)
+            full = len(self._pending) >= self._batch_size
+        if full and self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return entry
+
+    def pending_counts(self, do_ids: Iterable[str], start: datetime, end: datetime) -> dict[str, int]:
+        """Count not-yet-flushed taps per do with `start <= logged_at < end`."""
+        wanted = {str(d) for d in do_ids}
+        counts: dict[str, int] = {}
+        with self._lock:
+            for entry in self._pending:
+                if entry["do_id"] in wanted and start <= datetime.fromisoformat(entry["logged_at"]) < end:
+                    counts[entry["do_id"]] = counts.get(entry["do_id"], 0) + 1
+        return counts
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    # -- flushing --------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Write every pending tap to maintenance_logs; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+            if not batch:
+                return 0
+            with timed("maintenance_log_flush"):
+                written = 0
+                for i in range(0, len(batch), self._batch_size):
+                    chunk = batch[i:i + self._batch_size]
+                    written += self._insert(chunk)
+                    self._forget(chunk)
+            return written
+
+    def _insert(self, chunk: list[dict]) -> int:
+        try:
+            return self._upsert(chunk)
+        except Exception:
+            # Most likely a do deleted while its taps were pending: its logs would
+            # have cascaded away anyway, so drop them and retry the rest once.
+            live = self._with_existing_dos(chunk)
+            if len(live) == len(chunk):
+                raise
+            logger.info("log_buffer: dropping %s taps for deleted dos", len(chunk) - len(live))
+            return self._upsert(live) if live else 0
+
+    @staticmethod
+    def _upsert(rows: list[dict]) -> int:
+        repository.add_maintenance_logs(rows)
+        return len(rows)
+
+    @staticmethod
+    def _with_existing_dos(chunk: list[dict]) -> list[dict]:
+        existing = repository.existing_do_ids(entry["do_id"] for entry in chunk)
+        return [entry for entry in chunk if entry["do_id"] in existing]
+
+    def _forget(self, chunk: list[dict]) -> None:
+        flushed = {entry["id"] for entry in chunk}
+        with self._lock:
+            self._pending = [entry for entry in self._pending if entry["id"] not in flushed]
+            self._compact()
+
+    async def run_flusher(self, interval_seconds: float) -> None:
+        """Flush on an interval, or early once a batch is full, until cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval_seconds)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("log_buffer: flush failed; %s taps stay queued", self.pending())
+
+    def close(self) -> None:
+        """Flush what's pending and remove the journal; on failure the journal is kept for replay."""
+        if self._journal is None:
+            return
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("log_buffer: final flush failed; %s taps kept for replay", self.pending())
+            with self._lock:
+                self._journal.close()
+                self._journal = None
+            return
+        with self._lock:
+            os.unlink(self._journal.name)
+            self._journal.close()
+            self._journal = None
+
+
+log_buffer = MaintenanceLogBuffer(settings.LOG_BUFFER_DIR, batch_size=settings.LOG_FLUSH_BATCH_SIZE)
@@ -1,51 +1,36 @@
 from collections import defaultdict
 from datetime import datetime
 
-from app.core.supabase import supabase
+from app.repositories import repository
+from app.services.log_buffer import log_buffer
 from app.services.period import get_period_window
 
 
 def inject_counts(dos_data: list[dict], now: datetime) -> None:
-    """Set completion_count on each maintenance do in-place, based on maintenance_logs."""
+    """Set completion_count on each maintenance do in-place, based on maintenance_logs and pending taps."""
     maintenance = [d for d in dos_data if d.get("do_type") == "maintenance"]
     if not maintenance:
         return
 
-    by_unit: dict[str, list[str]] = defaultdict(list)
+    # Keyed by owner too, so each count reads one user's logs (one partition).
+    by_unit: dict[tuple[str, str], list[str]] = defaultdict(list)
     for d in maintenance:
-        by_unit[d["time_unit"]].append(d["id"])
+        by_unit[(str(d["user_id"]), d["time_unit"])].append(d["id"])
 
     counts: dict[str, int] = {}
-    for unit, ids in by_unit.items():
+    for (user_id, unit), ids in by_unit.items():
         start, end = get_period_window(unit, now)
-        rows = (
-            supabase.table("maintenance_logs")
-            .select("do_id")
-            .in_("do_id", ids)
-            .gte("logged_at", start.isoformat())
-            .lt("logged_at", end.isoformat())
-            .execute()
-            .data
-            or []
-        )
-        for row in rows:
-            counts[row["do_id"]] = counts.get(row["do_id"], 0) + 1
+        for do_id, logged in repository.count_maintenance_logs(user_id, ids, start, end).items():
+            counts[do_id] = counts.get(do_id, 0) + logged
+        for do_id, pending in log_buffer.pending_counts(ids, start, end).items():
+            counts[do_id] = counts.get(do_id, 0) + pending
 
     for d in maintenance:
         d["completion_count"] = counts.get(str(d["id"]), 0)
 
 
-def get_count(do_id: str, time_unit: str, now: datetime) -> int:
-    """Count maintenance_logs for a single do within its current time window."""
+def get_count(user_id: str, do_id: str, time_unit: str, now: datetime) -> int:
+    """Count maintenance_logs (and pending taps) for a single do within its current time window."""
     start, end = get_period_window(time_unit, now)
-    rows = (
-        supabase.table("maintenance_logs")
-        .select("id")
-        .eq("do_id", do_id)
-        .gte("logged_at", start.isoformat())
-        .lt("logged_at", end.isoformat())
-        .execute()
-        .data
-        or []
-    )
-    return len(rows)
+    logged = repository.count_maintenance_logs(user_id, [str(do_id)], start, end).get(str(do_id), 0)
+    return logged + log_buffer.pending_counts([do_id], start, end).get(str(do_id), 0)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+"""
+Keyset (cursor) pagination helpers for list endpoints.
+
+Rows are ordered by `(created_at, id)`. A cursor is the opaque, URL-safe encoding of
+the last row's sort key, so fetching the next page is a single indexed range scan no
+matter how deep into the result set the client is.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(row: dict) -> str:
+    """Encode the `(created_at, id)` sort key of a row as an opaque cursor string."""
+    payload = json.dumps({"c": str(row["created_at"]), "i": str(row["id"])}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """Decode a cursor produced by `encode_cursor()` into `(created_at, id)`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded).decode("utf-8"))
+        # Round-trip both values so nothing but a timestamp and a UUID reaches the filter string.
+        created_at = datetime.fromisoformat(str(payload["c"])).isoformat()
+        do_id = str(uuid.UUID(str(payload["i"])))
+        return created_at, do_id
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def apply_keyset(query, cursor: str | None, limit: int):
+    """
+    Restrict a PostgREST query to the page after `cursor`, ordered by `(created_at, id)`.
+
+    One extra row is requested so callers can tell whether another page exists;
+    pass the result to `split_page()`.
+    """
+    if cursor:
+        created_at, do_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{do_id})'
+        )
+    return query.order("created_at", desc=False).order("id", desc=False).limit(limit + 1)
+
+
+def split_page(rows: list[dict], limit: int) -> tuple[list[dict], str | None]:
+    """Trim the look-ahead row fetched by `apply_keyset()` and return `(page, next_cursor)`."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1])
@@ -0,0 +1,21 @@
+from app.repositories import repository
+
+
+def search_dos(user_id: str, query: str, *, limit: int, offset: int) -> list[dict]:
+    """Return one ranked page of a user's dos whose title contains `query`."""
+    return repository.search_dos(user_id, query, limit=limit, offset=offset)
+
+
+def expand_lineage(user_id: str, matches: list[dict]) -> list[dict]:
+    """
+    Return the dos sharing a parent/child tree with any of `matches`, excluding the matches.
+
+    The connected-component walk runs in the database (`lineage_components` on the
+    repository), so only the related rows are shipped, not the user's whole board.
+    """
+    if not matches:
+        return []
+    match_ids = [str(d["id"]) for d in matches]
+    component = repository.lineage_components(user_id, match_ids)
+    seen = set(match_ids)
+    return [d for d in component if str(d["id"]) not in seen]
@@ -0,0 +1,297 @@
+"""
+Bulk export and import of a user's dos and maintenance logs as NDJSON.
+
+`GET /dos/export` streams one JSON object per line: an `export` header, every do
+(`"type": "do"`, in `(created_at, id)` order) and then every maintenance log
+(`"type": "log"`). Both are read a keyset page at a time, so memory stays flat
+however large the account is.
+
+`POST /dos/import` reads such a stream line by line and writes it in batches of
+`IMPORT_BATCH_SIZE` rows, one multi-row insert each:
+
+- every do gets a new id, so an export can be imported into any account (or the
+  same one again). `parent_id` is remapped to the parent's new id; a do whose parent
+  hasn't been read yet waits for it, and one whose parent never turns up is imported
+  as a root. Logs are attached to their do's new id, so each must come after its do;
+  logs of unknown dos are skipped.
+- lineage colors are settled once per tree. A tree whose root has a color gets it
+  on insert; for the rest, the first color in the tree (or a new one) is applied
+  with one `set_tree_color` call at the end, as linking the dos one at a time would.
+- a `progress` line is written back after every batch and a `done` line at the end.
+  A malformed line ends the import with an `error` line naming it; batches written
+  before it are kept.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator
+
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.repositories import repository
+from app.schemas.dos import DoImport, MaintenanceLogImport
+from app.services.colors import generate_lineage_color
+from app.services.dos_snapshot import note_write
+from app.services.pagination import split_page
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_VERSION = 1
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+# Longest line an import accepts, so one bad line can't buffer the whole body.
+MAX_LINE_BYTES = 1 << 20
+
+EXPORT_COLUMNS = (
+    "id,title,time_unit,do_type,completed,completed_at,days_in_unit,flow_count,completion_count,"
+    "parent_id,priority_date,color_hex,tags,created_at,updated_at"
+)
+
+
+def _line(record: dict) -> bytes:
+    return json.dumps(record, default=str, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def export_dos(user_id: str) -> Iterator[bytes]:
+    """Yield the user's dos and logs as NDJSON, one chunk per page read."""
+    yield _line({"type": "export", "version": EXPORT_VERSION, "exported_at": datetime.now(timezone.utc)})
+
+    cursor: str | None = None
+    while True:
+        rows = repository.list_dos_page(user_id, columns=EXPORT_COLUMNS, cursor=cursor, limit=EXPORT_BATCH_SIZE)
+        page, cursor = split_page(rows, EXPORT_BATCH_SIZE)
+        if page:
+            yield b"".join(_line({"type": "do", **row}) for row in page)
+        if cursor is None:
+            break
+
+    after: str | None = None
+    while True:
+        logs = repository.list_maintenance_logs_page(user_id, after=after, limit=EXPORT_BATCH_SIZE)
+        if logs:
+            yield b"".join(_line({"type": "log", **log}) for log in logs)
+        if len(logs) < EXPORT_BATCH_SIZE:
+            break
+        after = str(logs[-1]["id"])
+
+
+class DosImporter:
+    """Accumulates one user's import and writes it in batches; see the module docstring."""
+
+    def __init__(self, user_id: str, *, batch_size: int = IMPORT_BATCH_SIZE) -> None:
+        self.user_id = user_id
+        self._batch_size = max(1, batch_size)
+        # Exported id -> new id, and new id -> new id of its tree's root.
+        self._new_ids: dict[str, str] = {}
+        self._roots: dict[str, str] = {}
+        # Root -> the root's own color, and root -> first color found below a colorless root.
+        self._root_colors: dict[str, str | None] = {}
+        self._found_colors: dict[str, str | None] = {}
+        # Dos waiting for a parent not read yet, by the parent's exported id.
+        self._waiting_dos: dict[str, list[DoImport]] = {}
+        # Logs of dos still waiting for their parent.
+        self._waiting_logs: list[MaintenanceLogImport] = []
+        self._dos: list[dict] = []
+        self._logs: list[dict] = []
+        self.stats = {"dos": 0, "logs": 0, "skipped_logs": 0, "recolored": 0}
+
+    def add(self, record: dict) -> None:
+        """Take one parsed line; raises ValueError if it isn't a valid record."""
+        kind = record.get("type")
+        try:
+            if kind == "do":
+                self._add_do(DoImport.model_validate(record))
+            elif kind == "log":
+                self._add_log(MaintenanceLogImport.model_validate(record))
+            elif kind != "export":
+                raise ValueError(f"Unknown record type: {kind!r}")
+        except ValidationError as exc:
+            raise ValueError(str(exc)) from exc
+
+    def ready(self) -> bool:
+        """True once a full batch is waiting to be written."""
+        return len(self._dos) >= self._batch_size or len(self._logs) >= self._batch_size
+
+    def take(self) -> tuple[list[dict], list[dict]]:
+        """Hand over the waiting dos and logs, to be passed to `write()`."""
+        batch = (self._dos, self._logs)
+        self._dos, self._logs = [], []
+        return batch
+
+    def write(self, dos: list[dict], logs: list[dict]) -> None:
+        """Write a batch from `take()`: the dos, then the logs."""
+        if dos:
+            repository.insert_dos(dos)
+            self.stats["dos"] += len(dos)
+        if logs:
+            repository.add_maintenance_logs(logs)
+            self.stats["logs"] += len(logs)
+
+    def flush(self) -> None:
+        self.write(*self.take())
+
+    def finish(self) -> dict:
+        """Import dos whose parent never arrived as roots, write everything left and settle colors."""
+        while self._waiting_dos:
+            _, children = self._waiting_dos.popitem()
+            for child in children:
+                if str(child.id) not in self._new_ids:
+                    self._place(child, None)
+        for log in self._waiting_logs:
+            self._add_log(log)
+        self._waiting_logs = []
+        self.flush()
+
+        for root, color in self._found_colors.items():
+            repository.set_tree_color(self.user_id, root, color or generate_lineage_color())
+            self.stats["recolored"] += 1
+        self._found_colors = {}
+        return dict(self.stats)
+
+    # -- records ---------------------------------------------------------------
+
+    def _add_do(self, item: DoImport) -> None:
+        old_id = str(item.id)
+        if old_id in self._new_ids:
+            raise ValueError(f"Duplicate do id: {old_id}")
+        parent = str(item.parent_id) if item.parent_id is not None else None
+        if parent is not None and parent not in self._new_ids:
+            self._waiting_dos.setdefault(parent, []).append(item)
+            return
+        self._place(item, parent)
+
+    def _place(self, item: DoImport, parent: str | None) -> None:
+        """Queue a do under its (already placed) parent, then any dos that were waiting for it."""
+        stack = [(item, parent)]
+        while stack:
+            item, parent = stack.pop()
+            old_id, new_id = str(item.id), str(uuid.uuid4())
+            self._new_ids[old_id] = new_id
+            parent_new = self._new_ids[parent] if parent is not None else None
+            if parent_new is None:
+                root = new_id
+                self._root_colors[root] = item.color_hex
+                color = item.color_hex
+            else:
+                root = self._roots[parent_new]
+                color = self._root_colors[root]
+                if color is None:
+                    # Settled at the end, once the whole tree has been read.
+                    if self._found_colors.get(root) is None:
+                        self._found_colors[root] = item.color_hex
+                    color = item.color_hex
+            self._roots[new_id] = root
+
+            now = datetime.now(timezone.utc).isoformat()
+            self._dos.append({
+                "id": new_id,
+                "user_id": self.user_id,
+                "parent_id": parent_new,
+                "title": item.title,
+                "time_unit": item.time_unit.value,
+                "do_type": item.do_type.value,
+                "completed": item.completed,
+                "completed_at": item.completed_at.isoformat() if item.completed_at else None,
+                "days_in_unit": item.days_in_unit,
+                "flow_count": item.flow_count,
+                "completion_count": item.completion_count,
+                "priority_date": item.priority_date.isoformat() if item.priority_date else None,
+                "color_hex": color,
+                "tags": item.tags,
+                "created_at": item.created_at.isoformat() if item.created_at else now,
+                "updated_at": item.updated_at.isoformat() if item.updated_at else now,
+            })
+            for child in reversed(self._waiting_dos.pop(old_id, [])):
+                stack.append((child, old_id))
+
+    def _add_log(self, log: MaintenanceLogImport) -> None:
+        do_id = self._new_ids.get(str(log.do_id))
+        if do_id is None:
+            if self._waiting_dos:
+                self._waiting_logs.append(log)
+            else:
+                self.stats["skipped_logs"] += 1
+            return
+        self._logs.append({
+            "id": str(uuid.uuid4()),
+            "do_id": do_id,
+            "user_id": self.user_id,
+            "logged_at": log.logged_at.isoformat(),
+        })
+
+
+class ImportProgressResponse(StreamingResponse):
+    """
+    Streams progress while the request body is still being read.
+
+    `StreamingResponse` normally listens for a client disconnect on `receive` while
+    it streams, which on older ASGI servers would swallow the body chunks the import
+    is reading; here only the body reader calls `receive`, and a disconnect surfaces
+    from it instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def import_dos(user_id: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Import an NDJSON stream for the user, yielding NDJSON progress lines as batches are written.
+
+    Each batch is written on a worker thread while the next one is parsed; a batch
+    starts only after the one before it is stored, so parents are always in place.
+    """
+    importer = DosImporter(user_id, batch_size=IMPORT_BATCH_SIZE)
+    line_number = 0
+    writing: asyncio.Future | None = None
+    try:
+        try:
+            async for line in _lines(chunks):
+                line_number += 1
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"Invalid JSON: {exc}") from exc
+                if not isinstance(record, dict):
+                    raise ValueError("Expected a JSON object")
+                importer.add(record)
+                if importer.ready():
+                    if writing is not None:
+                        await writing
+                        yield _line({"type": "progress", "line": line_number, **importer.stats})
+                    writing = asyncio.ensure_future(asyncio.to_thread(importer.write, *importer.take()))
+        except ValueError as exc:
+            if writing is not None:
+                await writing
+            yield _line({"type": "error", "line": line_number, "detail": str(exc), **importer.stats})
+            return
+        if writing is not None:
+            await writing
+        stats = await asyncio.to_thread(importer.finish)
+        logger.info("import: user %s imported %s", user_id, stats)
+        yield _line({"type": "done", "line": line_number, **stats})
+    finally:
+        note_write(user_id)
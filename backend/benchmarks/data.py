@@ -0,0 +1,92 @@
+"""Synthetic data generators for the benchmarks. All output is deterministic for a given size."""
+
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+TIME_UNITS = ("today", "week", "month", "season", "year", "multi_year")
+USER_ID = "00000000-0000-4000-8000-000000000001"
+NOW = datetime(2026, 3, 2, 0, 0, tzinfo=timezone.utc)  # a Monday, so week → month fires too
+
+
+def _id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def make_dos(count: int, *, maintenance_ratio: float = 0.2, seed: int = 0) -> list[dict]:
+    """Full `dos` rows spread across time units, with a share of maintenance dos."""
+    rng = random.Random(seed)
+    created = NOW - timedelta(days=90)
+    rows = []
+    for i in range(count):
+        completed = rng.random() < 0.3
+        rows.append({
+            "id": _id(rng),
+            "user_id": USER_ID,
+            "title": f"Do {i}",
+            "time_unit": TIME_UNITS[i % len(TIME_UNITS)],
+            "do_type": "maintenance" if rng.random() < maintenance_ratio else "normal",
+            "completed": completed,
+            "completed_at": (created + timedelta(days=rng.randint(0, 89))).isoformat() if completed else None,
+            "days_in_unit": rng.randint(0, 30),
+            "flow_count": rng.randint(0, 5),
+            "completion_count": 0,
+            "created_at": (created + timedelta(seconds=i)).isoformat(),
+            "updated_at": created.isoformat(),
+            "parent_id": None,
+            "color_hex": None,
+            "is_today_priority": False,
+        })
+    return rows
+
+
+def make_maintenance_logs(dos: list[dict], logs_per_do: int, *, seed: int = 0) -> list[dict]:
+    """`maintenance_logs` rows for every maintenance do, scattered over the past year."""
+    rng = random.Random(seed)
+    rows = []
+    for d in dos:
+        if d["do_type"] != "maintenance":
+            continue
+        for _ in range(logs_per_do):
+            rows.append({
+                "id": _id(rng),
+                "do_id": d["id"],
+                "user_id": d["user_id"],
+                "logged_at": (NOW - timedelta(minutes=rng.randint(0, 365 * 24 * 60))).isoformat(),
+            })
+    return rows
+
+
+def make_deep_lineage(depth: int, *, seed: int = 0) -> list[dict]:
+    """A single parent → child chain `depth` dos long."""
+    rng = random.Random(seed)
+    rows: list[dict] = []
+    path: list[str] = []
+    for _ in range(depth):
+        row = {
+            "id": _id(rng),
+            "user_id": USER_ID,
+            "title": f"Do {len(rows)}",
+            "time_unit": "today",
+            "parent_id": path[-1] if path else None,
+            "ancestor_ids": list(path),
+            "color_hex": None,
+        }
+        rows.append(row)
+        path.append(row["id"])
+    return rows
+
+
+def make_wide_lineage(width: int, *, seed: int = 0) -> list[dict]:
+    """One root with `width` direct children."""
+    rng = random.Random(seed)
+    root = {"id": _id(rng), "user_id": USER_ID, "title": "Root", "time_unit": "year", "parent_id": None,
+            "ancestor_ids": [], "color_hex": None}
+    children = [
+        {"id": _id(rng), "user_id": USER_ID, "title": f"Do {i}", "time_unit": "today", "parent_id": root["id"],
+         "ancestor_ids": [root["id"]], "color_hex": None}
+        for i in range(width)
+    ]
+    return [root] + children
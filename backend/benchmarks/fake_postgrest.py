@@ -0,0 +1,219 @@
+"""
+A local HTTP stand-in for Supabase Auth and PostgREST, for load testing the API.
+
+Serves just enough of both for the real `supabase` client to work against it:
+
+- `GET /auth/v1/user` accepts any bearer token of the form `loadtest-<name>` and
+  returns a user whose id is derived from the name, so each simulated user is stable;
+- `/rest/v1/<table>` supports GET/POST/PATCH/DELETE with the PostgREST filter
+  operators the app uses (`eq`, `neq`, `gt`, `gte`, `lt`, `lte`, `in`, `is`, `cs`, `not.`),
+  `select`, `order`, `limit`, `offset`, `on_conflict` and
+  `Prefer: resolution=merge-duplicates` / `resolution=ignore-duplicates`.
+
+Rows live in a `FakeSupabase` store. Every response is delayed by `latency_ms` plus
+up to `jitter_ms`, to model the network and database time of a hosted project.
+RPCs are served from `fake_supabase.FUNCTIONS`. Unsupported features (`or`/`and`
+filters, other RPCs) answer 400/404 rather than silently returning wrong data.
+
+    python -m benchmarks.fake_postgrest --port 54321 --latency-ms 15 --jitter-ms 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from benchmarks.fake_supabase import FUNCTIONS, FakeQuery, FakeSupabase
+
+TOKEN_PREFIX = "loadtest-"
+_USER_NAMESPACE = uuid.UUID("6f1c8b2e-6d2a-4c59-9f3e-0b6a7c1d2e3f")
+
+_OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "in", "is", "cs"}
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+TABLE_DEFAULTS: dict[str, dict[str, Any]] = {
+    "dos": {
+        "do_type": "normal",
+        "completed": False,
+        "completed_at": None,
+        "days_in_unit": 0,
+        "flow_count": 0,
+        "completion_count": 0,
+        "parent_id": None,
+        "color_hex": None,
+        "priority_date": None,
+        "ancestor_ids": list,
+    },
+    "maintenance_logs": {"logged_at": _now},
+}
+
+
+def user_id_for_token(token: str) -> str | None:
+    if not token.startswith(TOKEN_PREFIX):
+        return None
+    return str(uuid.uuid5(_USER_NAMESPACE, token.removeprefix(TOKEN_PREFIX)))
+
+
+def _coerce(value: str) -> Any:
+    return {"true": True, "false": False, "null": None}.get(value, value)
+
+
+def _split_list(value: str) -> list[str]:
+    """Split a PostgREST `(a,"b,c",d)` list, honouring double quotes."""
+    items, current, quoted = [], "", False
+    for ch in value.strip("()"):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == "," and not quoted:
+            items.append(current)
+            current = ""
+        else:
+            current += ch
+    items.append(current)
+    return [i for i in items if i != ""]
+
+
+def apply_filter(query: FakeQuery, column: str, expression: str) -> FakeQuery:
+    if column in ("or", "and"):
+        raise ValueError(f"Unsupported filter: {column}")
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression.removeprefix("not.")
+        query = query.not_
+    operator, _, value = expression.partition(".")
+    if operator not in _OPERATORS:
+        raise ValueError(f"Unsupported operator: {operator}")
+    if operator == "in":
+        return query.in_(column, [_coerce(v) for v in _split_list(value)])
+    if operator == "is":
+        return query.is_(column, _coerce(value))
+    if operator == "cs":
+        return query.contains(column, _split_list(value.strip("{}")))
+    return getattr(query, operator)(column, _coerce(value))
+
+
+def build_query(fake: FakeSupabase, table: str, params: list[tuple[str, str]]) -> FakeQuery:
+    query = fake.table(table)
+    limit = offset = None
+    for key, value in params:
+        if key == "order":
+            for part in value.split(","):
+                column, *modifiers = part.split(".")
+                query = query.order(column, desc="desc" in modifiers)
+        elif key == "limit":
+            limit = int(value)
+        elif key == "offset":
+            offset = int(value)
+        elif key not in _RESERVED_PARAMS:
+            query = apply_filter(query, key, value)
+    if offset is not None:
+        query = query.range(offset, offset + (limit if limit is not None else 10**9) - 1)
+    elif limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def create_app(fake: FakeSupabase | None = None, *, latency_ms: float = 0.0, jitter_ms: float = 0.0) -> Starlette:
+    fake = fake or FakeSupabase(defaults=TABLE_DEFAULTS)
+
+    async def delay() -> None:
+        seconds = (latency_ms + random.uniform(0, jitter_ms)) / 1000
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    async def auth_user(request: Request) -> Response:
+        await delay()
+        token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        user_id = user_id_for_token(token)
+        if user_id is None:
+            return JSONResponse({"code": 401, "msg": "invalid JWT"}, status_code=401)
+        return JSONResponse({
+            "id": user_id,
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": f"{token.removeprefix(TOKEN_PREFIX)}@loadtest.local",
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": "2026-01-01T00:00:00+00:00",
+        })
+
+    async def rest_table(request: Request) -> Response:
+        await delay()
+        table = request.path_params["table"]
+        params = list(request.query_params.multi_items())
+        try:
+            query = build_query(fake, table, params)
+        except ValueError as exc:
+            return JSONResponse({"message": str(exc)}, status_code=400)
+
+        columns = request.query_params.get("select")
+        if request.method == "GET":
+            query.select(columns or "*")
+        elif request.method == "POST":
+            body = json.loads(await request.body())
+            prefer = request.headers.get("prefer", "")
+            if "resolution=merge-duplicates" in prefer or "resolution=ignore-duplicates" in prefer:
+                query.upsert(
+                    body,
+                    on_conflict=request.query_params.get("on_conflict", "id"),
+                    ignore_duplicates="resolution=ignore-duplicates" in prefer,
+                )
+            else:
+                query.insert(body)
+        elif request.method == "PATCH":
+            query.update(json.loads(await request.body()))
+        else:
+            query.delete()
+        rows = query.execute().data
+
+        status_code = 201 if request.method == "POST" else 200
+        if "return=representation" not in request.headers.get("prefer", "") and request.method != "GET":
+            return Response(status_code=204 if request.method != "POST" else 201)
+        return JSONResponse(rows, status_code=status_code)
+
+    async def rpc(request: Request) -> Response:
+        name = request.path_params["name"]
+        if name not in FUNCTIONS or request.method != "POST":
+            return JSONResponse({"message": f"RPC {name} is not supported by the load-test stand-in"}, status_code=404)
+        await delay()
+        return JSONResponse(fake.rpc(name, json.loads(await request.body() or b"{}")).execute().data)
+
+    app = Starlette(routes=[
+        Route("/auth/v1/user", auth_user, methods=["GET"]),
+        Route("/rest/v1/rpc/{name}", rpc, methods=["GET", "POST"]),
+        Route("/rest/v1/{table}", rest_table, methods=["GET", "POST", "PATCH", "DELETE"]),
+    ])
+    app.state.fake = fake
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Supabase Auth/PostgREST stand-in for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    app = create_app(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+An in-memory stand-in for the parts of the Supabase client the services use.
+
+`FakeSupabase` stores rows per table in plain lists and implements the PostgREST
+query builder surface the app relies on — `select`, `insert`, `upsert`, `update`,
+`delete`, the comparison filters, `not_`, `order`, `limit` and `range` — closely
+enough that service functions run unchanged against it. It makes no attempt at
+RLS, triggers or embedded selects; of the RPCs, only those in `FUNCTIONS` exist.
+
+Install it in place of the module-level client with `use_fake_supabase()`.
+"""
+
+from __future__ import annotations
+
+import copy
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Any, Callable, Iterator
+
+
+@dataclass
+class FakeResponse:
+    data: list[dict]
+    count: int | None = None
+
+
+def _comparable(value: Any) -> Any:
+    """Compare ISO timestamps as datetimes and everything else as strings, like PostgREST text filters."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and len(value) >= 19 and value[4] == "-" and value[10] in "T ":
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value) if not isinstance(value, (int, float)) else value
+
+
+Predicate = Callable[[dict], bool]
+
+
+class FakeQuery:
+    def __init__(self, db: FakeSupabase, table: str) -> None:
+        self._db = db
+        self._table = table
+        self._action = "select"
+        self._columns: list[str] | None = None
+        self._count: str | None = None
+        self._payload: Any = None
+        self._on_conflict = "id"
+        self._ignore_duplicates = False
+        self._filters: list[Predicate] = []
+        self._negate_next = False
+        self._order: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+        self._offset = 0
+
+    # -- actions ---------------------------------------------------------------
+
+    def select(self, columns: str = "*", *, count: str | None = None) -> FakeQuery:
+        self._action = "select"
+        self._columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        self._count = count
+        return self
+
+    def insert(self, rows: dict | list[dict]) -> FakeQuery:
+        self._action, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows: dict | list[dict], *, on_conflict: str = "id", ignore_duplicates: bool = False) -> FakeQuery:
+        self._action, self._payload, self._on_conflict = "upsert", rows, on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: dict) -> FakeQuery:
+        self._action, self._payload = "update", values
+        return self
+
+    def delete(self) -> FakeQuery:
+        self._action = "delete"
+        return self
+
+    # -- filters ---------------------------------------------------------------
+
+    @property
+    def not_(self) -> FakeQuery:
+        self._negate_next = True
+        return self
+
+    def _filter(self, predicate: Predicate) -> FakeQuery:
+        if self._negate_next:
+            self._negate_next = False
+            self._filters.append(lambda row: not predicate(row))
+        else:
+            self._filters.append(predicate)
+        return self
+
+    def _compare(self, column: str, value: Any, op: Callable[[Any, Any], bool]) -> FakeQuery:
+        target = _comparable(value)
+        return self._filter(
+            lambda row: row.get(column) is not None and op(_comparable(row.get(column)), target)
+        )
+
+    def eq(self, column: str, value: Any) -> FakeQuery:
+        return self._compare(column, value, lambda a, b: a == b)
+
+    def neq(self, column: str, value: Any) -> FakeQuery:
+        return self._compare(column, value, lambda a, b: a != b)
+
+    def gt(self, column: str, value: Any) -> FakeQuery:
+        return self._compare(column, value, lambda a, b: a > b)
+
+    def gte(self, column: str, value: Any) -> FakeQuery:
+        return self._compare(column, value, lambda a, b: a >= b)
+
+    def lt(self, column: str, value: Any) -> FakeQuery:
+        return self._compare(column, value, lambda a, b: a < b)
+
+    def lte(self, column: str, value: Any) -> FakeQuery:
+        return self._compare(column, value, lambda a, b: a <= b)
+
+    def in_(self, column: str, values: list[Any]) -> FakeQuery:
+        wanted = {_comparable(v) for v in values}
+        return self._filter(lambda row: _comparable(row.get(column)) in wanted)
+
+    def contains(self, column: str, values: list[Any]) -> FakeQuery:
+        wanted = {_comparable(v) for v in values}
+        return self._filter(lambda row: wanted <= {_comparable(v) for v in row.get(column) or []})
+
+    def is_(self, column: str, value: Any) -> FakeQuery:
+        expected = None if value in (None, "null") else value
+        return self._filter(lambda row: row.get(column) is expected)
+
+    # -- modifiers -------------------------------------------------------------
+
+    def order(self, column: str, *, desc: bool = False) -> FakeQuery:
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> FakeQuery:
+        self._limit = count
+        return self
+
+    def range(self, start: int, end: int) -> FakeQuery:
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    # -- execution -------------------------------------------------------------
+
+    def _matches(self, row: dict) -> bool:
+        return all(predicate(row) for predicate in self._filters)
+
+    def _project(self, row: dict) -> dict:
+        if self._columns is None:
+            return copy.copy(row)
+        return {c: row.get(c) for c in self._columns}
+
+    def execute(self) -> FakeResponse:
+        self._db.calls.append((self._table, self._action))
+        rows = self._db.tables.setdefault(self._table, [])
+        if self._action == "select":
+            return self._execute_select(rows)
+        if self._action in ("insert", "upsert"):
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            written = [
+                self._db.write_row(self._table, r, self._on_conflict, self._action, ignore_duplicates=self._ignore_duplicates)
+                for r in payload
+            ]
+            return FakeResponse([r for r in written if r is not None])
+        if self._action == "update":
+            updated = [row for row in rows if self._matches(row)]
+            for row in updated:
+                row.update(self._payload)
+            return FakeResponse([copy.copy(r) for r in updated])
+        deleted = [row for row in rows if self._matches(row)]
+        self._db.tables[self._table] = [row for row in rows if not self._matches(row)]
+        return FakeResponse(deleted)
+
+    def _execute_select(self, rows: list[dict]) -> FakeResponse:
+        matched = [row for row in rows if self._matches(row)]
+        for column, desc in reversed(self._order):
+            matched.sort(key=lambda r: (r.get(column) is None, _comparable(r.get(column))), reverse=desc)
+        total = len(matched)
+        end = None if self._limit is None else self._offset + self._limit
+        page = matched[self._offset:end]
+        return FakeResponse([self._project(r) for r in page], count=total if self._count else None)
+
+
+def _apply_flow_up(db: FakeSupabase, params: dict) -> list[dict]:
+    """dos_apply_flow_up: the guarded flow-up UPDATE from the add_flow_up_update migration."""
+    rows = {(str(r["user_id"]), str(r["id"])): r for r in db.tables.setdefault("dos", [])}
+    now = datetime.now(timezone.utc).isoformat()
+    applied = []
+    for update in params["p_updates"]:
+        row = rows.get((str(update["user_id"]), str(update["id"])))
+        if (
+            row is None
+            or row["time_unit"] != update["expected_time_unit"]
+            or _comparable(row.get("updated_at")) != _comparable(update["expected_updated_at"])
+        ):
+            continue
+        row.update(
+            time_unit=update["time_unit"],
+            flow_count=update["flow_count"],
+            days_in_unit=update["days_in_unit"],
+            updated_at=now,
+        )
+        applied.append({"id": row["id"]})
+    return applied
+
+
+class FakeRpc:
+    def __init__(self, db: FakeSupabase, name: str, params: dict) -> None:
+        self._db, self._name, self._params = db, name, params
+
+    def execute(self) -> FakeResponse:
+        self._db.calls.append((self._name, "rpc"))
+        if self._name not in FUNCTIONS:
+            raise NotImplementedError(f"RPC {self._name} is not supported by the in-memory stand-in")
+        return FakeResponse(FUNCTIONS[self._name](self._db, self._params))
+
+
+# In-memory versions of the database functions the services call, by name.
+FUNCTIONS: dict[str, Callable[[FakeSupabase, dict], list[dict]]] = {
+    "dos_apply_flow_up": _apply_flow_up,
+}
+
+
+class FakeSupabase:
+    def __init__(
+        self,
+        tables: dict[str, list[dict]] | None = None,
+        *,
+        defaults: dict[str, dict[str, Any]] | None = None,
+    ) -> None:
+        self.tables: dict[str, list[dict]] = tables or {}
+        # Column defaults per table (values or zero-arg callables), applied to inserts like Postgres DEFAULTs.
+        self.defaults: dict[str, dict[str, Any]] = defaults or {}
+        # (table, action) for every executed query, for counting round trips.
+        self.calls: list[tuple[str, str]] = []
+        self._indexes: dict[tuple[str, tuple[str, ...]], dict[tuple, dict]] = {}
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    def write_row(
+        self, table: str, row: dict, on_conflict: str, action: str, *, ignore_duplicates: bool = False
+    ) -> dict | None:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        keys = tuple(c.strip() for c in on_conflict.split(","))
+        index = self._index(table, keys)
+        key = tuple(str(row.get(k)) for k in keys)
+        existing = index.get(key)
+        if existing is not None and action == "upsert":
+            if ignore_duplicates:
+                return None
+            existing.update(row)
+            return copy.copy(existing)
+        defaults = {k: v() if callable(v) else v for k, v in self.defaults.get(table, {}).items()}
+        row = {**defaults, **row}
+        now = datetime.now(timezone.utc).isoformat()
+        row.setdefault("created_at", now)
+        row.setdefault("updated_at", now)
+        self.tables.setdefault(table, []).append(row)
+        index[key] = row
+        return copy.copy(row)
+
+    def _index(self, table: str, keys: tuple[str, ...]) -> dict[tuple, dict]:
+        # Cached per (table, conflict columns) so large upserts stay linear; rebuilt
+        # when a delete has changed the row count underneath it.
+        rows = self.tables.setdefault(table, [])
+        cached = self._indexes.get((table, keys))
+        if cached is None or len(cached) != len(rows):
+            cached = {tuple(str(r.get(k)) for k in keys): r for r in rows}
+            self._indexes[(table, keys)] = cached
+        return cached
+
+
+@contextmanager
+def use_fake_supabase(fake: FakeSupabase, *modules: ModuleType) -> Iterator[FakeSupabase]:
+    """Point each module's `supabase` global at `fake` for the duration of the block."""
+    originals = [(module, module.supabase) for module in modules]
+    for module, _ in originals:
+        module.supabase = fake
+    try:
+        yield fake
+    finally:
+        for module, original in originals:
+            module.supabase = original
@@ -0,0 +1,280 @@
+"""
+End-to-end load generator for the API.
+
+Starts the Supabase stand-in (`benchmarks.fake_postgrest`) and the real app
+(`app.main:app` under uvicorn, pointed at the stand-in, with metrics on), then
+drives it with N concurrent simulated users for a fixed duration. Each user seeds a
+few dos and then loops over a weighted mix of list / create / update / log /
+toggle-priority requests.
+
+Reports throughput, p50/p95/p99 latency and Supabase calls per request (read from
+the app's `Server-Timing` header, so auth lookups count too), overall and per
+operation. Run from `backend/`:
+
+    python -m benchmarks.load --users 20 --duration 30 --latency-ms 15 --jitter-ms 10
+    python -m benchmarks.load --app-url http://127.0.0.1:8000   # reuse a running app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+API = "/api/v1"
+DEFAULT_MIX = "list=50,create=10,update=20,log=10,toggle=10"
+SEED_NORMAL_DOS = 10
+SEED_MAINTENANCE_DOS = 3
+TIME_UNITS = ("today", "week", "month", "season", "year")
+
+_DB_CALLS = re.compile(r'db;dur=[\d.]+;desc="(\d+) calls"')
+
+
+@dataclass
+class Sample:
+    op: str
+    seconds: float
+    status: int
+    db_calls: int | None
+
+
+@dataclass
+class SimulatedUser:
+    name: str
+    client: httpx.AsyncClient
+    rng: random.Random
+    normal_ids: list[str] = field(default_factory=list)
+    maintenance_ids: list[str] = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer loadtest-{self.name}"}
+
+    async def request(self, op: str, method: str, path: str, **kwargs) -> tuple[Sample, httpx.Response]:
+        start = time.perf_counter()
+        response = await self.client.request(method, API + path, headers=self.headers, **kwargs)
+        elapsed = time.perf_counter() - start
+        match = _DB_CALLS.search(response.headers.get("server-timing", ""))
+        return Sample(op, elapsed, response.status_code, int(match.group(1)) if match else None), response
+
+    async def create(self, do_type: str = "normal") -> Sample:
+        sample, response = await self.request("create", "POST", "/dos", json={
+            "title": f"load {self.rng.randrange(10**6)}",
+            "time_unit": self.rng.choice(TIME_UNITS),
+            "do_type": do_type,
+        })
+        if response.status_code == 201:
+            ids = self.maintenance_ids if do_type == "maintenance" else self.normal_ids
+            ids.append(response.json()["id"])
+        return sample
+
+    async def seed(self) -> None:
+        for _ in range(SEED_NORMAL_DOS):
+            await self.create()
+        for _ in range(SEED_MAINTENANCE_DOS):
+            await self.create("maintenance")
+
+    async def run_op(self, op: str) -> Sample:
+        if op == "list":
+            return (await self.request(op, "GET", "/dos"))[0]
+        if op == "create":
+            return await self.create()
+        if op == "update":
+            body = {"title": f"edited {self.rng.randrange(10**6)}"} if self.rng.random() < 0.5 else {"completed": True}
+            return (await self.request(op, "PATCH", f"/dos/{self.rng.choice(self.normal_ids)}", json=body))[0]
+        if op == "log":
+            return (await self.request(op, "POST", f"/dos/{self.rng.choice(self.maintenance_ids)}/log"))[0]
+        if op == "toggle":
+            return (await self.request(op, "POST", f"/dos/{self.rng.choice(self.normal_ids)}/toggle-priority"))[0]
+        raise ValueError(f"Unknown operation: {op}")
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        op, _, weight = part.partition("=")
+        weights[op.strip()] = float(weight)
+    unknown = set(weights) - {"list", "create", "update", "log", "toggle"}
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    def stats(group: list[Sample]) -> dict:
+        latencies = sorted(s.seconds for s in group)
+        db_calls = [s.db_calls for s in group if s.db_calls is not None]
+        return {
+            "requests": len(group),
+            "errors": sum(1 for s in group if s.status >= 400),
+            "rps": len(group) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "db_calls_per_request": sum(db_calls) / len(db_calls) if db_calls else None,
+        }
+
+    by_op: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_op[sample.op].append(sample)
+    return {
+        "elapsed_seconds": elapsed,
+        "overall": stats(samples),
+        "operations": {op: stats(group) for op, group in sorted(by_op.items())},
+    }
+
+
+async def run_load(app_url: str, *, users: int, duration: float, mix: dict[str, float], think_ms: float, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=60.0) as client:
+        simulated = [SimulatedUser(f"user{i}", client, random.Random(seed + i)) for i in range(users)]
+        await asyncio.gather(*(u.seed() for u in simulated))
+
+        ops, weights = list(mix), list(mix.values())
+        samples: list[Sample] = []
+        deadline = time.perf_counter() + duration
+
+        async def drive(user: SimulatedUser) -> None:
+            while time.perf_counter() < deadline:
+                samples.append(await user.run_op(user.rng.choices(ops, weights)[0]))
+                if think_ms:
+                    await asyncio.sleep(think_ms / 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(drive(u) for u in simulated))
+        return summarize(samples, time.perf_counter() - start)
+
+
+# ---------------------------------------------------------------------------
+# Process management
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_stack(*, latency_ms: float, jitter_ms: float, workers: int) -> tuple[str, list[subprocess.Popen]]:
+    supabase_port, app_port = _free_port(), _free_port()
+    supabase_url = f"http://127.0.0.1:{supabase_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_postgrest", "--port", str(supabase_port),
+         "--latency-ms", str(latency_ms), "--jitter-ms", str(jitter_ms)],
+        cwd=BACKEND_DIR,
+    )
+    env = {
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_ANON_KEY": "loadtest",
+        "SUPABASE_SERVICE_KEY": "loadtest",
+        "METRICS_ENABLED": "true",
+    }
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    processes = [fake, app]
+    try:
+        _wait_until_up(f"{supabase_url}/auth/v1/user")
+        _wait_until_up(f"{app_url}{API}/health")
+    except Exception:
+        stop_stack(processes)
+        raise
+    return app_url, processes
+
+
+def stop_stack(processes: list[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'operation':10} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db/req':>7}"]
+    rows = [("overall", report["overall"]), *report["operations"].items()]
+    for name, s in rows:
+        db = f"{s['db_calls_per_request']:.1f}" if s["db_calls_per_request"] is not None else "-"
+        lines.append(
+            f"{name:10} {s['requests']:9d} {s['errors']:7d} {s['rps']:8.1f} "
+            f"{s['p50_ms']:8.1f} {s['p95_ms']:8.1f} {s['p99_ms']:8.1f} {db:>7}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted operations, e.g. list=50,create=10")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a user's requests")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="latency the stand-in adds per call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--app-url", help="load an already running app instead of starting one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    processes: list[subprocess.Popen] = []
+    app_url = args.app_url
+    if app_url is None:
+        app_url, processes = start_stack(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, workers=args.workers)
+    try:
+        report = asyncio.run(run_load(
+            app_url, users=args.users, duration=args.duration, mix=mix, think_ms=args.think_ms, seed=args.seed,
+        ))
+    finally:
+        stop_stack(processes)
+
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
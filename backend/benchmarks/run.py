@@ -0,0 +1,281 @@
+"""
+Microbenchmarks for the hot paths of the backend.
+
+Run from `backend/`:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json --threshold 0.15
+
+Each case runs on synthetic data at several sizes; database access goes to an
+in-memory Supabase stand-in (`benchmarks.fake_supabase`), so timings reflect our
+own Python work, not the network. Cases ending in `_sqlite` run the same service
+calls against the embedded SQLite repository in a temporary file instead, timing a
+real query engine. Results record the median and best per-call
+time over `--repeat` samples per case and size. With `--compare`, the best times are checked
+against a previous results file and the run exits non-zero if any case slowed
+down by more than `--threshold` (a fraction: 0.15 = 15%).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import math
+import statistics
+import sys
+import tempfile
+import timeit
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+# The app's Settings require these; the benchmarks never talk to a real project.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.repositories import supabase as supabase_repository, use_repository  # noqa: E402
+from app.repositories.sqlite import SqliteRepository  # noqa: E402
+from app.schemas.dos import Do  # noqa: E402
+from app.services import ancestry, flow_up, maintenance  # noqa: E402
+from app.services.period import get_period_window  # noqa: E402
+from benchmarks import data  # noqa: E402
+from benchmarks.fake_supabase import FakeSupabase, use_fake_supabase  # noqa: E402
+
+DEFAULT_SIZES = (100, 1_000, 10_000)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.15
+MIN_SAMPLE_SECONDS = 0.05
+
+
+@dataclass
+class Case:
+    name: str
+    # Builds the inputs for one run (untimed) and returns the callable to time.
+    prepare: Callable[[int], Callable[[], Any]]
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+def _flow_up_compute(size: int) -> Callable[[], Any]:
+    items = data.make_dos(size)
+    now_iso = data.NOW.isoformat()
+
+    def run() -> None:
+        for item in items:
+            if item["do_type"] == "maintenance":
+                flow_up._compute_maintenance_update(item, data.NOW, now_iso)
+            else:
+                flow_up._compute_normal_update(item, data.NOW, now_iso)
+
+    return run
+
+
+def _run_flow_up(size: int) -> Callable[[], Any]:
+    fake = FakeSupabase({"dos": data.make_dos(size)})
+
+    def run() -> None:
+        with use_fake_supabase(fake, supabase_repository):
+            flow_up.run_flow_up()
+
+    return run
+
+
+def _get_period_window(size: int) -> Callable[[], Any]:
+    moments = [datetime(2026, 1, 1, tzinfo=timezone.utc).replace(day=1 + i % 28, month=1 + i % 12) for i in range(size)]
+
+    def run() -> None:
+        for i, moment in enumerate(moments):
+            get_period_window(data.TIME_UNITS[i % len(data.TIME_UNITS)], moment)
+
+    return run
+
+
+def _inject_counts(size: int) -> Callable[[], Any]:
+    dos = data.make_dos(size, maintenance_ratio=0.5)
+    fake = FakeSupabase({"maintenance_logs": data.make_maintenance_logs(dos, logs_per_do=5)})
+
+    def run() -> None:
+        with use_fake_supabase(fake, supabase_repository):
+            maintenance.inject_counts(dos, data.NOW)
+
+    return run
+
+
+def _ancestors_deep(size: int) -> Callable[[], Any]:
+    rows = data.make_deep_lineage(size)
+    fake = FakeSupabase({"dos": rows})
+    leaf = rows[-1]["id"]
+
+    def run() -> None:
+        with use_fake_supabase(fake, supabase_repository):
+            ancestry.list_ancestors(data.USER_ID, leaf)
+
+    return run
+
+
+def _descendants_wide(size: int) -> Callable[[], Any]:
+    rows = data.make_wide_lineage(size)
+    fake = FakeSupabase({"dos": rows})
+    root = rows[0]["id"]
+
+    def run() -> None:
+        with use_fake_supabase(fake, supabase_repository):
+            ancestry.list_descendants(data.USER_ID, root)
+
+    return run
+
+
+# Kept for the life of the process; each is deleted at interpreter exit.
+_SQLITE_DIRS: list[tempfile.TemporaryDirectory] = []
+
+
+def _sqlite_repository(dos: list[dict], logs: list[dict] = ()) -> SqliteRepository:
+    directory = tempfile.TemporaryDirectory(prefix="flowdo-bench-")
+    _SQLITE_DIRS.append(directory)
+    repo = SqliteRepository(f"{directory.name}/flowdo.db")
+    repo.load(dos, logs)
+    return repo
+
+
+def _inject_counts_sqlite(size: int) -> Callable[[], Any]:
+    dos = data.make_dos(size, maintenance_ratio=0.5)
+    repo = _sqlite_repository(dos, data.make_maintenance_logs(dos, logs_per_do=5))
+
+    def run() -> None:
+        with use_repository(repo):
+            maintenance.inject_counts(dos, data.NOW)
+
+    return run
+
+
+def _list_dos_page_sqlite(size: int) -> Callable[[], Any]:
+    repo = _sqlite_repository(data.make_dos(size))
+
+    def run() -> None:
+        repo.list_dos_page(data.USER_ID, time_unit="week", limit=200)
+
+    return run
+
+
+def _descendants_wide_sqlite(size: int) -> Callable[[], Any]:
+    rows = data.make_wide_lineage(size)
+    repo = _sqlite_repository(rows)
+    root = rows[0]["id"]
+
+    def run() -> None:
+        with use_repository(repo):
+            ancestry.list_descendants(data.USER_ID, root)
+
+    return run
+
+
+_DOS_ADAPTER = TypeAdapter(list[Do])
+
+
+def _serialize_dos(size: int) -> Callable[[], Any]:
+    rows = data.make_dos(size)
+
+    # Mirrors what FastAPI does for `response_model=list[Do]`: validate, then dump JSON.
+    return lambda: _DOS_ADAPTER.dump_json(_DOS_ADAPTER.validate_python(rows))
+
+
+CASES = [
+    Case("flow_up_compute", _flow_up_compute),
+    Case("run_flow_up", _run_flow_up),
+    Case("get_period_window", _get_period_window),
+    Case("inject_counts", _inject_counts),
+    Case("ancestors_deep", _ancestors_deep),
+    Case("descendants_wide", _descendants_wide),
+    Case("serialize_dos", _serialize_dos),
+    Case("inject_counts_sqlite", _inject_counts_sqlite),
+    Case("list_dos_page_sqlite", _list_dos_page_sqlite),
+    Case("descendants_wide_sqlite", _descendants_wide_sqlite),
+]
+
+
+# ---------------------------------------------------------------------------
+# Running and comparing
+# ---------------------------------------------------------------------------
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict:
+    """Per-call seconds, each of `repeat` samples looping `fn` for at least MIN_SAMPLE_SECONDS."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, math.ceil(number * MIN_SAMPLE_SECONDS / 0.2))
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"median": statistics.median(timings), "min": min(timings), "number": number, "repeat": repeat}
+
+
+def run_cases(cases: list[Case], sizes: list[int], repeat: int) -> dict:
+    results: dict[str, dict] = {}
+    for case in cases:
+        for size in sizes:
+            key = f"{case.name}[{size}]"
+            results[key] = measure(case.prepare(size), repeat)
+            print(f"{key:32} median {results[key]['median'] * 1000:10.3f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Return a description of each case that got slower than baseline by more than `threshold`.
+
+    Compares best-of-repeat times, which are far less sensitive to machine noise than medians.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if not before or before["min"] <= 0:
+            continue
+        ratio = result["min"] / before["min"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{key}: {before['min'] * 1000:.3f} ms -> {result['min'] * 1000:.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated data sizes")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", help="run only cases whose name contains this string")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    cases = [c for c in CASES if not args.only or args.only in c.name]
+    current = run_cases(cases, sizes, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
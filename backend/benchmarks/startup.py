@@ -0,0 +1,88 @@
+"""
+Cold-start import report.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and prints
+the slowest imports by cumulative time, so startup regressions can be traced to the
+module that introduced them. Run from `backend/`:
+
+    python -m benchmarks.startup --top 25
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Heavy packages that must not be imported just by loading the app: they are
+# pulled in on first use (Supabase client, outbound HTTP) or inside the lifespan
+# (scheduler).
+DEFERRED_PACKAGES = ("supabase", "postgrest", "supabase_auth", "httpx", "h2", "apscheduler")
+
+# Set to a number of milliseconds to have tests/test_startup.py fail when importing
+# the app takes longer. Wall-clock time depends on the machine, so it is opt-in.
+IMPORT_BUDGET_ENV = "FLOWDO_IMPORT_BUDGET_MS"
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth))
+    return timings
+
+
+def measure_app_import(module: str = "app.main") -> list[ImportTiming]:
+    env = {
+        "SUPABASE_URL": "http://localhost:54321",
+        "SUPABASE_ANON_KEY": "startup",
+        "SUPABASE_SERVICE_KEY": "startup",
+        **os.environ,
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    timings = measure_app_import()
+    total = next(t for t in timings if t.module == "app.main")
+    print(f"import app.main: {total.cumulative_us / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for t in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[: args.top]:
+        print(f"{t.cumulative_us / 1000:14.1f} {t.self_us / 1000:8.1f}  {'  ' * t.depth}{t.module}")
+    deferred = sorted({t.module for t in timings if t.module.split(".")[0] in DEFERRED_PACKAGES})
+    if deferred:
+        print(f"\nimported eagerly but expected to be deferred: {', '.join(deferred)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Copy existing dos and maintenance_logs rows into their hash-partitioned replacements.
+
+Run between the two partitioning migrations (20261019000800 and 20261019000900).
+Each batch is one short transaction through PostgREST, so the API keeps serving
+while it runs; writes made meanwhile are mirrored by triggers. Safe to interrupt
+and re-run, or to resume with --after-dos / --after-logs.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+BACKEND_DIR = ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.supabase import supabase  # noqa: E402
+
+
+def backfill(function: str, resume_flag: str, after: str | None, batch: int, pause: float) -> int:
+    """Call `function` until it reports nothing left; returns how many batches it took."""
+    batches = 0
+    while True:
+        after = supabase.rpc(function, {"p_after": after, "p_batch": batch}).execute().data
+        if after is None:
+            return batches
+        batches += 1
+        print(f"{function}: batch {batches} done, resume with {resume_flag} {after}", flush=True)
+        if pause:
+            time.sleep(pause)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=1000, help="rows per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--after-dos", default=None, help="resume dos after this id")
+    parser.add_argument("--after-logs", default=None, help="resume maintenance_logs after this id")
+    args = parser.parse_args()
+
+    dos_batches = backfill("partition_backfill_dos", "--after-dos", args.after_dos, args.batch, args.pause)
+    log_batches = backfill("partition_backfill_logs", "--after-logs", args.after_logs, args.batch, args.pause)
+    print(f"Copied dos in {dos_batches} batches and maintenance_logs in {log_batches} batches")
+    print("Apply the swap migration next (supabase db push).")
+
+
+if __name__ == "__main__":
+    main()
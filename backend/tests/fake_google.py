@@ -0,0 +1,84 @@
+"""
+A small in-process stand-in for the Google Calendar API.
+
+`FakeGoogleCalendar.transport` is an `httpx.MockTransport`; install it on the shared
+client with `app.core.http.set_http_client(create_http_client(transport=...))`.
+It implements the calendar list and events endpoints with Google's incremental sync
+semantics: every mutation bumps a version, a sync token names the version it was
+issued at, and a sync with a token returns only events changed after it.
+"""
+
+from __future__ import annotations
+
+import json
+from urllib.parse import unquote
+
+import httpx
+
+ACCESS_TOKEN = "fake-access-token"
+
+
+class FakeGoogleCalendar:
+    def __init__(self, *, page_size: int = 2) -> None:
+        self.page_size = page_size
+        self.version = 0
+        # calendar_id -> event_id -> (version, event resource)
+        self.events: dict[str, dict[str, tuple[int, dict]]] = {}
+        self.calendar_meta: dict[str, dict] = {}
+        self.expired_tokens: set[str] = set()
+        self.requests: list[httpx.Request] = []
+        self.transport = httpx.MockTransport(self.handle)
+
+    # -- test setup -----------------------------------------------------------
+
+    def add_calendar(self, calendar_id: str, *, selected: bool = True, primary: bool = False) -> None:
+        self.events.setdefault(calendar_id, {})
+        self.calendar_meta[calendar_id] = {"id": calendar_id, "summary": calendar_id, "selected": selected, "primary": primary}
+
+    def put_event(self, calendar_id: str, event_id: str, start: str, end: str, **extra) -> None:
+        self.version += 1
+        key = "date" if len(start) == 10 else "dateTime"
+        event = {"id": event_id, "status": "confirmed", "start": {key: start}, "end": {key: end}, **extra}
+        self.events[calendar_id][event_id] = (self.version, event)
+
+    def cancel_event(self, calendar_id: str, event_id: str) -> None:
+        self.version += 1
+        self.events[calendar_id][event_id] = (self.version, {"id": event_id, "status": "cancelled"})
+
+    # -- HTTP -----------------------------------------------------------------
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("Authorization") != f"Bearer {ACCESS_TOKEN}":
+            return httpx.Response(401, json={"error": "unauthorized"})
+
+        path = request.url.path
+        if path == "/calendar/v3/users/me/calendarList":
+            return httpx.Response(200, json={"items": list(self.calendar_meta.values())})
+        prefix, suffix = "/calendar/v3/calendars/", "/events"
+        if path.startswith(prefix) and path.endswith(suffix):
+            calendar_id = unquote(path[len(prefix):-len(suffix)])
+            return self._events(calendar_id, request.url.params)
+        return httpx.Response(404)
+
+    def _events(self, calendar_id: str, params: httpx.QueryParams) -> httpx.Response:
+        sync_token = params.get("syncToken")
+        if sync_token in self.expired_tokens:
+            return httpx.Response(410, json={"error": "fullSyncRequired"})
+
+        since = int(sync_token.removeprefix("v")) if sync_token else None
+        items = [
+            event
+            for version, event in sorted(self.events.get(calendar_id, {}).values(), key=lambda pair: pair[0])
+            # A full sync leaves out cancelled events; an incremental one reports them.
+            if (since is None and event["status"] != "cancelled") or (since is not None and version > since)
+        ]
+
+        offset = int(params.get("pageToken", "0"))
+        page = items[offset:offset + self.page_size]
+        body: dict = {"items": page}
+        if offset + self.page_size < len(items):
+            body["nextPageToken"] = str(offset + self.page_size)
+        else:
+            body["nextSyncToken"] = f"v{self.version}"
+        return httpx.Response(200, content=json.dumps(body), headers={"content-type": "application/json"})
@@ -0,0 +1,83 @@
+"""
+Tests for app.services.ancestry and the lineage color spread that builds on it.
+
+The database is the in-memory stand-in from benchmarks/fake_supabase.py, seeded with
+`ancestor_ids` as the migration's triggers would maintain them.
+"""
+
+import pytest
+
+from app.repositories import supabase as supabase_repository
+from app.services import lineage_colors
+from app.services.ancestry import LineageCycleError, check_new_parent, list_ancestors, list_descendants
+from benchmarks import data
+from benchmarks.fake_supabase import FakeSupabase, use_fake_supabase
+
+USER = data.USER_ID
+OTHER_USER = "00000000-0000-4000-8000-000000000002"
+
+
+@pytest.fixture
+def chain():
+    """Five dos in one parent → child chain, plus an unrelated root."""
+    rows = data.make_deep_lineage(5)
+    loner = {"id": "loner", "user_id": USER, "parent_id": None, "ancestor_ids": [], "color_hex": None}
+    db = FakeSupabase({"dos": rows + [loner]})
+    with use_fake_supabase(db, supabase_repository):
+        yield db, [r["id"] for r in rows]
+
+
+def test_ancestors_are_nearest_first_in_one_lookup(chain):
+    db, ids = chain
+    db.calls.clear()
+
+    ancestors = list_ancestors(USER, ids[-1])
+
+    assert [d["id"] for d in ancestors] == list(reversed(ids[:-1]))
+    assert db.calls == [("dos", "select"), ("dos", "select")]
+    assert list_ancestors(USER, ids[0]) == []
+
+
+def test_descendants_are_shallowest_first(chain):
+    _, ids = chain
+    assert [d["id"] for d in list_descendants(USER, ids[1])] == ids[2:]
+    assert list_descendants(USER, ids[-1]) == []
+
+
+def test_lookups_are_scoped_to_the_owner(chain):
+    _, ids = chain
+    with pytest.raises(ValueError):
+        list_ancestors(OTHER_USER, ids[-1])
+    with pytest.raises(ValueError):
+        list_descendants(OTHER_USER, ids[0])
+
+
+def test_reparenting_under_a_descendant_is_a_cycle(chain):
+    _, ids = chain
+    with pytest.raises(LineageCycleError):
+        check_new_parent(USER, ids[1], ids[3])
+    with pytest.raises(LineageCycleError):
+        check_new_parent(USER, ids[2], ids[2])
+
+
+def test_reparenting_elsewhere_is_allowed(chain):
+    _, ids = chain
+    check_new_parent(USER, ids[3], ids[0])
+    check_new_parent(USER, ids[0], "loner")
+
+
+def test_unknown_parent_is_not_a_cycle(chain):
+    _, ids = chain
+    with pytest.raises(ValueError) as excinfo:
+        check_new_parent(USER, ids[0], "missing")
+    assert not isinstance(excinfo.value, LineageCycleError)
+
+
+def test_lineage_color_spreads_over_the_whole_tree_only(chain):
+    db, ids = chain
+
+    lineage_colors.assign_color_to_lineage_chain(start_do_id=ids[2], user_id=USER, color_hex="#abcdef")
+
+    colors = {d["id"]: d["color_hex"] for d in db.tables["dos"]}
+    assert all(colors[i] == "#abcdef" for i in ids)
+    assert colors["loner"] is None
@@ -0,0 +1,88 @@
+"""
+Tests for the benchmark and load-test harness: the Supabase stand-ins, regression
+comparison and load report.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.repositories import supabase as supabase_repository
+from app.services.maintenance import inject_counts
+from benchmarks import data
+from benchmarks.fake_postgrest import create_app, user_id_for_token
+from benchmarks.fake_supabase import FakeSupabase, use_fake_supabase
+from benchmarks.load import Sample, parse_mix, summarize
+from benchmarks.run import compare
+
+
+def test_fake_supabase_filters_order_and_limit():
+    fake = FakeSupabase({"dos": [
+        {"id": "a", "user_id": "u1", "time_unit": "today", "created_at": "2026-01-02T00:00:00+00:00", "parent_id": None},
+        {"id": "b", "user_id": "u1", "time_unit": "week", "created_at": "2026-01-01T00:00:00+00:00", "parent_id": "a"},
+        {"id": "c", "user_id": "u2", "time_unit": "today", "created_at": "2026-01-03T00:00:00+00:00", "parent_id": None},
+    ]})
+    rows = fake.table("dos").select("id").eq("user_id", "u1").order("created_at").execute().data
+    assert rows == [{"id": "b"}, {"id": "a"}]
+    assert fake.table("dos").select("id").not_.is_("parent_id", "null").execute().data == [{"id": "b"}]
+    assert len(fake.table("dos").select("*").in_("id", ["a", "c"]).limit(1).execute().data) == 1
+    assert fake.table("dos").select("id").gte("created_at", "2026-01-02T00:00:00+00:00").execute().data == [
+        {"id": "a"}, {"id": "c"}
+    ]
+
+
+def test_fake_supabase_upsert_updates_on_conflict():
+    fake = FakeSupabase({"dos": [{"id": "a", "flow_count": 0}]})
+    fake.table("dos").upsert([{"id": "a", "flow_count": 1}, {"id": "b", "flow_count": 0}], on_conflict="id").execute()
+    assert sorted((r["id"], r["flow_count"]) for r in fake.tables["dos"]) == [("a", 1), ("b", 0)]
+    fake.table("dos").delete().eq("id", "a").execute()
+    fake.table("dos").upsert({"id": "b", "flow_count": 2}).execute()
+    assert [(r["id"], r["flow_count"]) for r in fake.tables["dos"]] == [("b", 2)]
+
+
+def test_inject_counts_runs_against_fake():
+    dos = data.make_dos(20, maintenance_ratio=1.0)
+    logs = [{"id": "l1", "do_id": dos[0]["id"], "user_id": data.USER_ID, "logged_at": data.NOW.isoformat()}]
+    with use_fake_supabase(FakeSupabase({"maintenance_logs": logs}), supabase_repository) as fake:
+        inject_counts(dos, data.NOW)
+    assert dos[0]["completion_count"] == 1
+    assert all(d["completion_count"] == 0 for d in dos[1:])
+    assert {table for table, _ in fake.calls} == {"maintenance_logs"}
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {"results": {"a[10]": {"min": 1.0}, "b[10]": {"min": 1.0}, "gone[10]": {"min": 1.0}}}
+    current = {"results": {"a[10]": {"min": 1.1}, "b[10]": {"min": 1.3}, "new[10]": {"min": 5.0}}}
+    regressions = compare(baseline, current, threshold=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("b[10]")
+
+
+def test_fake_postgrest_serves_auth_and_rest():
+    app = create_app()
+    client = TestClient(app)
+    user = client.get("/auth/v1/user", headers={"Authorization": "Bearer loadtest-alice"}).json()
+    assert user["id"] == user_id_for_token("loadtest-alice")
+    assert client.get("/auth/v1/user", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+    prefer = {"Prefer": "return=representation"}
+    created = client.post("/rest/v1/dos", json={"user_id": user["id"], "title": "a", "time_unit": "today"}, headers=prefer)
+    assert created.status_code == 201
+    do = created.json()[0]
+    assert do["completed"] is False and do["flow_count"] == 0
+
+    rows = client.get(f"/rest/v1/dos?select=id,title&user_id=eq.{user['id']}&completed=eq.false&parent_id=is.null").json()
+    assert rows == [{"id": do["id"], "title": "a"}]
+    patched = client.patch(f"/rest/v1/dos?id=eq.{do['id']}", json={"completed": True}, headers=prefer).json()
+    assert patched[0]["completed"] is True
+    assert client.get(f"/rest/v1/dos?select=id&id=in.({do['id']},other)&completed=eq.false").json() == []
+    assert client.get(f"/rest/v1/dos?or=(id.eq.{do['id']})").status_code == 400
+
+
+def test_load_summary_percentiles_and_db_calls():
+    samples = [Sample("list", s / 1000, 200, 3) for s in range(1, 101)] + [Sample("create", 0.5, 500, None)]
+    report = summarize(samples, elapsed=10.0)
+    assert report["overall"]["requests"] == 101 and report["overall"]["errors"] == 1
+    assert report["operations"]["list"]["p50_ms"] == pytest.approx(50.0)
+    assert report["operations"]["list"]["p99_ms"] == pytest.approx(99.0)
+    assert report["operations"]["list"]["db_calls_per_request"] == 3
+    assert report["operations"]["create"]["db_calls_per_request"] is None
+    assert parse_mix("list=3,log=1") == {"list": 3.0, "log": 1.0}
@@ -0,0 +1,53 @@
+"""Tests for app.services.board: group_board_rows."""
+
+from app.services.board import group_board_rows
+from app.services.pagination import decode_cursor
+
+
+def make_row(n: int, time_unit: str) -> dict:
+    return {
+        "id": f"00000000-0000-0000-0000-{n:012d}",
+        "time_unit": time_unit,
+        "created_at": f"2026-03-01T00:00:{n:02d}+00:00",
+    }
+
+
+def test_columns_follow_requested_unit_order():
+    rows = [make_row(1, "week"), make_row(2, "today")]
+    columns = group_board_rows(rows, [], ["today", "week", "month"], limit=50)
+    assert [c["time_unit"] for c in columns] == ["today", "week", "month"]
+    assert [len(c["dos"]) for c in columns] == [1, 1, 0]
+
+
+def test_counts_are_taken_from_aggregates_not_rows():
+    rows = [make_row(1, "today")]
+    counts = [{"time_unit": "today", "total": 7, "completed": 3, "maintenance": 2}]
+    (column,) = group_board_rows(rows, counts, ["today"], limit=50)
+    assert (column["total"], column["completed"], column["maintenance"]) == (7, 3, 2)
+
+
+def test_empty_unit_has_zero_counts():
+    (column,) = group_board_rows([], [], ["year"], limit=50)
+    assert column == {
+        "time_unit": "year",
+        "dos": [],
+        "total": 0,
+        "completed": 0,
+        "maintenance": 0,
+        "next_cursor": None,
+    }
+
+
+def test_truncated_column_gets_cursor_at_last_shipped_row():
+    rows = [make_row(i, "today") for i in range(2)]
+    counts = [{"time_unit": "today", "total": 5, "completed": 0, "maintenance": 0}]
+    (column,) = group_board_rows(rows, counts, ["today"], limit=2)
+    assert decode_cursor(column["next_cursor"]) == (rows[1]["created_at"], rows[1]["id"])
+
+
+def test_complete_column_has_no_cursor():
+    rows = [make_row(i, "today") for i in range(2)]
+    counts = [{"time_unit": "today", "total": 2, "completed": 0, "maintenance": 0}]
+    (column,) = group_board_rows(rows, counts, ["today"], limit=2)
+    assert column["next_cursor"] is None
+
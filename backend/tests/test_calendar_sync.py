@@ -0,0 +1,139 @@
+"""
+Tests for the Google Calendar sync engine in app.services.calendar_sync.
+
+Google is played by tests/fake_google.py, installed on the shared HTTP client, so the
+incremental sync protocol is exercised end to end without network access.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.http import create_http_client, set_http_client
+from app.services.calendar_sync import fetch_calendar_changes, gather_bounded, parse_google_event
+from app.services.google_calendar_api import list_calendars
+from tests.fake_google import ACCESS_TOKEN, FakeGoogleCalendar
+
+CAL = "me@example.com"
+
+
+@pytest.fixture
+def google():
+    fake = FakeGoogleCalendar(page_size=2)
+    fake.add_calendar(CAL, primary=True)
+    client = create_http_client(transport=fake.transport)
+    set_http_client(client)
+    yield fake
+    asyncio.run(client.aclose())
+    set_http_client(None)
+
+
+def sync(sync_token=None):
+    return asyncio.run(fetch_calendar_changes(access_token=ACCESS_TOKEN, calendar_id=CAL, sync_token=sync_token))
+
+
+# ---------------------------------------------------------------------------
+# parse_google_event
+# ---------------------------------------------------------------------------
+
+
+def test_parse_timed_event_normalises_to_utc():
+    row = parse_google_event({
+        "id": "e1",
+        "summary": "Standup",
+        "start": {"dateTime": "2026-03-02T09:00:00-05:00"},
+        "end": {"dateTime": "2026-03-02T09:15:00-05:00"},
+    })
+    assert row["start_at"] == "2026-03-02T14:00:00+00:00"
+    assert row["end_at"] == "2026-03-02T14:15:00+00:00"
+    assert row["all_day"] is False
+    assert row["transparency"] == "opaque"
+
+
+def test_parse_all_day_event_spans_utc_days():
+    row = parse_google_event({"id": "e1", "start": {"date": "2026-03-02"}, "end": {"date": "2026-03-03"}})
+    assert row["start_at"] == "2026-03-02T00:00:00+00:00"
+    assert row["end_at"] == "2026-03-03T00:00:00+00:00"
+    assert row["all_day"] is True
+
+
+def test_parse_event_without_times_is_skipped():
+    assert parse_google_event({"id": "e1", "status": "cancelled"}) is None
+
+
+# ---------------------------------------------------------------------------
+# fetch_calendar_changes
+# ---------------------------------------------------------------------------
+
+
+def test_full_sync_follows_pages_and_returns_sync_token(google):
+    for i in range(5):
+        google.put_event(CAL, f"e{i}", f"2026-03-02T0{i}:00:00Z", f"2026-03-02T0{i}:30:00Z")
+
+    changes = sync()
+    assert sorted(r["event_id"] for r in changes.upserts) == [f"e{i}" for i in range(5)]
+    assert changes.full_resync is True
+    assert changes.next_sync_token == "v5"
+    assert len(google.requests) == 3  # three pages of two
+
+
+def test_incremental_sync_returns_only_changes(google):
+    google.put_event(CAL, "keep", "2026-03-02T09:00:00Z", "2026-03-02T10:00:00Z")
+    google.put_event(CAL, "move", "2026-03-02T11:00:00Z", "2026-03-02T12:00:00Z")
+    google.put_event(CAL, "drop", "2026-03-02T13:00:00Z", "2026-03-02T14:00:00Z")
+    token = sync().next_sync_token
+
+    google.put_event(CAL, "move", "2026-03-02T15:00:00Z", "2026-03-02T16:00:00Z")
+    google.cancel_event(CAL, "drop")
+    changes = sync(token)
+
+    assert [r["event_id"] for r in changes.upserts] == ["move"]
+    assert changes.upserts[0]["start_at"] == "2026-03-02T15:00:00+00:00"
+    assert changes.deleted_ids == ["drop"]
+    assert changes.full_resync is False
+
+
+def test_incremental_sync_with_no_changes_is_empty(google):
+    google.put_event(CAL, "e1", "2026-03-02T09:00:00Z", "2026-03-02T10:00:00Z")
+    token = sync().next_sync_token
+
+    changes = sync(token)
+    assert changes.upserts == [] and changes.deleted_ids == []
+    assert changes.next_sync_token == token
+
+
+def test_expired_sync_token_falls_back_to_full_sync(google):
+    google.put_event(CAL, "e1", "2026-03-02T09:00:00Z", "2026-03-02T10:00:00Z")
+    google.expired_tokens.add("v0")
+
+    changes = sync("v0")
+    assert [r["event_id"] for r in changes.upserts] == ["e1"]
+    assert changes.full_resync is True
+
+
+def test_calendar_list(google):
+    google.add_calendar("holidays", selected=False)
+    calendars = asyncio.run(list_calendars(access_token=ACCESS_TOKEN))
+    assert {c["id"] for c in calendars} == {CAL, "holidays"}
+
+
+# ---------------------------------------------------------------------------
+# gather_bounded
+# ---------------------------------------------------------------------------
+
+
+def test_gather_bounded_limits_concurrency_and_keeps_order():
+    running = 0
+    peak = 0
+
+    async def job(n):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return n
+
+    results = asyncio.run(gather_bounded((job(n) for n in range(10)), limit=3))
+    assert results == list(range(10))
+    assert peak == 3
@@ -0,0 +1,181 @@
+"""
+Tests for app.core.circuit_breaker and degraded-mode reads.
+
+Stale copies are exercised against the in-memory stand-in from
+benchmarks/fake_supabase.py, made to fail as an unreachable database would.
+"""
+
+import asyncio
+import base64
+import json
+import time
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import dos as dos_endpoints
+from app.api.v1.endpoints.dos import NEXT_CURSOR_HEADER, STALE_HEADER
+from app.core import verified_tokens
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from app.core.config import settings
+from app.middleware.auth import get_current_user
+from app.repositories import supabase as supabase_repository
+from app.services import dos_snapshot
+from benchmarks import data
+from benchmarks.fake_supabase import FakeSupabase, use_fake_supabase
+
+USER = data.USER_ID
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_ENABLED", True)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_OPEN_SECONDS", 10)
+    monkeypatch.setattr(settings, "CIRCUIT_SLOW_CALL_MS", 1000)
+
+
+def fail(breaker: CircuitBreaker) -> None:
+    with pytest.raises(ConnectionError):
+        with breaker.call():
+            raise ConnectionError("down")
+
+
+def succeed(breaker: CircuitBreaker) -> None:
+    with breaker.call():
+        pass
+
+
+def test_opens_after_consecutive_failures_and_fails_fast(enabled):
+    breaker = CircuitBreaker(clock=Clock())
+    fail(breaker)
+    fail(breaker)
+    succeed(breaker)
+    for _ in range(3):
+        fail(breaker)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpen) as excinfo:
+        succeed(breaker)
+    assert excinfo.value.retry_after == 10
+
+
+def test_server_errors_count_as_failures(enabled):
+    breaker = CircuitBreaker(clock=Clock())
+    for _ in range(3):
+        with breaker.call() as outcome:
+            outcome.failed = True
+    assert breaker.state == OPEN
+
+
+def test_a_successful_probe_closes_the_circuit(enabled):
+    clock = Clock()
+    breaker = CircuitBreaker(clock=clock)
+    for _ in range(3):
+        fail(breaker)
+
+    clock.now += 10
+    with breaker.call():
+        assert breaker.state == HALF_OPEN
+        # Only the probe goes through while it is in flight.
+        with pytest.raises(CircuitOpen):
+            succeed(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_a_failed_or_slow_probe_reopens_the_circuit(enabled, monkeypatch):
+    clock = Clock()
+    breaker = CircuitBreaker(clock=clock)
+    for _ in range(3):
+        fail(breaker)
+
+    clock.now += 10
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    monkeypatch.setattr(settings, "CIRCUIT_SLOW_CALL_MS", 0)
+    succeed(breaker)
+    assert breaker.state == OPEN
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(clock=Clock())
+    for _ in range(10):
+        fail(breaker)
+    assert breaker.state == CLOSED
+
+
+class FlakySupabase(FakeSupabase):
+    """Raises CircuitOpen for every query while `down` is set."""
+
+    down = False
+
+    def table(self, name):
+        if self.down:
+            raise CircuitOpen(retry_after=5)
+        return super().table(name)
+
+
+@pytest.fixture
+def fake(enabled):
+    db = FlakySupabase({"dos": data.make_dos(10), "maintenance_logs": []})
+    dos_snapshot._last_good.clear()
+    with use_fake_supabase(db, supabase_repository):
+        yield db
+    dos_snapshot._last_good.clear()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(dos_endpoints.router, prefix="/dos")
+    app.dependency_overrides[get_current_user] = lambda: {"sub": USER}
+    return TestClient(app)
+
+
+def test_last_good_page_is_served_stale_while_the_database_is_down(fake, client):
+    fresh = client.get("/dos", params={"time_unit": "today", "limit": 3})
+    assert fresh.status_code == 200 and STALE_HEADER not in fresh.headers
+
+    fake.down = True
+    stale = client.get("/dos", params={"time_unit": "today", "limit": 3})
+    assert stale.status_code == 200
+    assert stale.json() == fresh.json()
+    assert stale.headers[STALE_HEADER]
+    assert stale.headers.get(NEXT_CURSOR_HEADER) == fresh.headers.get(NEXT_CURSOR_HEADER)
+
+    fake.down = False
+    assert STALE_HEADER not in client.get("/dos", params={"time_unit": "today", "limit": 3}).headers
+
+
+def test_without_a_copy_of_that_page_the_failure_propagates(fake, client):
+    client.get("/dos", params={"time_unit": "today", "limit": 3})
+    fake.down = True
+    with pytest.raises(CircuitOpen):
+        client.get("/dos", params={"time_unit": "week", "limit": 3})
+
+
+def _jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"sub": "u", "exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+def test_verified_tokens_expire_with_the_token():
+    live, expired = _jwt(time.time() + 60), _jwt(time.time() - 1)
+    verified_tokens.remember(live, {"sub": "u", "email": None})
+    verified_tokens.remember(expired, {"sub": "u", "email": None})
+
+    assert verified_tokens.lookup(live) == {"sub": "u", "email": None}
+    assert verified_tokens.lookup(expired) is None
+    assert verified_tokens.lookup("never-seen") is None
@@ -0,0 +1,151 @@
+"""
+Tests for app.services.dos_snapshot: coalescing concurrent reads and read-after-write.
+
+The database is the in-memory stand-in from benchmarks/fake_supabase.py; a gate lets
+a test hold a fetch "in flight" while other requests arrive.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+
+import pytest
+
+from app.repositories import supabase as supabase_repository
+from app.services import dos_snapshot
+from app.services.dos_snapshot import first_page_read, load_snapshot, note_bulk_write, write_scope
+from benchmarks import data
+from benchmarks.fake_supabase import FakeSupabase, use_fake_supabase
+
+USER = data.USER_ID
+
+
+class GatedSupabase(FakeSupabase):
+    """Blocks `dos` reads until `release` is set, so fetches overlap."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.release = threading.Event()
+        self.release.set()
+
+    def table(self, name):
+        if name == "dos":
+            self.release.wait(timeout=5)
+        return super().table(name)
+
+    def dos_reads(self) -> int:
+        return sum(1 for table, action in self.calls if table == "dos" and action == "select")
+
+
+@pytest.fixture
+def fake():
+    db = GatedSupabase({"dos": data.make_dos(30), "maintenance_logs": []})
+    with use_fake_supabase(db, supabase_repository):
+        yield db
+
+
+def test_concurrent_reads_share_one_fetch(fake):
+    async def scenario():
+        fake.release.clear()
+        reads = [asyncio.create_task(load_snapshot(USER)) for _ in range(7)]
+        await asyncio.sleep(0.05)
+        fake.release.set()
+        return await asyncio.gather(*reads)
+
+    snapshots = asyncio.run(scenario())
+    assert fake.dos_reads() == 1
+    assert all(s is snapshots[0] for s in snapshots)
+    assert snapshots[0].complete and len(snapshots[0].rows) == 30
+    assert all("is_today_priority" in d for d in snapshots[0].rows)
+
+
+def test_a_lone_first_page_read_runs_its_own_query(fake):
+    async def scenario():
+        async with first_page_read(USER) as snapshot:
+            return snapshot
+
+    assert asyncio.run(scenario()) is None
+    assert fake.dos_reads() == 0
+
+
+def test_first_page_reads_arriving_meanwhile_share_one_snapshot(fake):
+    async def read():
+        async with first_page_read(USER) as snapshot:
+            await asyncio.sleep(0.05)  # stands in for the read's own page query
+            return snapshot
+
+    async def scenario():
+        return await asyncio.gather(*(read() for _ in range(5)))
+
+    first, *rest = asyncio.run(scenario())
+    assert first is None
+    assert all(s is rest[0] for s in rest) and rest[0].complete
+    assert fake.dos_reads() == 1
+    assert dos_snapshot._active_reads == {}
+
+
+def test_sequential_reads_are_not_cached(fake):
+    async def scenario():
+        await load_snapshot(USER)
+        await load_snapshot(USER)
+
+    asyncio.run(scenario())
+    assert fake.dos_reads() == 2
+
+
+def test_read_after_write_does_not_join_older_fetch(fake):
+    async def scenario():
+        fake.release.clear()
+        before = asyncio.create_task(load_snapshot(USER))
+        await asyncio.sleep(0.05)  # the first fetch is now blocked mid-flight
+
+        with write_scope(USER):
+            fake.tables["dos"].append({**fake.tables["dos"][0], "id": "new-do", "created_at": "2999-01-01T00:00:00+00:00"})
+        after = asyncio.create_task(load_snapshot(USER))
+        await asyncio.sleep(0.05)
+        fake.release.set()
+        return await before, await after
+
+    before, after = asyncio.run(scenario())
+    assert fake.dos_reads() == 2
+    assert after.rows[-1]["id"] == "new-do"
+
+
+def test_bulk_write_invalidates_every_user(fake):
+    async def scenario():
+        fake.release.clear()
+        first = asyncio.create_task(load_snapshot(USER))
+        await asyncio.sleep(0.05)
+        note_bulk_write()
+        second = asyncio.create_task(load_snapshot(USER))
+        await asyncio.sleep(0.05)
+        fake.release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    assert fake.dos_reads() == 2
+
+
+def test_write_scope_records_failed_writes():
+    before = dos_snapshot._generation(USER)
+    with pytest.raises(RuntimeError):
+        with write_scope(USER):
+            raise RuntimeError("write failed after partial changes")
+    assert dos_snapshot._generation(USER) != before
+
+
+def test_oversized_user_is_marked_incomplete(fake, monkeypatch):
+    monkeypatch.setattr(dos_snapshot, "SNAPSHOT_MAX_ROWS", 10)
+    monkeypatch.setattr(dos_snapshot, "_oversized", OrderedDict())
+    snapshot = asyncio.run(load_snapshot(USER))
+    assert not snapshot.complete and snapshot.rows == []
+
+    # Remembered for a while: the next request doesn't fetch the look-ahead page again.
+    assert not asyncio.run(load_snapshot(USER)).complete
+    assert fake.dos_reads() == 1
+
+    monkeypatch.setattr(dos_snapshot, "OVERSIZED_RECHECK_SECONDS", 0.0)
+    dos_snapshot._oversized.clear()
+    asyncio.run(load_snapshot(USER))
+    asyncio.run(load_snapshot(USER))
+    assert fake.dos_reads() == 3
@@ -1,20 +1,25 @@
 """
 Tests for app.services.flow_up helper functions.
 
-These tests exercise the pure computation logic only — no database calls are made.
+Most tests exercise the pure computation logic only — no database calls are made.
 The helpers (_compute_maintenance_update, _compute_normal_update) take plain dicts
-and a datetime, so they're straightforward to test without any mocking.
+and a datetime, so they're straightforward to test without any mocking. The
+run_flow_up tests at the end use the in-memory stand-in from benchmarks/fake_supabase.py.
 """
 
 from datetime import datetime, timezone
 
 import pytest
 
+from app.repositories import supabase as supabase_repository
+from app.services import flow_up
 from app.services.flow_up import (
     _compute_maintenance_update,
     _compute_normal_update,
     _is_season_start,
 )
+from benchmarks import data
+from benchmarks.fake_supabase import FakeSupabase, use_fake_supabase
 
 # ---------------------------------------------------------------------------
 # Shared fixtures
@@ -264,3 +269,62 @@ def test_maintenance_flow_count_unchanged_when_staying():
     item = make_item(time_unit="week", do_type="maintenance", flow_count=3)
     update, _ = _compute_maintenance_update(item, PLAIN_DAY, NOW_ISO)
     assert update["flow_count"] == 3
+
+
+# ---------------------------------------------------------------------------
+# run_flow_up over a hash-partitioned dos table
+# ---------------------------------------------------------------------------
+
+
+class PartitionedSupabase(FakeSupabase):
+    """`dos` split into two partitions sharing its row dicts; reads of `broken` fail."""
+
+    broken: str | None = None
+
+    def __init__(self, dos: list[dict]) -> None:
+        partitions = {"dos_p00": dos[::2], "dos_p01": dos[1::2]}
+        super().__init__({"dos": dos, **partitions, "dos_partitions": [{"name": n} for n in partitions]})
+
+    def table(self, name):
+        if name == self.broken:
+            raise ConnectionError("partition unavailable")
+        return super().table(name)
+
+
+def test_run_flow_up_scans_each_partition_instead_of_the_whole_table():
+    unpartitioned = FakeSupabase({"dos": data.make_dos(40)})
+    with use_fake_supabase(unpartitioned, supabase_repository):
+        expected = flow_up.run_flow_up()
+
+    fake = PartitionedSupabase(data.make_dos(40))
+    with use_fake_supabase(fake, supabase_repository):
+        assert flow_up.run_flow_up() == expected
+
+    scanned = sorted(table for table, action in fake.calls if action == "select" and table.startswith("dos"))
+    assert scanned == ["dos_p00", "dos_p01", "dos_partitions"]
+    assert fake.calls.count(("dos_apply_flow_up", "rpc")) == 2
+
+
+def test_a_failed_partition_does_not_stop_the_others():
+    fake = PartitionedSupabase(data.make_dos(40))
+    fake.broken = "dos_p01"
+    with use_fake_supabase(fake, supabase_repository):
+        with pytest.raises(ConnectionError):
+            flow_up.run_flow_up()
+    assert fake.calls.count(("dos_apply_flow_up", "rpc")) == 1
+
+
+def test_run_flow_up_logs_one_transition_per_moved_do():
+    dos = data.make_dos(40)
+    before = {d["id"]: (d["time_unit"], d["days_in_unit"]) for d in dos}
+    fake = PartitionedSupabase(dos)
+    with use_fake_supabase(fake, supabase_repository):
+        summary = flow_up.run_flow_up()
+
+    logged = fake.tables["do_transitions"]
+    assert len(logged) == sum(summary.values())
+    assert fake.calls.count(("do_transitions", "insert")) == 2
+    for row in logged:
+        from_unit, days = before[row["do_id"]]
+        assert (row["from_unit"], row["days_in_unit"]) == (from_unit, days)
+        assert f"{row['from_unit']}_to_{row['to_unit']}" in summary
@@ -0,0 +1,118 @@
+"""Tests for app.services.free_slots."""
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.services import free_slots
+from app.services.free_slots import free_intervals, merge_busy_intervals
+
+DAY_START = datetime(2026, 3, 2, tzinfo=timezone.utc)
+DAY_END = DAY_START + timedelta(days=1)
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return DAY_START + timedelta(hours=hour, minutes=minute)
+
+
+def event(start: datetime, end: datetime, **extra) -> dict:
+    return {"start_at": start.isoformat(), "end_at": end.isoformat(), **extra}
+
+
+# ---------------------------------------------------------------------------
+# merge_busy_intervals
+# ---------------------------------------------------------------------------
+
+
+def test_overlapping_and_touching_events_merge():
+    busy = merge_busy_intervals([
+        event(at(9), at(10)),
+        event(at(9, 30), at(11)),
+        event(at(11), at(12)),
+        event(at(14), at(15)),
+    ])
+    assert busy == [(at(9), at(12)), (at(14), at(15))]
+
+
+def test_unsorted_input_and_nested_events():
+    busy = merge_busy_intervals([event(at(13), at(14)), event(at(8), at(18)), event(at(9), at(10))])
+    assert busy == [(at(8), at(18))]
+
+
+def test_transparent_events_do_not_block():
+    busy = merge_busy_intervals([event(at(9), at(10), transparency="transparent"), event(at(12), at(13))])
+    assert busy == [(at(12), at(13))]
+
+
+def test_all_day_event_blocks_whole_day():
+    busy = merge_busy_intervals([event(DAY_START, DAY_END, all_day=True), event(at(9), at(10))])
+    assert busy == [(DAY_START, DAY_END)]
+
+
+# ---------------------------------------------------------------------------
+# free_intervals
+# ---------------------------------------------------------------------------
+
+
+def test_free_intervals_fill_gaps_and_edges():
+    busy = [(at(9), at(12)), (at(14), at(15))]
+    slots = free_intervals(busy, at(8), at(17), timedelta(minutes=30))
+    assert slots == [(at(8), at(9)), (at(12), at(14)), (at(15), at(17))]
+
+
+def test_free_intervals_drop_short_gaps():
+    busy = [(at(9), at(10)), (at(10, 10), at(11))]
+    slots = free_intervals(busy, at(9), at(12), timedelta(minutes=15))
+    assert slots == [(at(11), at(12))]
+
+
+def test_busy_outside_window_is_ignored_and_overhang_is_clipped():
+    busy = [(at(6), at(9, 30)), (at(16), at(20))]
+    slots = free_intervals(busy, at(9), at(17), timedelta(minutes=1))
+    assert slots == [(at(9, 30), at(16))]
+
+
+def test_empty_calendar_is_one_free_slot():
+    assert free_intervals([], at(9), at(17), timedelta(minutes=15)) == [(at(9), at(17))]
+
+
+# ---------------------------------------------------------------------------
+# cache
+# ---------------------------------------------------------------------------
+
+
+def test_busy_cache_hits_until_invalidated():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [event(at(9), at(10))]
+
+    day = date(2026, 3, 2)
+    free_slots.invalidate_user("cache-user")
+    first = free_slots.cached_busy_intervals("cache-user", day, load)
+    second = free_slots.cached_busy_intervals("cache-user", day, load)
+    assert first == second == [(at(9), at(10))]
+    assert len(loads) == 1
+
+    free_slots.invalidate_user("cache-user")
+    free_slots.cached_busy_intervals("cache-user", day, load)
+    assert len(loads) == 2
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    day = date(2026, 3, 2)
+
+    def load_then_sync():
+        free_slots.invalidate_user("race-user")
+        return []
+
+    free_slots.cached_busy_intervals("race-user", day, load_then_sync)
+    loads = []
+    free_slots.cached_busy_intervals("race-user", day, lambda: loads.append(1) or [])
+    assert loads == [1]
+    assert "race-user" not in free_slots._generations
+
+
+def test_invalidating_idle_users_keeps_no_state():
+    for n in range(100):
+        free_slots.invalidate_user(f"idle-user-{n}")
+    assert free_slots._generations == {} and free_slots._loads_in_flight == {}
@@ -0,0 +1,89 @@
+"""
+Tests for the Google HTTP calls in app.services.google_oauth.
+
+Requests are routed to an `httpx.MockTransport` through the shared client in
+app.core.http, so no network access is needed.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http import create_http_client, get_http_client, set_http_client
+from app.services.google_oauth import (
+    GOOGLE_TOKEN_URL,
+    GOOGLE_USERINFO_URL,
+    exchange_google_code,
+    fetch_google_userinfo,
+    refresh_google_access_token,
+)
+
+
+@pytest.fixture
+def google_requests():
+    """Install a mock Google on the shared client and yield the list of requests it saw."""
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if str(request.url) == GOOGLE_TOKEN_URL:
+            return httpx.Response(200, json={"access_token": "access-123", "expires_in": 3599})
+        if str(request.url) == GOOGLE_USERINFO_URL:
+            return httpx.Response(200, json={"sub": "g-1", "email": "me@example.com"})
+        return httpx.Response(404)
+
+    client = create_http_client(transport=httpx.MockTransport(handler))
+    set_http_client(client)
+    yield seen
+    asyncio.run(client.aclose())
+    set_http_client(None)
+
+
+def test_exchange_code_posts_authorization_code_grant(google_requests):
+    payload = asyncio.run(exchange_google_code(code="abc"))
+    assert payload["access_token"] == "access-123"
+    (request,) = google_requests
+    assert request.method == "POST"
+    assert b"grant_type=authorization_code" in request.content
+    assert b"code=abc" in request.content
+
+
+def test_refresh_posts_refresh_token_grant(google_requests):
+    asyncio.run(refresh_google_access_token(refresh_token="r-1"))
+    (request,) = google_requests
+    assert b"grant_type=refresh_token" in request.content
+    assert b"refresh_token=r-1" in request.content
+
+
+def test_userinfo_sends_bearer_token(google_requests):
+    profile = asyncio.run(fetch_google_userinfo(access_token="access-123"))
+    assert profile["email"] == "me@example.com"
+    (request,) = google_requests
+    assert request.headers["Authorization"] == "Bearer access-123"
+
+
+def test_calls_share_one_client(google_requests):
+    client = get_http_client()
+
+    async def callback_flow():
+        tokens = await exchange_google_code(code="abc")
+        await fetch_google_userinfo(access_token=tokens["access_token"])
+
+    asyncio.run(callback_flow())
+    assert get_http_client() is client
+    assert len(google_requests) == 2
+
+
+def test_http_error_is_raised():
+    def failing(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"error": "invalid_grant"})
+
+    client = create_http_client(transport=httpx.MockTransport(failing))
+    set_http_client(client)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(refresh_google_access_token(refresh_token="bad"))
+    finally:
+        asyncio.run(client.aclose())
+        set_http_client(None)
@@ -0,0 +1,141 @@
+"""
+Tests for app.services.google_tokens.GoogleTokenManager.
+
+The Google refresh call is replaced by a counting fake and time by a manual clock,
+so caching windows and single-flight behaviour can be checked deterministically.
+"""
+
+import asyncio
+import gc
+
+import pytest
+
+from app.services.google_tokens import GoogleTokenManager
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRefresh:
+    def __init__(self, *, delay: float = 0.0, fail: bool = False) -> None:
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self, *, refresh_token: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("google down")
+        return {"access_token": f"token-{self.calls}", "expires_in": 3600}
+
+
+def make_manager(refresh: FakeRefresh, clock: FakeClock) -> GoogleTokenManager:
+    return GoogleTokenManager(refresh=refresh, clock=clock, expiry_skew_seconds=60, refresh_ahead_seconds=300)
+
+
+def test_first_call_refreshes_then_caches():
+    refresh, clock = FakeRefresh(), FakeClock()
+    manager = make_manager(refresh, clock)
+
+    async def scenario():
+        first = await manager.get_access_token("acct", refresh_token="r")
+        second = await manager.get_access_token("acct", refresh_token="r")
+        return first, second
+
+    assert asyncio.run(scenario()) == ("token-1", "token-1")
+    assert refresh.calls == 1
+
+
+def test_concurrent_callers_share_one_refresh():
+    refresh, clock = FakeRefresh(delay=0.01), FakeClock()
+    manager = make_manager(refresh, clock)
+
+    async def scenario():
+        return await asyncio.gather(*(manager.get_access_token("acct", refresh_token="r") for _ in range(20)))
+
+    assert set(asyncio.run(scenario())) == {"token-1"}
+    assert refresh.calls == 1
+
+
+def test_accounts_refresh_independently():
+    refresh, clock = FakeRefresh(), FakeClock()
+    manager = make_manager(refresh, clock)
+
+    async def scenario():
+        await manager.get_access_token("a", refresh_token="r")
+        await manager.get_access_token("b", refresh_token="r")
+
+    asyncio.run(scenario())
+    assert refresh.calls == 2
+
+
+def test_token_inside_skew_is_refreshed_before_returning():
+    refresh, clock = FakeRefresh(), FakeClock()
+    manager = make_manager(refresh, clock)
+    manager.prime("acct", {"access_token": "primed", "expires_in": 3600})
+    clock.now += 3600 - 30
+
+    token = asyncio.run(manager.get_access_token("acct", refresh_token="r"))
+    assert token == "token-1"
+    assert refresh.calls == 1
+
+
+def test_token_in_refresh_ahead_window_is_served_while_refreshing_in_background():
+    refresh, clock = FakeRefresh(), FakeClock()
+    manager = make_manager(refresh, clock)
+    manager.prime("acct", {"access_token": "primed", "expires_in": 3600})
+    clock.now += 3600 - 120
+
+    async def scenario():
+        served = await manager.get_access_token("acct", refresh_token="r")
+        await asyncio.sleep(0)  # let the background refresh run
+        await asyncio.sleep(0)
+        return served, await manager.get_access_token("acct", refresh_token="r")
+
+    assert asyncio.run(scenario()) == ("primed", "token-1")
+    assert refresh.calls == 1
+
+
+def test_failed_background_refresh_leaves_no_unretrieved_exception():
+    refresh, clock = FakeRefresh(fail=True), FakeClock()
+    manager = make_manager(refresh, clock)
+    manager.prime("acct", {"access_token": "primed", "expires_in": 3600})
+    clock.now += 3600 - 120
+    unhandled: list[dict] = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        served = await manager.get_access_token("acct", refresh_token="r")
+        await asyncio.sleep(0.01)  # let the background refresh fail
+        gc.collect()
+        return served
+
+    assert asyncio.run(scenario()) == "primed"
+    assert refresh.calls == 1
+    assert unhandled == []
+
+
+def test_failed_refresh_propagates_and_is_retried_next_time():
+    refresh, clock = FakeRefresh(fail=True), FakeClock()
+    manager = make_manager(refresh, clock)
+
+    with pytest.raises(RuntimeError, match="google down"):
+        asyncio.run(manager.get_access_token("acct", refresh_token="r"))
+
+    refresh.fail = False
+    assert asyncio.run(manager.get_access_token("acct", refresh_token="r")) == "token-2"
+
+
+def test_invalidate_forces_refresh():
+    refresh, clock = FakeRefresh(), FakeClock()
+    manager = make_manager(refresh, clock)
+    manager.prime("acct", {"access_token": "primed", "expires_in": 3600})
+    manager.invalidate("acct")
+
+    assert asyncio.run(manager.get_access_token("acct", refresh_token="r")) == "token-1"
@@ -0,0 +1,174 @@
+"""
+Tests for app.services.log_buffer: durable enqueue, batched flushes and crash replay.
+
+Journals go to a temporary directory; maintenance_logs is the in-memory stand-in
+from benchmarks/fake_supabase.py.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repositories import supabase as supabase_repository
+from app.services import maintenance
+from app.services.log_buffer import MaintenanceLogBuffer
+from benchmarks import data
+from benchmarks.fake_supabase import FakeSupabase, use_fake_supabase
+
+USER = data.USER_ID
+NOW = datetime.now(timezone.utc)
+
+
+class FailingSupabase(FakeSupabase):
+    """Fails maintenance_logs writes while `down` is set."""
+
+    down = False
+
+    def table(self, name):
+        if name == "maintenance_logs" and self.down:
+            raise ConnectionError("database unavailable")
+        return super().table(name)
+
+
+@pytest.fixture
+def fake():
+    dos = [{"id": f"do-{i}", "user_id": USER, "do_type": "maintenance", "time_unit": "today"} for i in range(3)]
+    db = FailingSupabase({"dos": dos, "maintenance_logs": []})
+    with use_fake_supabase(db, supabase_repository):
+        yield db
+
+
+def _buffer(tmp_path, batch_size=100):
+    buffer = MaintenanceLogBuffer(tmp_path, batch_size=batch_size)
+    buffer.open()
+    return buffer
+
+
+def _journal_lines(tmp_path):
+    return sum(len(path.read_text().splitlines()) for path in tmp_path.glob("*.jsonl"))
+
+
+def test_taps_are_journaled_before_they_are_flushed(fake, tmp_path):
+    buffer = _buffer(tmp_path)
+    for _ in range(3):
+        buffer.enqueue("do-0", USER)
+
+    assert fake.tables["maintenance_logs"] == []
+    assert _journal_lines(tmp_path) == 3
+
+
+def test_flush_writes_batches_and_empties_the_journal(fake, tmp_path):
+    buffer = _buffer(tmp_path, batch_size=2)
+    for i in range(5):
+        buffer.enqueue(f"do-{i % 3}", USER)
+
+    assert buffer.flush() == 5
+    assert len(fake.tables["maintenance_logs"]) == 5
+    assert fake.calls.count(("maintenance_logs", "upsert")) == 3
+    assert buffer.pending() == 0
+    assert _journal_lines(tmp_path) == 0
+
+
+def test_counts_include_pending_taps(fake, tmp_path, monkeypatch):
+    buffer = _buffer(tmp_path)
+    monkeypatch.setattr(maintenance, "log_buffer", buffer)
+    buffer.enqueue("do-0", USER)
+    buffer.enqueue("do-0", USER, logged_at=NOW - timedelta(days=3))
+
+    assert maintenance.get_count(USER, "do-0", "today", NOW) == 1
+    buffer.flush()
+    assert maintenance.get_count(USER, "do-0", "today", NOW) == 1
+
+
+def test_a_failed_flush_keeps_taps_queued(fake, tmp_path):
+    buffer = _buffer(tmp_path)
+    buffer.enqueue("do-0", USER)
+    fake.down = True
+
+    with pytest.raises(ConnectionError):
+        buffer.flush()
+    assert buffer.pending() == 1
+
+    fake.down = False
+    assert buffer.flush() == 1
+
+
+def test_taps_for_deleted_dos_are_dropped(fake, tmp_path):
+    buffer = _buffer(tmp_path)
+    buffer.enqueue("do-0", USER)
+    buffer.enqueue("gone", USER)
+    original_upsert = MaintenanceLogBuffer._upsert
+
+    def upsert_with_fk(rows):
+        if any(row["do_id"] == "gone" for row in rows):
+            raise RuntimeError("violates foreign key constraint")
+        return original_upsert(rows)
+
+    buffer._upsert = upsert_with_fk
+    assert buffer.flush() == 1
+    assert [row["do_id"] for row in fake.tables["maintenance_logs"]] == ["do-0"]
+    assert buffer.pending() == 0
+
+
+def test_journal_of_a_crashed_process_is_replayed_once(fake, tmp_path):
+    crashed = _buffer(tmp_path)
+    crashed.enqueue("do-0", USER)
+    crashed.enqueue("do-1", USER)
+    # Simulate a crash: the lock is released without flushing or cleaning up.
+    crashed._journal.close()
+
+    restarted = _buffer(tmp_path)
+    assert restarted.pending() == 2
+    assert restarted.flush() == 2
+
+    # Replaying the same taps again (e.g. a crash between insert and compaction) adds nothing.
+    restarted._pending = list(crashed._pending)
+    restarted.flush()
+    assert len(fake.tables["maintenance_logs"]) == 2
+
+
+def test_a_live_journal_is_not_adopted(fake, tmp_path):
+    running = _buffer(tmp_path)
+    running.enqueue("do-0", USER)
+
+    other = _buffer(tmp_path)
+    assert other.pending() == 0
+    assert running.pending() == 1
+
+
+def test_close_flushes_and_removes_the_journal(fake, tmp_path):
+    buffer = _buffer(tmp_path)
+    buffer.enqueue("do-0", USER)
+    buffer.close()
+
+    assert len(fake.tables["maintenance_logs"]) == 1
+    assert list(tmp_path.glob("*.jsonl")) == []
+
+
+def test_close_keeps_the_journal_when_the_flush_fails(fake, tmp_path):
+    buffer = _buffer(tmp_path)
+    buffer.enqueue("do-0", USER)
+    fake.down = True
+    buffer.close()
+
+    fake.down = False
+    assert _buffer(tmp_path).flush() == 1
+
+
+def test_a_full_batch_wakes_the_flusher(fake, tmp_path):
+    buffer = _buffer(tmp_path, batch_size=3)
+
+    async def scenario():
+        flusher = asyncio.create_task(buffer.run_flusher(interval_seconds=60))
+        await asyncio.sleep(0)
+        for _ in range(3):
+            buffer.enqueue("do-0", USER)
+        for _ in range(100):
+            if fake.tables["maintenance_logs"]:
+                break
+            await asyncio.sleep(0.01)
+        flusher.cancel()
+
+    asyncio.run(scenario())
+    assert len(fake.tables["maintenance_logs"]) == 3
@@ -0,0 +1,117 @@
+"""
+Tests for app.core.metrics and the metrics middleware.
+
+A throwaway FastAPI app stands in for the API so the middleware can be exercised
+without Supabase; database calls are simulated with `record_db_call`.
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import Registry, describe_supabase_request, record_db_call, registry, timed
+from app.middleware.metrics import MetricsMiddleware
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: str):
+        record_db_call("dos", "select", 0.002)
+        with timed("compute"):
+            record_db_call("maintenance_logs", "select", 0.001)
+        return {"id": item_id}
+
+    return app
+
+
+# ---------------------------------------------------------------------------
+# describe_supabase_request
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "method,url,headers,expected",
+    [
+        ("GET", "https://x.supabase.co/rest/v1/dos?select=*", {}, ("dos", "select")),
+        ("PATCH", "https://x.supabase.co/rest/v1/dos?id=eq.1", {}, ("dos", "update")),
+        ("DELETE", "https://x.supabase.co/rest/v1/dos?id=eq.1", {}, ("dos", "delete")),
+        ("POST", "https://x.supabase.co/rest/v1/maintenance_logs", {}, ("maintenance_logs", "insert")),
+        ("POST", "https://x.supabase.co/rest/v1/dos", {"Prefer": "resolution=merge-duplicates"}, ("dos", "upsert")),
+        ("POST", "https://x.supabase.co/rest/v1/rpc/dos_board_page", {}, ("dos_board_page", "rpc")),
+        ("GET", "https://x.supabase.co/auth/v1/user", {}, ("auth", "user")),
+    ],
+)
+def test_describe_supabase_request(method, url, headers, expected):
+    assert describe_supabase_request(httpx.Request(method, url, headers=headers)) == expected
+
+
+# ---------------------------------------------------------------------------
+# Registry rendering
+# ---------------------------------------------------------------------------
+
+
+def test_render_counter_and_histogram():
+    reg = Registry()
+    reg.inc("flowdo_cache_requests_total", cache="free_slots_busy", result="hit")
+    reg.inc("flowdo_cache_requests_total", cache="free_slots_busy", result="hit")
+    reg.observe("flowdo_phase_duration_seconds", 0.02, phase="fetch")
+    text = reg.render()
+
+    assert "# TYPE flowdo_cache_requests_total counter" in text
+    assert 'flowdo_cache_requests_total{cache="free_slots_busy",result="hit"} 2' in text
+    assert "# TYPE flowdo_phase_duration_seconds histogram" in text
+    assert 'flowdo_phase_duration_seconds_bucket{phase="fetch",le="0.01"} 0' in text
+    assert 'flowdo_phase_duration_seconds_bucket{phase="fetch",le="0.025"} 1' in text
+    assert 'flowdo_phase_duration_seconds_bucket{phase="fetch",le="+Inf"} 1' in text
+    assert 'flowdo_phase_duration_seconds_count{phase="fetch"} 1' in text
+
+
+def test_label_values_are_escaped():
+    reg = Registry()
+    reg.inc("c", path='a"b')
+    assert 'c{path="a\\"b"} 1' in reg.render()
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+
+def test_server_timing_reports_db_calls_and_phases(enabled):
+    response = TestClient(make_app()).get("/items/abc")
+    server_timing = response.headers["server-timing"]
+    assert 'db;dur=3.0;desc="2 calls"' in server_timing
+    assert "compute;dur=" in server_timing
+    assert "total;dur=" in server_timing
+
+
+def test_request_latency_is_labelled_by_route_template(enabled):
+    TestClient(make_app()).get("/items/abc")
+    text = registry.render()
+    assert 'flowdo_http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 1' in text
+    assert 'flowdo_db_calls_per_request_bucket{route="/items/{item_id}",le="2"} 1' in text
+    assert 'flowdo_db_call_duration_seconds_count{operation="select",table="dos"} 1' in text
+
+
+def test_recording_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    registry.reset()
+    record_db_call("dos", "select", 0.1)
+    metrics.count_cache("free_slots_busy", hit=True)
+    with timed("compute"):
+        pass
+    assert registry.render() == "\n"
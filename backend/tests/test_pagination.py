@@ -0,0 +1,50 @@
+"""Tests for app.services.pagination cursor helpers."""
+
+import pytest
+
+from app.services.pagination import decode_cursor, encode_cursor, split_page
+
+ROW_ID = "6f1c1a3e-0d4b-4b0e-9a57-2f4d1c9b8e10"
+
+
+def make_row(n: int) -> dict:
+    return {
+        "id": f"00000000-0000-0000-0000-{n:012d}",
+        "created_at": f"2026-03-01T00:00:{n:02d}+00:00",
+    }
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"id": ROW_ID, "created_at": "2026-03-01T12:30:00.123456+00:00"})
+    assert decode_cursor(cursor) == ("2026-03-01T12:30:00.123456+00:00", ROW_ID)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor({"id": ROW_ID, "created_at": "2026-03-01T12:30:00+00:00"})
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30"])
+def test_decode_rejects_garbage(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_decode_rejects_non_uuid_id():
+    cursor = encode_cursor({"id": "x),user_id.neq.0", "created_at": "2026-03-01T00:00:00+00:00"})
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_split_page_without_lookahead_row_has_no_cursor():
+    rows = [make_row(i) for i in range(3)]
+    page, cursor = split_page(rows, limit=3)
+    assert page == rows
+    assert cursor is None
+
+
+def test_split_page_trims_lookahead_row_and_points_at_last_kept():
+    rows = [make_row(i) for i in range(4)]
+    page, cursor = split_page(rows, limit=3)
+    assert page == rows[:3]
+    assert decode_cursor(cursor) == (rows[2]["created_at"], rows[2]["id"])
@@ -0,0 +1,105 @@
+"""
+Tests for app.core.profiling and the profiling middleware.
+"""
+
+import asyncio
+import pstats
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import profiled, should_profile
+from app.middleware.profiling import ProfilingMiddleware
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILE_SECRET", "")
+    monkeypatch.setattr(settings, "CRON_SECRET", "s3cret")
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    return tmp_path
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": sum(range(1000))}
+
+    return TestClient(app)
+
+
+def test_request_without_header_is_not_profiled(profile_dir):
+    response = make_client().get("/ping")
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_wrong_secret_is_not_profiled(profile_dir):
+    response = make_client().get("/ping", headers={"X-Profile": "nope"})
+    assert "x-profile-id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_admin_header_writes_pstats_named_by_profile_id(profile_dir):
+    response = make_client().get("/ping", headers={"X-Profile": "s3cret"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    [path] = list(profile_dir.iterdir())
+    assert path.name.endswith(f"-GET-ping-{profile_id}.pstats")
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+def test_profile_secret_takes_precedence_over_cron_secret(profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SECRET", "admin")
+    assert should_profile("admin")
+    assert not should_profile("s3cret")
+
+
+def test_sampling_rate(profile_dir, monkeypatch):
+    assert not should_profile(None)
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+    assert should_profile(None)
+
+
+def test_profiled_block_writes_stats(profile_dir):
+    with profiled("flow_up") as profile_id:
+        sorted(range(100), reverse=True)
+    [path] = list(profile_dir.iterdir())
+    assert path.name.endswith(f"-flow_up-{profile_id}.pstats")
+
+
+def test_overlapping_profiled_requests_profile_only_one(profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    both_inside = asyncio.Event()
+    inside = 0
+
+    @app.get("/slow")
+    async def slow():
+        nonlocal inside
+        inside += 1
+        if inside == 2:
+            both_inside.set()
+        await asyncio.wait_for(both_inside.wait(), timeout=5)
+        return {"ok": True}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(client.get("/slow"), client.get("/slow"))
+
+    responses = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200, 200]
+    assert sum("x-profile-id" in r.headers for r in responses) == 1
+    assert len(list(profile_dir.iterdir())) == 1
+    # The profiler is free again afterwards.
+    assert "x-profile-id" in make_client().get("/ping").headers
@@ -0,0 +1,71 @@
+"""
+Query-plan checks against a local Postgres (see benchmarks/query_plans.py).
+
+The plan-walking helpers are tested on hand-written plans. The checks of the real
+queries are skipped unless psycopg is installed and FLOWDO_PLAN_DATABASE_URL points
+at a database with the migrations applied, e.g. the one from `supabase start`.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.query_plans import (
+    DATABASE_URL_ENV,
+    QUERIES,
+    check_plans,
+    partition_fanout,
+    sequential_scans,
+)
+
+
+def test_sequential_scans_walks_nested_plans():
+    plan = {
+        "Node Type": "Nested Loop",
+        "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "dos"},
+            {"Node Type": "Seq Scan", "Relation Name": "maintenance_logs"},
+            {"Node Type": "Seq Scan", "Relation Name": "plan_users"},
+        ],
+    }
+    assert sequential_scans(plan) == ["maintenance_logs"]
+
+
+def test_partitions_count_as_their_table():
+    plan = {
+        "Node Type": "Append",
+        "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "dos_p03"},
+            {"Node Type": "Seq Scan", "Relation Name": "dos_p07"},
+            {"Node Type": "Index Scan", "Relation Name": "maintenance_logs_p03"},
+        ],
+    }
+    assert sequential_scans(plan) == ["dos"]
+    assert partition_fanout(plan) == ["dos (2 partitions)"]
+
+
+def test_an_update_pruned_to_one_partition_does_not_fan_out():
+    plan = {
+        "Node Type": "ModifyTable",
+        "Operation": "Update",
+        "Relation Name": "dos",
+        "Plans": [{"Node Type": "Index Scan", "Relation Name": "dos_p13"}],
+    }
+    assert partition_fanout(plan) == []
+    assert sequential_scans(plan) == []
+
+
+@pytest.fixture(scope="module")
+def plan_results():
+    url = os.environ.get(DATABASE_URL_ENV)
+    if not url:
+        pytest.skip(f"{DATABASE_URL_ENV} not set")
+    psycopg = pytest.importorskip("psycopg")
+
+    with psycopg.connect(url) as conn:
+        return check_plans(conn)
+
+
+@pytest.mark.parametrize("name", [q.name for q in QUERIES])
+def test_query_avoids_sequential_scans_and_stays_in_one_partition(plan_results, name):
+    assert plan_results[name] == []
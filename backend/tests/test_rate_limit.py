@@ -0,0 +1,169 @@
+"""
+Tests for app.core.rate_limit, app.core.admission and the rate-limit middleware.
+
+A throwaway FastAPI app stands in for the API; no Supabase calls are made.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import rate_limit
+from app.core.admission import DatabaseOverloaded, admission_applies, db_admission
+from app.core.config import settings
+from app.core.rate_limit import InMemoryBackend, RateLimit, caller_key, limit_for, parse_limit
+from app.core.verified_tokens import remember, token_key
+from app.middleware.rate_limit import RateLimitMiddleware
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "DB_ADMISSION_ENABLED", True)
+    monkeypatch.setattr(
+        settings,
+        "RATE_LIMITS",
+        {"default": "1:2", "/internal": "off", "/health": "off", "/dos/search": "1:5"},
+    )
+    backend = InMemoryBackend(clock=Clock())
+    monkeypatch.setattr(rate_limit, "get_backend", lambda: backend)
+    db_admission.reset()
+    yield backend
+    db_admission.reset()
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+
+    @app.get("/api/v1/dos")
+    def list_dos():
+        return {"admission": admission_applies.get()}
+
+    @app.get("/api/v1/dos/search")
+    def search():
+        return {}
+
+    @app.post("/api/v1/internal/flow-up")
+    def flow_up():
+        return {"admission": admission_applies.get()}
+
+    @app.get("/api/v1/health")
+    def health():
+        return {}
+
+    return app
+
+
+def test_parse_limit():
+    assert parse_limit("2.5:10") == RateLimit(rate=2.5, burst=10)
+    assert parse_limit("off") is None
+    with pytest.raises(ValueError):
+        parse_limit("fast")
+    with pytest.raises(ValueError):
+        parse_limit("0:5")
+
+
+def test_longest_prefix_wins(limits):
+    assert limit_for("/api/v1/dos/search") == ("/dos/search", RateLimit(1, 5))
+    assert limit_for("/api/v1/dos/123") == ("default", RateLimit(1, 2))
+    assert limit_for("/api/v1/internal/flow-up") is None
+    assert limit_for("/api/v1/healthz") == ("default", RateLimit(1, 2))
+    assert limit_for("/metrics") is None
+
+
+def test_bucket_refills_at_the_configured_rate():
+    clock = Clock()
+    backend = InMemoryBackend(clock=clock)
+    limit = RateLimit(rate=2, burst=2)
+
+    async def takes():
+        return [await backend.take("k", limit) for _ in range(3)]
+
+    assert asyncio.run(takes()) == [0.0, 0.0, 0.5]
+    clock.now += 0.5
+    assert asyncio.run(backend.take("k", limit)) == 0.0
+
+
+def test_only_verified_tokens_are_keyed_by_user():
+    assert caller_key("Bearer unverified", "10.0.0.1") == f"token:{token_key('unverified')}"
+    remember("good-token", {"sub": "user-1", "email": None})
+    assert caller_key("Bearer good-token", "10.0.0.1") == "user:user-1"
+    assert caller_key(None, "10.0.0.1") == "addr:10.0.0.1"
+    assert caller_key(None, None) == "addr:unknown"
+
+
+def test_unverified_tokens_behind_one_address_get_their_own_buckets(limits):
+    client = TestClient(make_app())
+    responses = [
+        client.get("/api/v1/dos", headers={"Authorization": f"Bearer unverified-{i}"}) for i in range(30)
+    ]
+    assert [r.status_code for r in responses] == [200] * 30
+
+
+def test_empty_bucket_answers_429_with_retry_after(limits):
+    client = TestClient(make_app())
+    remember("t1", {"sub": "user-1", "email": None})
+    headers = {"Authorization": "Bearer t1"}
+
+    assert [client.get("/api/v1/dos", headers=headers).status_code for _ in range(2)] == [200, 200]
+    limited = client.get("/api/v1/dos", headers=headers)
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "1"
+
+    # Another user has their own bucket.
+    remember("t2", {"sub": "user-2", "email": None})
+    assert client.get("/api/v1/dos", headers={"Authorization": "Bearer t2"}).status_code == 200
+
+
+def test_exempt_groups_are_never_throttled(limits):
+    client = TestClient(make_app())
+    statuses = {client.post("/api/v1/internal/flow-up").status_code for _ in range(10)}
+    statuses |= {client.get("/api/v1/health").status_code for _ in range(10)}
+    assert statuses == {200}
+    assert client.post("/api/v1/internal/flow-up").json() == {"admission": False}
+
+
+def test_limited_requests_are_subject_to_admission(limits):
+    assert TestClient(make_app()).get("/api/v1/dos").json() == {"admission": True}
+
+
+def test_slow_and_busy_database_sheds_with_503(limits, monkeypatch):
+    monkeypatch.setattr(settings, "DB_MAX_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "DB_SHED_LATENCY_MS", 100)
+    db_admission._latency = 1.5
+    db_admission._in_flight = 1
+
+    response = TestClient(make_app()).get("/api/v1/dos")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_calls_beyond_the_concurrency_limit_are_refused(limits, monkeypatch):
+    monkeypatch.setattr(settings, "DB_MAX_CONCURRENCY", 2)
+    token = admission_applies.set(True)
+    try:
+        with db_admission.call(), db_admission.call():
+            with pytest.raises(DatabaseOverloaded):
+                with db_admission.call():
+                    pass
+        with db_admission.call():
+            pass
+    finally:
+        admission_applies.reset(token)
+
+
+def test_background_calls_are_never_refused(limits, monkeypatch):
+    monkeypatch.setattr(settings, "DB_MAX_CONCURRENCY", 1)
+    with db_admission.call(), db_admission.call():
+        pass
@@ -0,0 +1,180 @@
+"""
+Tests for app.core.read_routing and the Supabase repository's use of it.
+
+The primary and the replica are two in-memory stand-ins from
+benchmarks/fake_supabase.py holding copies of the same rows, so which one answered
+a read shows in the result.
+"""
+
+import copy
+
+import pytest
+
+import app.core.supabase as supabase_module
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.read_routing import PRIMARY, REPLICA, ReadRouter
+from app.repositories import supabase as supabase_repository
+from app.repositories import use_repository
+from app.repositories.supabase import SupabaseRepository
+from app.services import flow_up
+from benchmarks import data
+from benchmarks.fake_supabase import FakeSupabase
+
+USER = data.USER_ID
+OTHER_USER = "00000000-0000-4000-8000-000000000002"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def router(monkeypatch, clock):
+    monkeypatch.setattr(settings, "SUPABASE_READ_URL", "http://replica.localhost")
+    monkeypatch.setattr(settings, "REPLICA_PIN_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "REPLICA_MAX_LAG_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_SECONDS", 5.0)
+    router = ReadRouter(clock=clock)
+    router.record_lag(0.5)
+    monkeypatch.setattr(supabase_repository, "read_router", router)
+    return router
+
+
+@pytest.fixture
+def dbs(monkeypatch):
+    dos = data.make_dos(6)
+    primary = FakeSupabase({"dos": dos, "maintenance_logs": []})
+    replica = FakeSupabase({"dos": copy.deepcopy(dos), "maintenance_logs": []})
+    for row in replica.tables["dos"]:
+        row["title"] = "from replica"
+    monkeypatch.setattr(supabase_repository, "supabase", primary)
+    monkeypatch.setattr(supabase_repository, "read_supabase", replica)
+    return primary, replica
+
+
+def titles(rows):
+    return {row["title"] for row in rows}
+
+
+def test_everything_reads_from_the_primary_without_a_replica(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_READ_URL", "")
+    router = ReadRouter()
+    router.record_lag(0.0)
+    router.pin(USER)
+    assert router.target(USER) == PRIMARY
+    assert router.target(None) == PRIMARY
+    assert router.status() == {"configured": False, "lag_seconds": 0.0, "healthy": True}
+
+
+def test_a_write_pins_its_user_to_the_primary_until_the_pin_expires(router, dbs, clock):
+    repo = SupabaseRepository()
+    assert titles(repo.list_dos_page(USER, limit=10)) == {"from replica"}
+
+    repo.insert_do({"user_id": USER, "title": "new", "time_unit": "today"})
+
+    assert "new" in titles(repo.list_dos_page(USER, limit=10))
+    assert router.target(OTHER_USER) == REPLICA
+    clock.now += 5.1
+    assert router.target(USER) == REPLICA
+
+
+def test_the_pin_lasts_at_least_as_long_as_the_lag(router, clock):
+    router.record_lag(8.0)
+    router.pin(USER)
+    clock.now += 7.0
+    assert router.target(USER) == PRIMARY
+    clock.now += 1.1
+    assert router.target(USER) == REPLICA
+
+
+@pytest.mark.parametrize("lag", [None, 10.5])
+def test_unknown_or_excessive_lag_sends_reads_to_the_primary(router, lag):
+    router.record_lag(lag)
+    assert router.target(USER) == PRIMARY
+    assert not router.replica_healthy()
+
+
+def test_an_old_lag_reading_counts_as_unknown(router, clock):
+    clock.now += 3 * settings.REPLICA_LAG_CHECK_SECONDS + 1
+    assert router.lag() is None
+    assert router.target(USER) == PRIMARY
+
+
+def test_flow_up_scans_the_replica_only_while_it_is_healthy_and_its_writes_pin_everyone(router, dbs):
+    repo = SupabaseRepository()
+    assert titles(repo.flow_up_candidates()) == {"from replica"}
+    router.record_lag(None)
+    assert "from replica" not in titles(repo.flow_up_candidates())
+
+    router.record_lag(0.5)
+    repo.apply_flow_up([])
+    assert router.target(OTHER_USER) == PRIMARY
+
+
+def test_flow_up_from_a_lagging_replica_neither_reverts_edits_nor_revives_deleted_dos(router, dbs):
+    primary, replica = dbs
+    deleted, edited, untouched = primary.tables["dos"][:3]
+    for row in (deleted, edited, untouched):
+        row["time_unit"] = "today"
+        next(r for r in replica.tables["dos"] if r["id"] == row["id"]).update(time_unit="today")
+    primary.tables["dos"].remove(deleted)
+    edited.update(title="renamed", time_unit="month", updated_at="2026-02-10T12:00:00+00:00")
+    repo = SupabaseRepository()
+
+    with use_repository(repo):
+        summary = flow_up.run_flow_up()
+
+    by_id = {row["id"]: row for row in primary.tables["dos"]}
+    assert deleted["id"] not in by_id
+    assert (by_id[edited["id"]]["title"], by_id[edited["id"]]["time_unit"]) == ("renamed", "month")
+    assert by_id[untouched["id"]]["time_unit"] == "week"
+    assert by_id[untouched["id"]]["title"] != "from replica"
+    assert {row["do_id"] for row in primary.tables["do_transitions"]} <= set(by_id)
+    assert summary["today_to_week"] == len(primary.tables["do_transitions"])
+
+
+def test_batched_log_taps_pin_each_user_in_the_batch(router, dbs):
+    rows = [{"id": f"log-{i}", "do_id": f"do-{i}", "user_id": user} for i, user in enumerate([USER, OTHER_USER])]
+    SupabaseRepository().add_maintenance_logs(rows)
+    assert router.target(USER) == router.target(OTHER_USER) == PRIMARY
+
+
+class LagReplica:
+    def __init__(self, answer):
+        self.answer = answer
+
+    def rpc(self, name, params):
+        assert name == "replica_lag_seconds"
+        return self
+
+    def execute(self):
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return type("Response", (), {"data": self.answer})()
+
+
+def test_lag_checks_are_recorded_and_exported(router, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    registry.reset()
+    monkeypatch.setattr(supabase_module, "read_supabase", LagReplica(2.5))
+    assert router.check_lag() == 2.5
+    assert router.status() == {"configured": True, "lag_seconds": 2.5, "healthy": True}
+    router.target(USER)
+    rendered = registry.render()
+    assert "flowdo_replica_lag_seconds 2.5" in rendered
+    assert 'flowdo_db_reads_total{target="replica"} 1' in rendered
+
+    monkeypatch.setattr(supabase_module, "read_supabase", LagReplica(ConnectionError("down")))
+    assert router.check_lag() is None
+    assert router.target(USER) == PRIMARY
+    registry.reset()
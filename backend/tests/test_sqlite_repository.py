@@ -0,0 +1,344 @@
+"""
+Tests for app.repositories.sqlite, and for the services running on it.
+
+Each test gets a fresh database file under tmp_path, installed as the app's
+repository with `use_repository`, so services run unchanged against a real engine.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import dos as dos_endpoints
+from app.middleware.auth import get_current_user
+from app.repositories import use_repository
+from app.repositories.sqlite import SCHEMA, SqliteRepository
+from app.schemas.dos import MAX_TAGS_PER_DO
+from app.services import flow_up, lineage_colors
+from app.services.ancestry import LineageCycleError, check_new_parent, list_ancestors, list_descendants
+from app.services.archive import list_archived_dos, restore_archived_do, run_archive
+from app.services.flow_history import do_history, flow_analytics
+from app.services.maintenance import get_count, inject_counts
+from app.services.pagination import split_page
+from app.services.search import expand_lineage, search_dos
+from benchmarks import data
+
+USER = data.USER_ID
+OTHER_USER = "00000000-0000-4000-8000-000000000002"
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SqliteRepository(tmp_path / "flowdo.db")
+    with use_repository(repo):
+        yield repo
+    repo.close()
+
+
+def new_do(repo, title="Do", **values):
+    return repo.insert_do({"user_id": USER, "title": title, "time_unit": "today", **values})
+
+
+def test_database_runs_in_wal_mode(repo):
+    assert repo._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_insert_returns_the_stored_row(repo):
+    do = new_do(repo, do_type="maintenance")
+    assert do["completed"] is False and do["flow_count"] == 0 and do["ancestor_ids"] == []
+    assert repo.get_do(USER, do["id"]) == do
+    assert repo.get_do(OTHER_USER, do["id"]) is None
+    assert repo.get_do(USER, do["id"], "id,color_hex") == {"id": do["id"], "color_hex": None}
+
+
+def test_pages_follow_the_keyset_cursor(repo):
+    repo.load(data.make_dos(25))
+    seen, cursor = [], None
+    while True:
+        page, cursor = split_page(repo.list_dos_page(USER, cursor=cursor, limit=10), 10)
+        seen += page
+        if cursor is None:
+            break
+    assert [d["id"] for d in seen] == [d["id"] for d in data.make_dos(25)]
+
+    week = repo.list_dos_page(USER, time_unit="week", completed=False, limit=100)
+    assert week and all(d["time_unit"] == "week" and d["completed"] is False for d in week)
+    with pytest.raises(ValueError):
+        repo.list_dos_page(USER, cursor="not-a-cursor", limit=10)
+
+
+def test_board_rows_and_counts(repo):
+    dos = data.make_dos(60)
+    repo.load(dos)
+    rows = repo.board_page(USER, ["today", "week"], 3)
+    assert [r["time_unit"] for r in rows] == ["today"] * 3 + ["week"] * 3
+    counts = {c["time_unit"]: c for c in repo.board_counts(USER, ["today", "week"])}
+    today = [d for d in dos if d["time_unit"] == "today"]
+    assert counts["today"]["total"] == len(today)
+    assert counts["today"]["completed"] == sum(d["completed"] for d in today)
+    assert counts["today"]["maintenance"] == sum(d["do_type"] == "maintenance" for d in today)
+
+
+def test_paths_follow_inserts_and_reparenting(repo):
+    root = new_do(repo, "root")
+    child = new_do(repo, "child", parent_id=root["id"])
+    grandchild = new_do(repo, "grandchild", parent_id=child["id"])
+    other = new_do(repo, "other")
+    assert grandchild["ancestor_ids"] == [root["id"], child["id"]]
+
+    repo.update_do(USER, child["id"], {"parent_id": other["id"]})
+
+    assert repo.get_do(USER, grandchild["id"])["ancestor_ids"] == [other["id"], child["id"]]
+    assert [d["id"] for d in list_descendants(USER, other["id"])] == [child["id"], grandchild["id"]]
+    assert list_descendants(USER, root["id"]) == []
+    assert [d["id"] for d in list_ancestors(USER, grandchild["id"])] == [child["id"], other["id"]]
+
+
+def test_cycles_are_refused(repo):
+    root = new_do(repo, "root")
+    child = new_do(repo, "child", parent_id=root["id"])
+    with pytest.raises(LineageCycleError):
+        check_new_parent(USER, root["id"], child["id"])
+    with pytest.raises(ValueError):
+        repo.update_do(USER, root["id"], {"parent_id": child["id"]})
+    assert repo.get_do(USER, root["id"])["parent_id"] is None
+
+
+def test_deleting_a_parent_makes_its_children_roots(repo):
+    root = new_do(repo, "root")
+    child = new_do(repo, "child", parent_id=root["id"], do_type="maintenance")
+    grandchild = new_do(repo, "grandchild", parent_id=child["id"])
+    repo.add_maintenance_log(child["id"], USER)
+
+    repo.delete_do(USER, child["id"])
+
+    assert repo.get_do(USER, grandchild["id"])["parent_id"] is None
+    assert repo.get_do(USER, grandchild["id"])["ancestor_ids"] == []
+    assert list_descendants(USER, root["id"]) == []
+    assert repo._conn().execute("SELECT count(*) FROM maintenance_logs").fetchone()[0] == 0
+
+
+def test_lineage_color_spreads_over_the_whole_tree_only(repo):
+    root = new_do(repo, "root")
+    child = new_do(repo, "child", parent_id=root["id"])
+    loner = new_do(repo, "loner")
+
+    lineage_colors.assign_color_to_lineage_chain(start_do_id=child["id"], user_id=USER, color_hex="#abcdef")
+
+    assert repo.get_do(USER, root["id"])["color_hex"] == "#abcdef"
+    assert repo.get_do(USER, child["id"])["color_hex"] == "#abcdef"
+    assert repo.get_do(USER, loner["id"])["color_hex"] is None
+
+
+def test_maintenance_counts_use_the_current_window(repo):
+    dos = data.make_dos(10, maintenance_ratio=1.0)
+    now = datetime.now(timezone.utc)
+    logs = [
+        {"id": "l1", "do_id": dos[0]["id"], "user_id": USER, "logged_at": now.isoformat()},
+        {"id": "l2", "do_id": dos[0]["id"], "user_id": USER, "logged_at": (now - timedelta(days=800)).isoformat()},
+    ]
+    repo.load(dos, logs)
+    # Replaying a tap already stored doesn't count it twice.
+    repo.add_maintenance_logs(logs[:1])
+
+    inject_counts(dos, now)
+    assert dos[0]["completion_count"] == 1
+    assert all(d["completion_count"] == 0 for d in dos[1:])
+    assert get_count(USER, dos[0]["id"], dos[0]["time_unit"], now) == 1
+
+
+def test_search_ranks_prefix_matches_first_and_escapes_wildcards(repo):
+    first = new_do(repo, "Water the plants")
+    prefix = new_do(repo, "plants: repot")
+    new_do(repo, "100% done")
+    assert [d["id"] for d in search_dos(USER, "PLANTS", limit=10, offset=0)] == [prefix["id"], first["id"]]
+    assert [d["title"] for d in search_dos(USER, "%", limit=10, offset=0)] == ["100% done"]
+
+
+def test_expand_lineage_returns_the_rest_of_the_tree(repo):
+    root = new_do(repo, "root")
+    child = new_do(repo, "child", parent_id=root["id"])
+    sibling = new_do(repo, "sibling", parent_id=root["id"])
+    new_do(repo, "loner")
+    related = expand_lineage(USER, [child])
+    assert [d["id"] for d in related] == [root["id"], sibling["id"]]
+
+
+def test_run_flow_up_moves_today_to_week(repo):
+    repo.load(data.make_dos(12))
+    summary = flow_up.run_flow_up()
+    assert summary["today_to_week"] == 2
+    assert repo.list_dos_page(USER, time_unit="today", limit=100) == []
+
+
+def test_flow_up_leaves_rows_changed_or_deleted_since_the_scan(repo):
+    kept, edited, deleted = new_do(repo, "kept"), new_do(repo, "edited"), new_do(repo, "deleted")
+    scanned = {row["id"]: row for row in repo.flow_up_candidates()}
+    repo.update_do(USER, edited["id"], {"title": "renamed", "time_unit": "month"})
+    repo.delete_do(USER, deleted["id"])
+
+    updates = [
+        {**row, "time_unit": "week", "flow_count": 1, "days_in_unit": 0,
+         "expected_time_unit": row["time_unit"], "expected_updated_at": row["updated_at"]}
+        for row in scanned.values()
+    ]
+    assert repo.apply_flow_up(updates) == {kept["id"]}
+    assert repo.get_do(USER, edited["id"])["time_unit"] == "month"
+    assert repo.get_do(USER, deleted["id"]) is None
+
+
+def test_transitions_roll_up_per_do_and_per_day(repo):
+    do = new_do(repo)
+    monday = datetime(2026, 2, 9, tzinfo=timezone.utc)
+    repo.append_transitions([
+        {"user_id": USER, "do_id": do["id"], "from_unit": "today", "to_unit": "week",
+         "days_in_unit": 0, "transitioned_at": monday - timedelta(days=1)},
+        {"user_id": USER, "do_id": do["id"], "from_unit": "week", "to_unit": "month",
+         "days_in_unit": 6, "transitioned_at": monday},
+        {"user_id": USER, "do_id": "another-do", "from_unit": "week", "to_unit": "month",
+         "days_in_unit": 2, "transitioned_at": monday},
+    ])
+    # Moved back to today by hand and flowed again a week later.
+    repo.append_transitions([
+        {"user_id": USER, "do_id": do["id"], "from_unit": "today", "to_unit": "week",
+         "days_in_unit": 1, "transitioned_at": monday + timedelta(days=7)},
+    ])
+
+    history = do_history(USER, repo.get_do(USER, do["id"]))
+    assert [(t["from_unit"], t["transitions"], t["days_in_unit"], t["last_days_in_unit"]) for t in history["transitions"]] == [
+        ("week", 1, 6, 6),
+        ("today", 2, 1, 1),
+    ]
+    assert repo.transition_summary(OTHER_USER, do["id"]) == []
+
+    analytics = flow_analytics(USER, monday.date(), monday.date() + timedelta(days=7))
+    assert [(d["day"], d["transitions"]) for d in analytics["days"]] == [("2026-02-09", 2)]
+    assert analytics["totals"] == [
+        {"from_unit": "week", "to_unit": "month", "transitions": 2, "days_in_unit": 8, "average_days_in_unit": 4.0},
+    ]
+
+
+def test_run_flow_up_appends_to_the_history(repo):
+    repo.load(data.make_dos(12))
+    moved = repo.list_dos_page(USER, time_unit="today", limit=100)
+    flow_up.run_flow_up()
+    history = do_history(USER, repo.get_do(USER, moved[0]["id"]))
+    assert [(t["from_unit"], t["to_unit"]) for t in history["transitions"]] == [("today", "week")]
+
+
+def test_tags_filter_and_count_in_the_database(repo):
+    both = new_do(repo, "both", tags=["errand", "home"])
+    home = new_do(repo, "home", tags=["home"])
+    new_do(repo, "untagged")
+    new_do(repo, "garden", tags=["home", "outside"])
+    repo.insert_do({"user_id": OTHER_USER, "title": "someone else's", "time_unit": "today", "tags": ["home"]})
+
+    def titles(tags, match_all=True):
+        return [d["title"] for d in repo.list_dos_page(USER, tags=tags, match_all=match_all, limit=10)]
+
+    assert titles(["errand", "home"]) == ["both"]
+    assert titles(["errand", "home"], match_all=False) == ["both", "home", "garden"]
+    assert repo.tag_counts(USER) == [
+        {"tag": "home", "count": 3}, {"tag": "errand", "count": 1}, {"tag": "outside", "count": 1},
+    ]
+
+    updated = repo.update_tags(USER, [both["id"], home["id"], "not-mine"], ["work"], ["home"], max_tags=20)
+    assert updated == {"updated": 2, "over_limit": 0}
+    assert repo.get_do(USER, both["id"])["tags"] == ["errand", "work"]
+    assert titles(["home"]) == ["garden"]
+
+    repo.update_do(USER, both["id"], {"tags": []})
+    assert titles(["work"]) == ["home"]
+
+
+def test_bulk_tag_updates_respect_the_per_do_limit(repo):
+    full = new_do(repo, "full", tags=[f"t{i:02}" for i in range(MAX_TAGS_PER_DO)])
+    roomy = new_do(repo, "roomy", tags=["home"])
+
+    result = repo.update_tags(USER, [full["id"], roomy["id"]], ["extra"], [], max_tags=MAX_TAGS_PER_DO)
+
+    assert result == {"updated": 1, "over_limit": 1}
+    assert len(repo.get_do(USER, full["id"])["tags"]) == MAX_TAGS_PER_DO
+    assert repo.get_do(USER, roomy["id"])["tags"] == ["extra", "home"]
+    # Swapping one tag for another keeps a full do at the limit, so it goes through.
+    assert repo.update_tags(USER, [full["id"]], ["extra"], ["t00"], max_tags=MAX_TAGS_PER_DO)["updated"] == 1
+
+
+def test_archiving_keeps_tags(repo):
+    do = new_do(repo, "done", tags=["errand"])
+    long_ago = (datetime.now(timezone.utc) - timedelta(days=90)).isoformat()
+    repo.update_do(USER, do["id"], {"completed": True, "completed_at": long_ago})
+    run_archive(older_than_days=30)
+    assert repo.tag_counts(USER) == []
+    restore_archived_do(USER, do["id"])
+    assert repo.list_dos_page(USER, tags=["errand"], limit=10)[0]["tags"] == ["errand"]
+
+
+def test_files_from_before_tags_get_the_column(tmp_path):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA.replace(",\n  tags             TEXT    NOT NULL DEFAULT '[]'", ""))
+        assert "tags" not in {row[1] for row in conn.execute("PRAGMA table_info(dos)")}
+    repo = SqliteRepository(path)
+    assert new_do(repo, "tagged", tags=["home"])["tags"] == ["home"]
+    repo.close()
+
+
+def test_archive_and_restore_round_trip(repo):
+    root = new_do(repo, "root")
+    child = new_do(repo, "child", parent_id=root["id"])
+    long_ago = (datetime.now(timezone.utc) - timedelta(days=90)).isoformat()
+    for do in (root, child):
+        repo.update_do(USER, do["id"], {"completed": True, "completed_at": long_ago})
+
+    # Leaves go first, then the parent they were holding back.
+    assert run_archive(older_than_days=30) == 2
+    archived, _ = list_archived_dos(USER, cursor=None, limit=10)
+    assert {d["id"] for d in archived} == {root["id"], child["id"]}
+
+    restored = restore_archived_do(USER, child["id"])
+    assert {d["id"] for d in restored} == {root["id"], child["id"]}
+    assert repo.get_do(USER, child["id"])["ancestor_ids"] == [root["id"]]
+    assert list_archived_dos(USER, cursor=None, limit=10)[0] == []
+    with pytest.raises(ValueError):
+        restore_archived_do(USER, child["id"])
+
+    # Still completed long ago, but the next archive run leaves restored dos alone.
+    assert run_archive(older_than_days=30) == 0
+    assert repo.get_do(USER, child["id"])["completed"] is True
+
+
+def test_restore_endpoint_accepts_any_spelling_of_the_id(repo):
+    do = new_do(repo, "done")
+    long_ago = (datetime.now(timezone.utc) - timedelta(days=90)).isoformat()
+    repo.update_do(USER, do["id"], {"completed": True, "completed_at": long_ago})
+    run_archive(older_than_days=30)
+    app = FastAPI()
+    app.include_router(dos_endpoints.router, prefix="/dos")
+    app.dependency_overrides[get_current_user] = lambda: {"sub": USER}
+    client = TestClient(app)
+
+    assert client.post("/dos/archive/not-a-uuid/restore").status_code == 404
+    response = client.post(f"/dos/archive/{do['id'].upper()}/restore")
+    assert response.status_code == 200 and response.json()["id"] == do["id"]
+
+
+def test_each_thread_reads_on_its_own_connection(repo):
+    repo.load(data.make_dos(50))
+    results, connections = [], set()
+
+    def read():
+        connections.add(id(repo._conn()))
+        results.append(len(repo.list_dos_page(USER, limit=100)))
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [50] * 4
+    assert len(connections) == 4
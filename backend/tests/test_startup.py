@@ -0,0 +1,39 @@
+"""
+Cold-start budget for importing the app.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter (see
+benchmarks/startup.py). Heavy optional packages must stay deferred. The import
+time budget is only checked when FLOWDO_IMPORT_BUDGET_MS is set, since wall-clock
+timings vary with the machine running the suite.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.startup import DEFERRED_PACKAGES, IMPORT_BUDGET_ENV, measure_app_import, parse_importtime
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     json.decoder\n"
+        "import time:       300 |        420 |   json\n"
+    )
+    [decoder, json_] = parse_importtime(output)
+    assert (decoder.module, decoder.self_us, decoder.cumulative_us, decoder.depth) == ("json.decoder", 120, 120, 2)
+    assert (json_.module, json_.depth) == ("json", 1)
+
+
+def test_app_import_defers_heavy_packages():
+    timings = measure_app_import()
+    eager = sorted({t.module for t in timings if t.module.split(".")[0] in DEFERRED_PACKAGES})
+    assert eager == []
+
+
+def test_app_import_fits_budget():
+    budget_ms = os.environ.get(IMPORT_BUDGET_ENV)
+    if not budget_ms:
+        pytest.skip(f"{IMPORT_BUDGET_ENV} not set")
+    app_main = next(t for t in measure_app_import() if t.module == "app.main")
+    assert app_main.cumulative_us / 1000 < float(budget_ms)
@@ -0,0 +1,144 @@
+"""
+Tests for app.services.transfer: NDJSON export and import, run against the SQLite
+backend in a temporary file as in test_sqlite_repository.py.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.repositories import use_repository
+from app.repositories.sqlite import SqliteRepository
+from app.services import transfer
+from app.services.transfer import DosImporter, ImportProgressResponse, export_dos, import_dos
+from benchmarks import data
+
+USER = data.USER_ID
+OTHER_USER = "00000000-0000-4000-8000-000000000002"
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SqliteRepository(tmp_path / "flowdo.db")
+    with use_repository(repo):
+        yield repo
+    repo.close()
+
+
+def new_do(repo, title, user=USER, **values):
+    return repo.insert_do({"user_id": user, "title": title, "time_unit": "today", **values})
+
+
+def run_import(user_id, body: bytes, chunk_size=7) -> list[dict]:
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+    async def collect():
+        return [json.loads(line) async for line in import_dos(user_id, chunks())]
+
+    return asyncio.run(collect())
+
+
+def all_dos(repo, user_id):
+    return repo.list_dos_page(user_id, limit=1000)
+
+
+def test_export_pages_through_dos_then_logs(repo, monkeypatch):
+    monkeypatch.setattr(transfer, "EXPORT_BATCH_SIZE", 2)
+    dos = [new_do(repo, f"do {i}", do_type="maintenance") for i in range(5)]
+    for do in dos[:3]:
+        repo.add_maintenance_log(do["id"], USER)
+    new_do(repo, "someone else's", user=OTHER_USER)
+
+    chunks = list(export_dos(USER))
+    records = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [r["type"] for r in records] == ["export"] + ["do"] * 5 + ["log"] * 3
+    assert [r["id"] for r in records if r["type"] == "do"] == [d["id"] for d in dos]
+    assert len(chunks) == 1 + 3 + 2
+
+
+def test_round_trip_remaps_ids_and_parents(repo):
+    root = new_do(repo, "root", color_hex="#AFC6E9")
+    child = new_do(repo, "child", parent_id=root["id"], color_hex="#AFC6E9")
+    new_do(repo, "grandchild", parent_id=child["id"], do_type="maintenance", color_hex="#AFC6E9")
+    grandchild = all_dos(repo, USER)[-1]
+    repo.add_maintenance_log(grandchild["id"], USER)
+
+    events = run_import(OTHER_USER, b"".join(export_dos(USER)))
+
+    assert events[-1] == {"type": "done", "line": 5, "dos": 3, "logs": 1, "skipped_logs": 0, "recolored": 0}
+    imported = {d["title"]: d for d in all_dos(repo, OTHER_USER)}
+    assert not {d["id"] for d in imported.values()} & {root["id"], child["id"], grandchild["id"]}
+    assert imported["grandchild"]["ancestor_ids"] == [imported["root"]["id"], imported["child"]["id"]]
+    assert {d["color_hex"] for d in imported.values()} == {"#AFC6E9"}
+    assert [log["do_id"] for log in repo.list_maintenance_logs_page(OTHER_USER, after=None, limit=10)] == [
+        imported["grandchild"]["id"]
+    ]
+
+
+def test_children_before_parents_and_colors_settled_once_per_tree(repo, monkeypatch):
+    monkeypatch.setattr(transfer, "generate_lineage_color", lambda: "#B7DDB0")
+    ids = [f"00000000-0000-4000-8000-00000000010{i}" for i in range(5)]
+    lines = [
+        {"type": "do", "id": ids[1], "title": "child", "time_unit": "week", "parent_id": ids[0], "color_hex": "#E8C39E"},
+        {"type": "do", "id": ids[0], "title": "root", "time_unit": "week"},
+        {"type": "do", "id": ids[2], "title": "plain root", "time_unit": "week"},
+        {"type": "do", "id": ids[3], "title": "orphan", "time_unit": "week", "parent_id": ids[4]},
+        {"type": "log", "do_id": ids[4], "logged_at": "2026-02-09T00:00:00+00:00"},
+    ]
+    body = b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+
+    events = run_import(USER, body)
+
+    assert events[-1]["dos"] == 4 and events[-1]["skipped_logs"] == 1 and events[-1]["recolored"] == 1
+    imported = {d["title"]: d for d in all_dos(repo, USER)}
+    assert imported["child"]["parent_id"] == imported["root"]["id"]
+    assert imported["root"]["color_hex"] == imported["child"]["color_hex"] == "#E8C39E"
+    assert imported["plain root"]["color_hex"] is None
+    assert imported["orphan"]["parent_id"] is None
+
+
+def test_progress_after_each_batch_and_error_on_a_bad_line(repo, monkeypatch):
+    monkeypatch.setattr(transfer, "IMPORT_BATCH_SIZE", 2)
+    lines = [
+        json.dumps({"type": "do", "id": f"00000000-0000-4000-8000-00000000020{i}", "title": f"do {i}", "time_unit": "today"})
+        for i in range(5)
+    ]
+    body = "\n".join([*lines, "{not json"]).encode()
+
+    events = run_import(USER, body)
+
+    assert [e["type"] for e in events] == ["progress", "error"]
+    assert events[0]["dos"] == 2
+    # The batch in flight when the bad line was read is still written.
+    assert events[1]["line"] == 6 and events[1]["dos"] == 4
+    assert len(all_dos(repo, USER)) == 4
+
+
+def test_duplicate_ids_are_rejected(repo):
+    importer = DosImporter(USER)
+    record = {"type": "do", "id": "00000000-0000-4000-8000-000000000300", "title": "x", "time_unit": "today"}
+    importer.add(record)
+    with pytest.raises(ValueError):
+        importer.add(record)
+    with pytest.raises(ValueError):
+        importer.add({"type": "do", "id": "not-a-uuid", "title": "x", "time_unit": "today"})
+
+
+def test_import_endpoint_streams_progress_while_reading_the_body(repo):
+    app = FastAPI()
+
+    @app.post("/import")
+    async def import_route(request: Request):
+        return ImportProgressResponse(import_dos(USER, request.stream()), media_type=transfer.NDJSON_MEDIA_TYPE)
+
+    body = json.dumps({"type": "do", "id": "00000000-0000-4000-8000-000000000400", "title": "x", "time_unit": "today"})
+    response = TestClient(app).post("/import", content=body.encode())
+
+    assert response.headers["content-type"] == transfer.NDJSON_MEDIA_TYPE
+    assert [json.loads(line)["type"] for line in response.text.splitlines()] == ["done"]
+    assert [d["title"] for d in all_dos(repo, USER)] == ["x"]
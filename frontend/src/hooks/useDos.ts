@@ -2,25 +2,31 @@ import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query"
 import { api } from "@/lib/api"
 import type { Do, DoType, TimeUnit } from "@/types"
 
+// GET /dos is keyset-paginated: follow the X-Next-Cursor header until it runs out.
+async function fetchAllDos(params: Record<string, string> = {}) {
+  const dos: Do[] = []
+  let cursor: string | undefined
+  do {
+    const { data, headers } = await api.get<Do[]>("/api/v1/dos", {
+      params: cursor ? { ...params, cursor } : params,
+    })
+    dos.push(...data)
+    cursor = headers["x-next-cursor"] as string | undefined
+  } while (cursor)
+  return dos
+}
+
 export function useDos(timeUnit: TimeUnit) {
   return useQuery({
     queryKey: ["dos", timeUnit],
-    queryFn: async () => {
-      const { data } = await api.get<Do[]>("/api/v1/dos", {
-        params: { time_unit: timeUnit },
-      })
-      return data
-    },
+    queryFn: () => fetchAllDos({ time_unit: timeUnit }),
   })
 }
 
 export function useAllDos() {
   return useQuery({
     queryKey: ["dos", "all"],
-    queryFn: async () => {
-      const { data } = await api.get<Do[]>("/api/v1/dos")
-      return data
-    },
+    queryFn: () => fetchAllDos(),
   })
 }
 
@@ -1,14 +1,23 @@
 import type { Do } from "@/types"
 
 /**
- * Walk parent_id links upward from id, return [parent, grandparent, ...]
- * Guards against cycles with a visited set.
+ * Return [parent, grandparent, ...] for id.
+ * Reads the server-maintained ancestor_ids path when it agrees with parent_id;
+ * otherwise (e.g. after an optimistic re-parent) walks parent_id links upward,
+ * guarding against cycles with a visited set.
  */
 export function getAncestorChain(all: Do[], id: string): Do[] {
   const byId = new Map(all.map((d) => [d.id, d]))
+  let current = byId.get(id)
+  const path = current?.ancestor_ids
+  if (path?.length && path[path.length - 1] === current?.parent_id) {
+    const chain = [...path].reverse().map((ancestorId) => byId.get(ancestorId))
+    const consistent = chain.every((d, i) => d !== undefined && d.parent_id === (path[path.length - 2 - i] ?? null))
+    if (consistent) return chain as Do[]
+  }
+
   const ancestors: Do[] = []
   const visited = new Set<string>()
-  let current = byId.get(id)
   while (current?.parent_id && !visited.has(current.parent_id)) {
     visited.add(current.parent_id)
     const parent = byId.get(current.parent_id)
@@ -23,6 +23,8 @@ export interface Do {
   created_at: string
   updated_at: string
   parent_id: string | null
+  /** Ancestors root-first, maintained by the server; stale after an optimistic re-parent */
+  ancestor_ids?: string[]
   color_hex: string | null
   is_today_priority: boolean
 }
@@ -0,0 +1,2 @@
+-- Backs keyset pagination in GET /dos: filter by user, walk (created_at, id) in order.
+CREATE INDEX IF NOT EXISTS dos_user_created_at_id_idx ON dos (user_id, created_at, id);
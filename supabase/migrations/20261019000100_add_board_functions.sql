@@ -0,0 +1,35 @@
+-- Backs GET /dos/board: every requested column in one round trip.
+
+-- The first p_limit dos of each requested time_unit, in (created_at, id) order.
+CREATE OR REPLACE FUNCTION dos_board_page(p_user_id uuid, p_units text[], p_limit integer)
+RETURNS SETOF dos
+LANGUAGE sql STABLE AS $$
+  SELECT *
+  FROM dos
+  WHERE id IN (
+    SELECT ranked.id
+    FROM (
+      SELECT d.id,
+             row_number() OVER (PARTITION BY d.time_unit ORDER BY d.created_at, d.id) AS rn
+      FROM dos d
+      WHERE d.user_id = p_user_id AND d.time_unit = ANY (p_units)
+    ) ranked
+    WHERE ranked.rn <= p_limit
+  )
+  ORDER BY time_unit, created_at, id;
+$$;
+
+-- Per-column aggregate counts, computed without shipping any rows.
+CREATE OR REPLACE FUNCTION dos_board_counts(p_user_id uuid, p_units text[])
+RETURNS TABLE (time_unit text, total bigint, completed bigint, maintenance bigint)
+LANGUAGE sql STABLE AS $$
+  SELECT d.time_unit,
+         count(*),
+         count(*) FILTER (WHERE d.completed),
+         count(*) FILTER (WHERE d.do_type = 'maintenance')
+  FROM dos d
+  WHERE d.user_id = p_user_id AND d.time_unit = ANY (p_units)
+  GROUP BY d.time_unit;
+$$;
+
+CREATE INDEX IF NOT EXISTS dos_user_time_unit_created_at_idx ON dos (user_id, time_unit, created_at, id);
@@ -0,0 +1,86 @@
+-- Cold storage for long-completed dos, so the hot `dos` table scales with active work.
+--
+-- dos_archive mirrors the dos columns (in the same order) followed by archived_at.
+-- Any column added to dos later must be added to dos_archive too.
+
+CREATE TABLE dos_archive (LIKE dos INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+ALTER TABLE dos_archive
+  ADD PRIMARY KEY (id),
+  ADD COLUMN archived_at timestamptz NOT NULL DEFAULT now();
+
+CREATE INDEX dos_archive_user_created_at_id_idx ON dos_archive (user_id, created_at, id);
+CREATE INDEX dos_archive_parent_id_idx ON dos_archive (parent_id) WHERE parent_id IS NOT NULL;
+
+ALTER TABLE dos_archive ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own archived dos"
+  ON dos_archive FOR SELECT USING (auth.uid() = user_id);
+
+-- Archive candidates are found by completion time; children are looked up by parent.
+CREATE INDEX IF NOT EXISTS dos_completed_at_idx ON dos (completed_at) WHERE completed;
+CREATE INDEX IF NOT EXISTS dos_parent_id_idx ON dos (parent_id) WHERE parent_id IS NOT NULL;
+
+-- Move up to p_batch completed dos older than p_cutoff into dos_archive.
+--
+-- Only dos without children still in the hot table are moved, so archiving never
+-- trips ON DELETE SET NULL on a live child: trees are archived leaves-first over
+-- successive calls, and archived rows keep their parent_id. Maintenance dos stay
+-- hot because their maintenance_logs cascade on delete.
+CREATE OR REPLACE FUNCTION archive_completed_dos(p_cutoff timestamptz, p_batch integer)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  moved_count integer;
+BEGIN
+  WITH candidates AS (
+    SELECT d.id
+    FROM dos d
+    WHERE d.completed
+      AND d.completed_at < p_cutoff
+      AND d.do_type = 'normal'
+      AND NOT EXISTS (SELECT 1 FROM dos c WHERE c.parent_id = d.id)
+    ORDER BY d.completed_at
+    LIMIT p_batch
+    FOR UPDATE SKIP LOCKED
+  ), moved AS (
+    DELETE FROM dos WHERE id IN (SELECT id FROM candidates) RETURNING *
+  )
+  INSERT INTO dos_archive SELECT moved.*, now() FROM moved;
+
+  GET DIAGNOSTICS moved_count = ROW_COUNT;
+  RETURN moved_count;
+END;
+$$;
+
+-- Move archived dos back into the hot table, together with any archived ancestors
+-- so their parent_id references resolve again.
+CREATE OR REPLACE FUNCTION restore_archived_dos(p_user_id uuid, p_ids uuid[])
+RETURNS SETOF dos
+LANGUAGE sql AS $$
+  WITH RECURSIVE chain AS (
+    SELECT a.id, a.parent_id
+    FROM dos_archive a
+    WHERE a.user_id = p_user_id AND a.id = ANY (p_ids)
+    UNION
+    SELECT a.id, a.parent_id
+    FROM dos_archive a
+    JOIN chain ON a.id = chain.parent_id
+    WHERE a.user_id = p_user_id
+  ), moved AS (
+    DELETE FROM dos_archive WHERE id IN (SELECT id FROM chain) RETURNING *
+  )
+  INSERT INTO dos (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count,
+    -- A parent that was deleted while its child sat in the archive cannot be linked again.
+    CASE
+      WHEN m.parent_id IN (SELECT id FROM moved) OR EXISTS (SELECT 1 FROM dos p WHERE p.id = m.parent_id)
+        THEN m.parent_id
+    END,
+    m.priority_date, m.color_hex
+  FROM moved m
+  RETURNING *;
+$$;
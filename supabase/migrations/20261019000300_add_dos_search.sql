@@ -0,0 +1,47 @@
+-- Server-side title search for GET /dos/search.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Serves both substring (ILIKE) matching and similarity ranking on title.
+CREATE INDEX IF NOT EXISTS dos_title_trgm_idx ON dos USING gin (title gin_trgm_ops);
+
+-- A user's dos whose title contains p_query, best matches first.
+-- Prefix matches rank above other substring matches, then by trigram similarity.
+CREATE OR REPLACE FUNCTION search_dos(p_user_id uuid, p_query text, p_limit integer, p_offset integer)
+RETURNS SETOF dos
+LANGUAGE sql STABLE AS $$
+  WITH pattern AS (
+    SELECT replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') AS escaped
+  )
+  SELECT d.*
+  FROM dos d, pattern
+  WHERE d.user_id = p_user_id
+    AND d.title ILIKE '%' || pattern.escaped || '%'
+  ORDER BY
+    (d.title ILIKE pattern.escaped || '%') DESC,
+    similarity(d.title, p_query) DESC,
+    d.created_at,
+    d.id
+  LIMIT p_limit OFFSET p_offset;
+$$;
+
+-- Every do on the same parent/child tree as any of p_ids (the ids themselves included).
+-- Walks parent_id edges in both directions through the primary key and the
+-- parent_id index; UNION de-duplicates, so even a cyclic chain terminates.
+CREATE OR REPLACE FUNCTION dos_lineage_components(p_user_id uuid, p_ids uuid[])
+RETURNS SETOF dos
+LANGUAGE sql STABLE AS $$
+  WITH RECURSIVE component(id, parent_id) AS (
+    SELECT d.id, d.parent_id
+    FROM dos d
+    WHERE d.user_id = p_user_id AND d.id = ANY (p_ids)
+    UNION
+    SELECT d.id, d.parent_id
+    FROM component c
+    JOIN dos d ON d.user_id = p_user_id AND (d.parent_id = c.id OR d.id = c.parent_id)
+  )
+  SELECT d.*
+  FROM dos d
+  WHERE d.id IN (SELECT id FROM component)
+  ORDER BY d.created_at, d.id;
+$$;
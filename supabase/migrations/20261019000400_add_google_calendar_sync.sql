@@ -0,0 +1,59 @@
+-- Persisted Google Calendar connections and a local copy of their events.
+--
+-- Events are kept current with Google's incremental sync (syncToken), so reads such
+-- as GET /integrations/google-calendar/events never call Google. These tables are
+-- only accessed with the service key; RLS is enabled with read policies for owners
+-- and no policy at all on the table holding refresh tokens.
+
+CREATE TABLE google_calendar_connections (
+  id            uuid        PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id       uuid        NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  google_sub    text        NOT NULL,
+  email         text,
+  refresh_token text        NOT NULL,
+  scope         text,
+  created_at    timestamptz NOT NULL DEFAULT now(),
+  updated_at    timestamptz NOT NULL DEFAULT now(),
+  UNIQUE (user_id, google_sub)
+);
+ALTER TABLE google_calendar_connections ENABLE ROW LEVEL SECURITY;
+
+CREATE TRIGGER google_calendar_connections_updated_at
+  BEFORE UPDATE ON google_calendar_connections
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+-- One row per synced calendar of a connection, holding its incremental sync cursor.
+CREATE TABLE google_calendars (
+  id            uuid        PRIMARY KEY DEFAULT gen_random_uuid(),
+  connection_id uuid        NOT NULL REFERENCES google_calendar_connections(id) ON DELETE CASCADE,
+  user_id       uuid        NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  calendar_id   text        NOT NULL,
+  summary       text,
+  sync_token    text,
+  synced_at     timestamptz,
+  UNIQUE (connection_id, calendar_id)
+);
+CREATE INDEX ON google_calendars (user_id);
+ALTER TABLE google_calendars ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own calendars"
+  ON google_calendars FOR SELECT USING (auth.uid() = user_id);
+
+CREATE TABLE google_calendar_events (
+  id            uuid        PRIMARY KEY DEFAULT gen_random_uuid(),
+  connection_id uuid        NOT NULL REFERENCES google_calendar_connections(id) ON DELETE CASCADE,
+  user_id       uuid        NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  calendar_id   text        NOT NULL,
+  event_id      text        NOT NULL,
+  summary       text,
+  start_at      timestamptz NOT NULL,
+  end_at        timestamptz NOT NULL,
+  all_day       boolean     NOT NULL DEFAULT false,
+  transparency  text        NOT NULL DEFAULT 'opaque',
+  updated_at    timestamptz,
+  UNIQUE (connection_id, calendar_id, event_id)
+);
+-- Day lookups filter by user and a start_at range.
+CREATE INDEX ON google_calendar_events (user_id, start_at);
+ALTER TABLE google_calendar_events ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own calendar events"
+  ON google_calendar_events FOR SELECT USING (auth.uid() = user_id);
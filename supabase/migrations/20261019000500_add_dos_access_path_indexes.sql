@@ -0,0 +1,18 @@
+-- Indexes for the remaining per-user access paths.
+--
+-- Already covered by earlier migrations, so not repeated here:
+--   - filters on dos.user_id (list_dos, _load_user_dos, ownership checks) use the
+--     leading column of dos_user_created_at_id_idx (user_id, created_at, id), which
+--     also serves list_dos's ORDER BY created_at, id;
+--   - the ON DELETE SET NULL child lookup on dos.parent_id uses dos_parent_id_idx.
+--
+-- toggle-priority clears the user's current priority with
+--   UPDATE dos SET priority_date = NULL WHERE user_id = $1 AND priority_date = $2
+-- Few rows ever carry a priority_date, so a partial index stays small and is only
+-- written when a priority changes.
+CREATE INDEX IF NOT EXISTS dos_user_priority_date_idx ON dos (user_id, priority_date)
+  WHERE priority_date IS NOT NULL;
+
+-- maintenance_logs.user_id references auth.users without an index, so deleting a
+-- user scanned the whole log table for the foreign-key check.
+CREATE INDEX IF NOT EXISTS maintenance_logs_user_id_idx ON maintenance_logs (user_id);
@@ -0,0 +1,175 @@
+-- Materialized ancestor paths for dos.
+--
+-- ancestor_ids holds a do's ancestors root-first (empty for a root). Ancestry is then
+-- one primary-key lookup, and descendants are one GIN-indexed containment query
+-- (ancestor_ids @> ARRAY[id]). Triggers keep the column current on insert and
+-- re-parent, and reject parent links that would make a do its own ancestor.
+
+ALTER TABLE dos ADD COLUMN ancestor_ids uuid[] NOT NULL DEFAULT '{}';
+-- dos_archive mirrors dos; archive/restore below name their columns explicitly
+-- because this column lands after archived_at there.
+ALTER TABLE dos_archive ADD COLUMN ancestor_ids uuid[] NOT NULL DEFAULT '{}';
+
+-- Backfilling must not look like user edits.
+ALTER TABLE dos DISABLE TRIGGER dos_updated_at;
+
+-- Nothing prevented cycles until now. Break each existing one by detaching its
+-- lowest-id member from its parent.
+WITH RECURSIVE walk(id, parent_id, path, is_cycle) AS (
+  SELECT d.id, d.parent_id, ARRAY[d.id], false
+  FROM dos d
+  WHERE d.parent_id IS NOT NULL
+  UNION ALL
+  SELECT p.id, p.parent_id, w.path || p.id, p.id = ANY (w.path)
+  FROM walk w
+  JOIN dos p ON p.id = w.parent_id
+  WHERE NOT w.is_cycle
+), cycles AS (
+  SELECT w.path[array_position(w.path, w.id):cardinality(w.path) - 1] AS members
+  FROM walk w
+  WHERE w.is_cycle
+)
+UPDATE dos SET parent_id = NULL
+WHERE id IN (SELECT (SELECT m FROM unnest(c.members) m ORDER BY m LIMIT 1) FROM cycles c);
+
+WITH RECURSIVE paths(id, ancestor_ids) AS (
+  SELECT d.id, '{}'::uuid[]
+  FROM dos d
+  WHERE d.parent_id IS NULL
+  UNION ALL
+  SELECT d.id, p.ancestor_ids || d.parent_id
+  FROM paths p
+  JOIN dos d ON d.parent_id = p.id
+)
+UPDATE dos d SET ancestor_ids = paths.ancestor_ids
+FROM paths
+WHERE d.id = paths.id AND paths.ancestor_ids <> '{}';
+
+ALTER TABLE dos ENABLE TRIGGER dos_updated_at;
+
+CREATE INDEX IF NOT EXISTS dos_ancestor_ids_idx ON dos USING gin (ancestor_ids);
+
+-- Derive ancestor_ids from the parent's path, rejecting cycles.
+-- Parent changes are serialized per user so two concurrent re-parents can't each
+-- pass the check and close a cycle together.
+CREATE OR REPLACE FUNCTION dos_set_ancestor_ids()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+  parent_path uuid[];
+BEGIN
+  IF NEW.parent_id IS NULL THEN
+    NEW.ancestor_ids := '{}';
+    RETURN NEW;
+  END IF;
+
+  PERFORM pg_advisory_xact_lock(hashtextextended('dos_lineage:' || NEW.user_id::text, 0));
+
+  SELECT p.ancestor_ids || p.id INTO parent_path FROM dos p WHERE p.id = NEW.parent_id;
+  IF parent_path IS NULL THEN
+    -- Unknown parent: the foreign key rejects the row.
+    NEW.ancestor_ids := '{}';
+    RETURN NEW;
+  END IF;
+  IF NEW.id = ANY (parent_path) THEN
+    RAISE EXCEPTION 'parent_id % would make do % its own ancestor', NEW.parent_id, NEW.id
+      USING ERRCODE = 'check_violation';
+  END IF;
+
+  NEW.ancestor_ids := parent_path;
+  RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER dos_ancestor_ids
+  BEFORE INSERT OR UPDATE OF parent_id ON dos
+  FOR EACH ROW EXECUTE FUNCTION dos_set_ancestor_ids();
+
+-- After a re-parent (including ON DELETE SET NULL), rewrite the moved subtree's paths.
+CREATE OR REPLACE FUNCTION dos_reparent_descendants()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE dos d
+  SET ancestor_ids = NEW.ancestor_ids || NEW.id || d.ancestor_ids[array_position(d.ancestor_ids, NEW.id) + 1:]
+  WHERE d.ancestor_ids @> ARRAY[NEW.id];
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER dos_reparent_descendants
+  AFTER UPDATE OF parent_id ON dos
+  FOR EACH ROW
+  WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+  EXECUTE FUNCTION dos_reparent_descendants();
+
+-- Same as before, with explicit columns now that dos_archive's column order differs.
+CREATE OR REPLACE FUNCTION archive_completed_dos(p_cutoff timestamptz, p_batch integer)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  moved_count integer;
+BEGIN
+  WITH candidates AS (
+    SELECT d.id
+    FROM dos d
+    WHERE d.completed
+      AND d.completed_at < p_cutoff
+      AND d.do_type = 'normal'
+      AND NOT EXISTS (SELECT 1 FROM dos c WHERE c.parent_id = d.id)
+    ORDER BY d.completed_at
+    LIMIT p_batch
+    FOR UPDATE SKIP LOCKED
+  ), moved AS (
+    DELETE FROM dos WHERE id IN (SELECT id FROM candidates) RETURNING *
+  )
+  INSERT INTO dos_archive (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex,
+    ancestor_ids, archived_at
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count, m.parent_id, m.priority_date, m.color_hex,
+    m.ancestor_ids, now()
+  FROM moved m;
+
+  GET DIAGNOSTICS moved_count = ROW_COUNT;
+  RETURN moved_count;
+END;
+$$;
+
+-- Same as before, but ancestors are inserted before their descendants so the
+-- insert trigger finds each parent's path already in place.
+CREATE OR REPLACE FUNCTION restore_archived_dos(p_user_id uuid, p_ids uuid[])
+RETURNS SETOF dos
+LANGUAGE sql AS $$
+  WITH RECURSIVE chain AS (
+    SELECT a.id, a.parent_id, 0 AS depth
+    FROM dos_archive a
+    WHERE a.user_id = p_user_id AND a.id = ANY (p_ids)
+    UNION
+    SELECT a.id, a.parent_id, chain.depth + 1
+    FROM dos_archive a
+    JOIN chain ON a.id = chain.parent_id
+    WHERE a.user_id = p_user_id
+  ), moved AS (
+    DELETE FROM dos_archive WHERE id IN (SELECT id FROM chain) RETURNING *
+  )
+  INSERT INTO dos (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count,
+    -- A parent that was deleted while its child sat in the archive cannot be linked again.
+    CASE
+      WHEN m.parent_id IN (SELECT id FROM moved) OR EXISTS (SELECT 1 FROM dos p WHERE p.id = m.parent_id)
+        THEN m.parent_id
+    END,
+    m.priority_date, m.color_hex
+  FROM moved m
+  ORDER BY (SELECT max(c.depth) FROM chain c WHERE c.id = m.id) DESC
+  RETURNING *;
+$$;
@@ -0,0 +1,13 @@
+-- Replication lag for read-replica routing (app/core/read_routing.py).
+-- Called on the replica by the API's lag monitor. The primary, and a replica that
+-- has replayed everything it has received, report 0; otherwise it is the age of the
+-- last transaction replayed.
+CREATE OR REPLACE FUNCTION replica_lag_seconds()
+RETURNS double precision
+LANGUAGE sql STABLE AS $$
+  SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+  END::double precision;
+$$;
@@ -0,0 +1,285 @@
+-- Hash partitioning of dos and maintenance_logs on user_id, step 1 of 2.
+--
+-- Both tables are split into 16 hash partitions on user_id (dos_p00..dos_p15 and
+-- maintenance_logs_p00..maintenance_logs_p15). A user's rows and index entries then
+-- live in one partition of each, every per-user query is pruned to it, and flow-up
+-- scans the partitions independently. Postgres requires the partition key in every
+-- unique constraint, so both primary keys become (user_id, id), and parent_id and
+-- maintenance_logs.do_id reference dos through (user_id, id): a parent, and a do's
+-- logs, always belong to the do's owner.
+--
+-- Rows are moved without taking the tables offline:
+--   1. this migration builds dos_partitioned and maintenance_logs_partitioned next
+--      to the live tables, and triggers that mirror every later write into them;
+--   2. backend/scripts/backfill_partitions.py copies the existing rows in small
+--      batches through partition_backfill_dos() / partition_backfill_logs();
+--   3. the next migration swaps the tables in one short transaction, first copying
+--      whatever the backfill hasn't (everything, on a database where it never ran).
+
+-- The API upserts on (user_id, id) from now on, which both layouts can enforce.
+-- On a large table, create these with CREATE UNIQUE INDEX CONCURRENTLY beforehand.
+CREATE UNIQUE INDEX IF NOT EXISTS dos_user_id_id_key ON dos (user_id, id);
+CREATE UNIQUE INDEX IF NOT EXISTS maintenance_logs_user_id_id_key ON maintenance_logs (user_id, id);
+
+CREATE TABLE dos_partitioned (
+  id               uuid        NOT NULL DEFAULT gen_random_uuid(),
+  user_id          uuid        NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  title            text        NOT NULL,
+  time_unit        text        NOT NULL CHECK (time_unit IN ('today', 'week', 'month', 'season', 'year', 'multi_year')),
+  completed        boolean     NOT NULL DEFAULT false,
+  completed_at     timestamptz,
+  days_in_unit     integer     NOT NULL DEFAULT 0,
+  flow_count       integer     NOT NULL DEFAULT 0,
+  created_at       timestamptz NOT NULL DEFAULT now(),
+  updated_at       timestamptz NOT NULL DEFAULT now(),
+  do_type          do_type     NOT NULL DEFAULT 'normal',
+  completion_count integer     NOT NULL DEFAULT 0,
+  parent_id        uuid,
+  priority_date    date,
+  color_hex        text,
+  ancestor_ids     uuid[]      NOT NULL DEFAULT '{}',
+  CONSTRAINT dos_partitioned_pkey PRIMARY KEY (user_id, id),
+  CONSTRAINT dos_partitioned_parent_id_fkey FOREIGN KEY (user_id, parent_id)
+    REFERENCES dos_partitioned (user_id, id) ON DELETE SET NULL (parent_id)
+) PARTITION BY HASH (user_id);
+
+CREATE TABLE maintenance_logs_partitioned (
+  id        uuid        NOT NULL DEFAULT gen_random_uuid(),
+  do_id     uuid        NOT NULL,
+  user_id   uuid        NOT NULL REFERENCES auth.users(id),
+  logged_at timestamptz NOT NULL DEFAULT now(),
+  CONSTRAINT maintenance_logs_partitioned_pkey PRIMARY KEY (user_id, id),
+  CONSTRAINT maintenance_logs_partitioned_do_id_fkey FOREIGN KEY (user_id, do_id)
+    REFERENCES dos_partitioned (user_id, id) ON DELETE CASCADE
+) PARTITION BY HASH (user_id);
+
+-- Same modulus for both tables, so a user's dos and logs sit in partitions with the
+-- same number and joins between them can run partition by partition.
+-- Partitions are only reached through the parent tables: RLS with no policies and
+-- no grants keeps clients from reading them directly.
+DO $$
+BEGIN
+  FOR i IN 0..15 LOOP
+    EXECUTE format(
+      'CREATE TABLE dos_p%1$s PARTITION OF dos_partitioned FOR VALUES WITH (MODULUS 16, REMAINDER %2$s)',
+      lpad(i::text, 2, '0'), i
+    );
+    EXECUTE format(
+      'CREATE TABLE maintenance_logs_p%1$s PARTITION OF maintenance_logs_partitioned'
+      ' FOR VALUES WITH (MODULUS 16, REMAINDER %2$s)',
+      lpad(i::text, 2, '0'), i
+    );
+    EXECUTE format('ALTER TABLE dos_p%s ENABLE ROW LEVEL SECURITY', lpad(i::text, 2, '0'));
+    EXECUTE format('ALTER TABLE maintenance_logs_p%s ENABLE ROW LEVEL SECURITY', lpad(i::text, 2, '0'));
+    EXECUTE format('REVOKE ALL ON dos_p%1$s, maintenance_logs_p%1$s FROM anon, authenticated', lpad(i::text, 2, '0'));
+  END LOOP;
+END;
+$$;
+
+-- The indexes of the live tables, built per partition. The swap renames them to the
+-- live names. (user_id, parent_id) replaces the parent_id index because that is how
+-- the composite foreign key looks children up; the (user_id) index on
+-- maintenance_logs is covered by the primary key now.
+CREATE INDEX dos_partitioned_user_created_at_id_idx ON dos_partitioned (user_id, created_at, id);
+CREATE INDEX dos_partitioned_user_time_unit_created_at_idx ON dos_partitioned (user_id, time_unit, created_at, id);
+CREATE INDEX dos_partitioned_user_priority_date_idx ON dos_partitioned (user_id, priority_date)
+  WHERE priority_date IS NOT NULL;
+CREATE INDEX dos_partitioned_completed_at_idx ON dos_partitioned (completed_at) WHERE completed;
+CREATE INDEX dos_partitioned_parent_id_idx ON dos_partitioned (user_id, parent_id) WHERE parent_id IS NOT NULL;
+CREATE INDEX dos_partitioned_title_trgm_idx ON dos_partitioned USING gin (title gin_trgm_ops);
+CREATE INDEX dos_partitioned_ancestor_ids_idx ON dos_partitioned USING gin (ancestor_ids);
+-- Lookups by id alone (the log buffer's existence check) probe one small index per partition.
+CREATE INDEX dos_partitioned_id_idx ON dos_partitioned (id);
+CREATE INDEX maintenance_logs_partitioned_do_id_logged_at_idx ON maintenance_logs_partitioned (do_id, logged_at);
+
+-- Same policies as the live tables; they apply to every partition through the parent.
+ALTER TABLE dos_partitioned ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own dos"
+  ON dos_partitioned FOR SELECT USING (auth.uid() = user_id);
+CREATE POLICY "Users can create their own dos"
+  ON dos_partitioned FOR INSERT WITH CHECK (auth.uid() = user_id);
+CREATE POLICY "Users can update their own dos"
+  ON dos_partitioned FOR UPDATE USING (auth.uid() = user_id);
+CREATE POLICY "Users can delete their own dos"
+  ON dos_partitioned FOR DELETE USING (auth.uid() = user_id);
+
+ALTER TABLE maintenance_logs_partitioned ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "users manage own logs"
+  ON maintenance_logs_partitioned FOR ALL USING (auth.uid() = user_id);
+
+-- dos_updated_at and the ancestor-path triggers are attached by the swap: until then
+-- rows arrive as copies whose updated_at and ancestor_ids are already final.
+
+-- Copy dos rows from the live table as they are now, overwriting earlier copies.
+-- The source rows are share-locked until the caller commits, so a concurrent write
+-- to one of them lands after this copy (and is mirrored again by its trigger).
+-- Foreign keys are checked at the end of the statement, so p_ids may list
+-- children before their parents.
+CREATE FUNCTION dos_partitioned_upsert(p_ids uuid[])
+RETURNS void
+LANGUAGE sql AS $$
+  WITH source AS (
+    SELECT d.*
+    FROM dos d
+    WHERE d.id = ANY (p_ids)
+    FOR SHARE
+  )
+  INSERT INTO dos_partitioned (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex,
+    ancestor_ids
+  )
+  SELECT
+    s.id, s.user_id, s.title, s.time_unit, s.completed, s.completed_at, s.days_in_unit, s.flow_count,
+    s.created_at, s.updated_at, s.do_type, s.completion_count, s.parent_id, s.priority_date, s.color_hex,
+    s.ancestor_ids
+  FROM source s
+  ON CONFLICT (user_id, id) DO UPDATE SET
+    title = EXCLUDED.title,
+    time_unit = EXCLUDED.time_unit,
+    completed = EXCLUDED.completed,
+    completed_at = EXCLUDED.completed_at,
+    days_in_unit = EXCLUDED.days_in_unit,
+    flow_count = EXCLUDED.flow_count,
+    created_at = EXCLUDED.created_at,
+    updated_at = EXCLUDED.updated_at,
+    do_type = EXCLUDED.do_type,
+    completion_count = EXCLUDED.completion_count,
+    parent_id = EXCLUDED.parent_id,
+    priority_date = EXCLUDED.priority_date,
+    color_hex = EXCLUDED.color_hex,
+    ancestor_ids = EXCLUDED.ancestor_ids;
+$$;
+
+-- Copy maintenance_logs rows, each under its do's owner (the live table never
+-- enforced that the two match; the partitioned one does).
+CREATE FUNCTION maintenance_logs_partitioned_insert(p_ids uuid[])
+RETURNS void
+LANGUAGE sql AS $$
+  WITH source AS (
+    SELECT l.id, l.do_id, d.user_id, l.logged_at
+    FROM maintenance_logs l
+    JOIN dos d ON d.id = l.do_id
+    WHERE l.id = ANY (p_ids)
+    FOR SHARE
+  )
+  INSERT INTO maintenance_logs_partitioned (id, do_id, user_id, logged_at)
+  SELECT s.id, s.do_id, s.user_id, s.logged_at
+  FROM source s
+  ON CONFLICT (user_id, id) DO NOTHING;
+$$;
+
+-- Mirror each write on the live tables into the partitioned ones.
+CREATE FUNCTION dos_partitioned_sync()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    DELETE FROM dos_partitioned WHERE user_id = OLD.user_id AND id = OLD.id;
+    RETURN NULL;
+  END IF;
+  -- A parent the backfill hasn't reached yet comes along, with its own ancestors.
+  IF NEW.parent_id IS NOT NULL
+     AND NOT EXISTS (SELECT 1 FROM dos_partitioned p WHERE p.user_id = NEW.user_id AND p.id = NEW.parent_id) THEN
+    PERFORM dos_partitioned_upsert(NEW.ancestor_ids || NEW.id);
+  ELSE
+    PERFORM dos_partitioned_upsert(ARRAY[NEW.id]);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION maintenance_logs_partitioned_sync()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+  owner uuid;
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    -- Logs deleted by a do's cascade find no do here; the do's own delete cascades
+    -- in the partitioned table too.
+    SELECT d.user_id INTO owner FROM dos d WHERE d.id = OLD.do_id;
+    DELETE FROM maintenance_logs_partitioned WHERE user_id = owner AND id = OLD.id;
+    RETURN NULL;
+  END IF;
+  SELECT d.user_id INTO owner FROM dos d WHERE d.id = NEW.do_id;
+  IF NOT EXISTS (SELECT 1 FROM dos_partitioned p WHERE p.user_id = owner AND p.id = NEW.do_id) THEN
+    PERFORM dos_partitioned_upsert((SELECT d.ancestor_ids || d.id FROM dos d WHERE d.id = NEW.do_id));
+  END IF;
+  PERFORM maintenance_logs_partitioned_insert(ARRAY[NEW.id]);
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER dos_partitioned_sync
+  AFTER INSERT OR UPDATE OR DELETE ON dos
+  FOR EACH ROW EXECUTE FUNCTION dos_partitioned_sync();
+
+-- Logs are only ever inserted and deleted.
+CREATE TRIGGER maintenance_logs_partitioned_sync
+  AFTER INSERT OR DELETE ON maintenance_logs
+  FOR EACH ROW EXECUTE FUNCTION maintenance_logs_partitioned_sync();
+
+-- Backfill progress, so the swap knows whether it still has rows to copy.
+CREATE TABLE partition_backfill_state (
+  table_name text PRIMARY KEY,
+  done       boolean NOT NULL DEFAULT false
+);
+INSERT INTO partition_backfill_state (table_name) VALUES ('dos'), ('maintenance_logs');
+ALTER TABLE partition_backfill_state ENABLE ROW LEVEL SECURITY;
+
+-- Copy the next p_batch dos after p_after in id order, with their ancestors; returns
+-- the last id copied, to pass back as p_after, or NULL once every row is copied.
+-- Each call is its own short transaction when made through PostgREST.
+CREATE FUNCTION partition_backfill_dos(p_after uuid, p_batch integer)
+RETURNS uuid
+LANGUAGE plpgsql AS $$
+DECLARE
+  batch uuid[];
+BEGIN
+  SELECT array_agg(b.id ORDER BY b.id) INTO batch
+  FROM (
+    SELECT d.id FROM dos d WHERE p_after IS NULL OR d.id > p_after ORDER BY d.id LIMIT p_batch
+  ) b;
+  IF batch IS NULL THEN
+    UPDATE partition_backfill_state SET done = true WHERE table_name = 'dos';
+    RETURN NULL;
+  END IF;
+  PERFORM dos_partitioned_upsert(
+    batch || ARRAY(SELECT DISTINCT a FROM dos d, unnest(d.ancestor_ids) a WHERE d.id = ANY (batch))
+  );
+  RETURN batch[cardinality(batch)];
+END;
+$$;
+
+-- Same for maintenance_logs; run it once partition_backfill_dos has finished.
+CREATE FUNCTION partition_backfill_logs(p_after uuid, p_batch integer)
+RETURNS uuid
+LANGUAGE plpgsql AS $$
+DECLARE
+  batch uuid[];
+BEGIN
+  IF NOT (SELECT done FROM partition_backfill_state WHERE table_name = 'dos') THEN
+    RAISE EXCEPTION 'backfill dos before maintenance_logs';
+  END IF;
+  SELECT array_agg(b.id ORDER BY b.id) INTO batch
+  FROM (
+    SELECT l.id FROM maintenance_logs l WHERE p_after IS NULL OR l.id > p_after ORDER BY l.id LIMIT p_batch
+  ) b;
+  IF batch IS NULL THEN
+    UPDATE partition_backfill_state SET done = true WHERE table_name = 'maintenance_logs';
+    RETURN NULL;
+  END IF;
+  PERFORM maintenance_logs_partitioned_insert(batch);
+  RETURN batch[cardinality(batch)];
+END;
+$$;
+
+-- The partitions of dos, for flow-up to scan one by one. Empty until the swap, and
+-- for as long as dos is a plain table.
+CREATE VIEW dos_partitions AS
+  SELECT c.relname::text AS name
+  FROM pg_inherits i
+  JOIN pg_class c ON c.oid = i.inhrelid
+  WHERE i.inhparent = to_regclass('public.dos');
+REVOKE ALL ON dos_partitions FROM anon, authenticated;
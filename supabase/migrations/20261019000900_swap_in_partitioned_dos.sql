@@ -0,0 +1,258 @@
+-- Hash partitioning of dos and maintenance_logs on user_id, step 2 of 2: swap the
+-- partitioned tables in for the live ones.
+--
+-- Runs as one transaction. The live tables are locked against reads and writes for
+-- its duration, which is short once backend/scripts/backfill_partitions.py has copied
+-- the existing rows: what is left is renames and re-creating triggers and functions.
+-- Without a backfill (a fresh or small database), the copy happens here instead.
+
+-- Give up rather than queue every request behind a long-running query; re-run later.
+SET LOCAL lock_timeout = '5s';
+LOCK TABLE dos, maintenance_logs IN ACCESS EXCLUSIVE MODE;
+
+DO $$
+BEGIN
+  IF NOT (SELECT done FROM partition_backfill_state WHERE table_name = 'dos') THEN
+    PERFORM dos_partitioned_upsert(ARRAY(
+      SELECT d.id FROM dos d
+      WHERE NOT EXISTS (SELECT 1 FROM dos_partitioned p WHERE p.user_id = d.user_id AND p.id = d.id)
+    ));
+  END IF;
+  IF NOT (SELECT done FROM partition_backfill_state WHERE table_name = 'maintenance_logs') THEN
+    PERFORM maintenance_logs_partitioned_insert(ARRAY(
+      SELECT l.id FROM maintenance_logs l
+      JOIN dos d ON d.id = l.do_id
+      WHERE NOT EXISTS (SELECT 1 FROM maintenance_logs_partitioned p WHERE p.user_id = d.user_id AND p.id = l.id)
+    ));
+  END IF;
+END;
+$$;
+
+-- Functions returning SETOF dos depend on the live table's row type; they are
+-- re-created below for the partitioned one.
+DROP FUNCTION dos_board_page(uuid, text[], integer);
+DROP FUNCTION search_dos(uuid, text, integer, integer);
+DROP FUNCTION dos_lineage_components(uuid, uuid[]);
+DROP FUNCTION restore_archived_dos(uuid, uuid[]);
+
+DROP TABLE maintenance_logs;
+DROP TABLE dos;
+DROP FUNCTION dos_partitioned_sync();
+DROP FUNCTION maintenance_logs_partitioned_sync();
+DROP FUNCTION partition_backfill_dos(uuid, integer);
+DROP FUNCTION partition_backfill_logs(uuid, integer);
+DROP FUNCTION maintenance_logs_partitioned_insert(uuid[]);
+DROP FUNCTION dos_partitioned_upsert(uuid[]);
+DROP TABLE partition_backfill_state;
+
+ALTER TABLE dos_partitioned RENAME TO dos;
+ALTER TABLE maintenance_logs_partitioned RENAME TO maintenance_logs;
+
+-- Constraint and index names follow the tables (dos_partitioned_pkey -> dos_pkey).
+DO $$
+DECLARE
+  r record;
+BEGIN
+  FOR r IN
+    SELECT c.conrelid::regclass AS tbl, c.conname
+    FROM pg_constraint c
+    WHERE c.conrelid IN ('dos'::regclass, 'maintenance_logs'::regclass) AND c.conname LIKE '%\_partitioned\_%'
+  LOOP
+    EXECUTE format('ALTER TABLE %s RENAME CONSTRAINT %I TO %I', r.tbl, r.conname, replace(r.conname, '_partitioned_', '_'));
+  END LOOP;
+  FOR r IN
+    SELECT i.indexrelid::regclass::text AS name
+    FROM pg_index i
+    WHERE i.indrelid IN ('dos'::regclass, 'maintenance_logs'::regclass)
+      AND i.indexrelid::regclass::text LIKE '%\_partitioned\_%'
+  LOOP
+    EXECUTE format('ALTER INDEX %I RENAME TO %I', r.name, replace(r.name, '_partitioned_', '_'));
+  END LOOP;
+END;
+$$;
+
+CREATE TRIGGER dos_updated_at
+  BEFORE UPDATE ON dos
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+-- The ancestor-path triggers, now looking parents and descendants up within the
+-- owner's partition.
+CREATE OR REPLACE FUNCTION dos_set_ancestor_ids()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+  parent_path uuid[];
+BEGIN
+  IF NEW.parent_id IS NULL THEN
+    NEW.ancestor_ids := '{}';
+    RETURN NEW;
+  END IF;
+
+  PERFORM pg_advisory_xact_lock(hashtextextended('dos_lineage:' || NEW.user_id::text, 0));
+
+  SELECT p.ancestor_ids || p.id INTO parent_path
+  FROM dos p
+  WHERE p.user_id = NEW.user_id AND p.id = NEW.parent_id;
+  IF parent_path IS NULL THEN
+    -- Unknown parent (or another user's): the foreign key rejects the row.
+    NEW.ancestor_ids := '{}';
+    RETURN NEW;
+  END IF;
+  IF NEW.id = ANY (parent_path) THEN
+    RAISE EXCEPTION 'parent_id % would make do % its own ancestor', NEW.parent_id, NEW.id
+      USING ERRCODE = 'check_violation';
+  END IF;
+
+  NEW.ancestor_ids := parent_path;
+  RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION dos_reparent_descendants()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE dos d
+  SET ancestor_ids = NEW.ancestor_ids || NEW.id || d.ancestor_ids[array_position(d.ancestor_ids, NEW.id) + 1:]
+  WHERE d.user_id = NEW.user_id AND d.ancestor_ids @> ARRAY[NEW.id];
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER dos_ancestor_ids
+  BEFORE INSERT OR UPDATE OF parent_id ON dos
+  FOR EACH ROW EXECUTE FUNCTION dos_set_ancestor_ids();
+
+CREATE TRIGGER dos_reparent_descendants
+  AFTER UPDATE OF parent_id ON dos
+  FOR EACH ROW
+  WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+  EXECUTE FUNCTION dos_reparent_descendants();
+
+-- The functions dropped above, with every dos lookup keyed by user_id so it stays in
+-- one partition.
+CREATE FUNCTION dos_board_page(p_user_id uuid, p_units text[], p_limit integer)
+RETURNS SETOF dos
+LANGUAGE sql STABLE AS $$
+  SELECT *
+  FROM dos
+  WHERE user_id = p_user_id
+    AND id IN (
+      SELECT ranked.id
+      FROM (
+        SELECT d.id,
+               row_number() OVER (PARTITION BY d.time_unit ORDER BY d.created_at, d.id) AS rn
+        FROM dos d
+        WHERE d.user_id = p_user_id AND d.time_unit = ANY (p_units)
+      ) ranked
+      WHERE ranked.rn <= p_limit
+    )
+  ORDER BY time_unit, created_at, id;
+$$;
+
+CREATE FUNCTION search_dos(p_user_id uuid, p_query text, p_limit integer, p_offset integer)
+RETURNS SETOF dos
+LANGUAGE sql STABLE AS $$
+  WITH pattern AS (
+    SELECT replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') AS escaped
+  )
+  SELECT d.*
+  FROM dos d, pattern
+  WHERE d.user_id = p_user_id
+    AND d.title ILIKE '%' || pattern.escaped || '%'
+  ORDER BY
+    (d.title ILIKE pattern.escaped || '%') DESC,
+    similarity(d.title, p_query) DESC,
+    d.created_at,
+    d.id
+  LIMIT p_limit OFFSET p_offset;
+$$;
+
+CREATE FUNCTION dos_lineage_components(p_user_id uuid, p_ids uuid[])
+RETURNS SETOF dos
+LANGUAGE sql STABLE AS $$
+  WITH RECURSIVE component(id, parent_id) AS (
+    SELECT d.id, d.parent_id
+    FROM dos d
+    WHERE d.user_id = p_user_id AND d.id = ANY (p_ids)
+    UNION
+    SELECT d.id, d.parent_id
+    FROM component c
+    JOIN dos d ON d.user_id = p_user_id AND (d.parent_id = c.id OR d.id = c.parent_id)
+  )
+  SELECT d.*
+  FROM dos d
+  WHERE d.user_id = p_user_id AND d.id IN (SELECT id FROM component)
+  ORDER BY d.created_at, d.id;
+$$;
+
+CREATE FUNCTION restore_archived_dos(p_user_id uuid, p_ids uuid[])
+RETURNS SETOF dos
+LANGUAGE sql AS $$
+  WITH RECURSIVE chain AS (
+    SELECT a.id, a.parent_id, 0 AS depth
+    FROM dos_archive a
+    WHERE a.user_id = p_user_id AND a.id = ANY (p_ids)
+    UNION
+    SELECT a.id, a.parent_id, chain.depth + 1
+    FROM dos_archive a
+    JOIN chain ON a.id = chain.parent_id
+    WHERE a.user_id = p_user_id
+  ), moved AS (
+    DELETE FROM dos_archive WHERE id IN (SELECT id FROM chain) RETURNING *
+  )
+  INSERT INTO dos (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count,
+    -- A parent that was deleted while its child sat in the archive cannot be linked again.
+    CASE
+      WHEN m.parent_id IN (SELECT id FROM moved)
+        OR EXISTS (SELECT 1 FROM dos p WHERE p.user_id = m.user_id AND p.id = m.parent_id)
+        THEN m.parent_id
+    END,
+    m.priority_date, m.color_hex
+  FROM moved m
+  ORDER BY (SELECT max(c.depth) FROM chain c WHERE c.id = m.id) DESC
+  RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION archive_completed_dos(p_cutoff timestamptz, p_batch integer)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  moved_count integer;
+BEGIN
+  WITH candidates AS (
+    SELECT d.user_id, d.id
+    FROM dos d
+    WHERE d.completed
+      AND d.completed_at < p_cutoff
+      AND d.do_type = 'normal'
+      AND NOT EXISTS (SELECT 1 FROM dos c WHERE c.user_id = d.user_id AND c.parent_id = d.id)
+    ORDER BY d.completed_at
+    LIMIT p_batch
+    FOR UPDATE SKIP LOCKED
+  ), moved AS (
+    DELETE FROM dos WHERE (user_id, id) IN (SELECT user_id, id FROM candidates) RETURNING *
+  )
+  INSERT INTO dos_archive (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex,
+    ancestor_ids, archived_at
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count, m.parent_id, m.priority_date, m.color_hex,
+    m.ancestor_ids, now()
+  FROM moved m;
+
+  GET DIAGNOSTICS moved_count = ROW_COUNT;
+  RETURN moved_count;
+END;
+$$;
+
+NOTIFY pgrst, 'reload schema';
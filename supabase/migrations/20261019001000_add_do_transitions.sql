@@ -0,0 +1,94 @@
+-- An append-only log of flow-up transitions, and two rollups kept current from it.
+--
+-- Flow-up inserts one row per do that moved to a new time unit, in one statement per
+-- partition it processed. A statement-level trigger folds each batch into:
+--
+--   do_transition_daily    one row per (user, UTC day, from_unit, to_unit): how many
+--                          dos moved and how many days they had spent in from_unit;
+--                          read by GET /dos/analytics/flow.
+--   do_transition_summary  one row per (user, do, from_unit): how often the do left
+--                          that unit and when it last did; read by GET /dos/{id}/history.
+--
+-- Neither endpoint reads do_transitions itself, which is kept for auditing and for
+-- rebuilding the rollups. Rows are never updated or deleted by the application, and
+-- the log is not tied to dos by a foreign key so it outlives deleted dos.
+
+CREATE TABLE do_transitions (
+  id              bigint      GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  user_id         uuid        NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  do_id           uuid        NOT NULL,
+  from_unit       text        NOT NULL,
+  to_unit         text        NOT NULL,
+  days_in_unit    integer     NOT NULL,
+  transitioned_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX do_transitions_user_do_idx ON do_transitions (user_id, do_id, transitioned_at);
+ALTER TABLE do_transitions ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own transitions"
+  ON do_transitions FOR SELECT USING (auth.uid() = user_id);
+
+CREATE TABLE do_transition_daily (
+  user_id      uuid    NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  day          date    NOT NULL,
+  from_unit    text    NOT NULL,
+  to_unit      text    NOT NULL,
+  transitions  integer NOT NULL,
+  days_in_unit bigint  NOT NULL,
+  PRIMARY KEY (user_id, day, from_unit, to_unit)
+);
+ALTER TABLE do_transition_daily ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own daily transitions"
+  ON do_transition_daily FOR SELECT USING (auth.uid() = user_id);
+
+CREATE TABLE do_transition_summary (
+  user_id           uuid        NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  do_id             uuid        NOT NULL,
+  from_unit         text        NOT NULL,
+  to_unit           text        NOT NULL,
+  transitions       integer     NOT NULL,
+  days_in_unit      bigint      NOT NULL,
+  last_days_in_unit integer     NOT NULL,
+  last_at           timestamptz NOT NULL,
+  PRIMARY KEY (user_id, do_id, from_unit)
+);
+ALTER TABLE do_transition_summary ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can view their own transition summaries"
+  ON do_transition_summary FOR SELECT USING (auth.uid() = user_id);
+
+-- Fold one inserted batch into both rollups: two upserts per statement, however many
+-- rows it carried.
+CREATE FUNCTION do_transitions_rollup()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO do_transition_daily AS r (user_id, day, from_unit, to_unit, transitions, days_in_unit)
+  SELECT n.user_id, (n.transitioned_at AT TIME ZONE 'UTC')::date, n.from_unit, n.to_unit, count(*), sum(n.days_in_unit)
+  FROM new_rows n
+  GROUP BY 1, 2, 3, 4
+  ON CONFLICT (user_id, day, from_unit, to_unit) DO UPDATE
+  SET transitions = r.transitions + EXCLUDED.transitions,
+      days_in_unit = r.days_in_unit + EXCLUDED.days_in_unit;
+
+  INSERT INTO do_transition_summary AS s (
+    user_id, do_id, from_unit, to_unit, transitions, days_in_unit, last_days_in_unit, last_at
+  )
+  SELECT DISTINCT ON (n.user_id, n.do_id, n.from_unit)
+    n.user_id, n.do_id, n.from_unit, n.to_unit,
+    count(*) OVER w, sum(n.days_in_unit) OVER w, n.days_in_unit, n.transitioned_at
+  FROM new_rows n
+  WINDOW w AS (PARTITION BY n.user_id, n.do_id, n.from_unit)
+  ORDER BY n.user_id, n.do_id, n.from_unit, n.transitioned_at DESC
+  ON CONFLICT (user_id, do_id, from_unit) DO UPDATE
+  SET to_unit = EXCLUDED.to_unit,
+      transitions = s.transitions + EXCLUDED.transitions,
+      days_in_unit = s.days_in_unit + EXCLUDED.days_in_unit,
+      last_days_in_unit = EXCLUDED.last_days_in_unit,
+      last_at = EXCLUDED.last_at;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER do_transitions_rollup
+  AFTER INSERT ON do_transitions
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION do_transitions_rollup();
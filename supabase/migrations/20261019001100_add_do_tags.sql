@@ -0,0 +1,130 @@
+-- Tags on dos: a text[] column with a GIN index, so GET /dos?tags=a,b filters in the
+-- database (`tags @> '{a,b}'` for match=all, `tags && '{a,b}'` for match=any) and
+-- the sidebar counts come from one aggregate. The API stores tags lower-cased,
+-- de-duplicated and sorted.
+--
+-- Adding a column with a constant default doesn't rewrite the table. The index is
+-- built on every partition of dos inside this migration; on a large database,
+-- create it on each partition with CREATE INDEX CONCURRENTLY and attach them first.
+
+ALTER TABLE dos ADD COLUMN tags text[] NOT NULL DEFAULT '{}';
+ALTER TABLE dos_archive ADD COLUMN tags text[] NOT NULL DEFAULT '{}';
+
+CREATE INDEX IF NOT EXISTS dos_tags_idx ON dos USING gin (tags);
+
+-- How many of a user's dos carry each tag, most used first.
+CREATE FUNCTION dos_tag_counts(p_user_id uuid)
+RETURNS TABLE (tag text, count bigint)
+LANGUAGE sql STABLE AS $$
+  SELECT t.tag, count(*)
+  FROM dos d, unnest(d.tags) AS t(tag)
+  WHERE d.user_id = p_user_id
+  GROUP BY t.tag
+  ORDER BY count(*) DESC, t.tag;
+$$;
+
+-- A do's tags with p_add added and p_remove removed, normalized as the API stores them.
+CREATE FUNCTION dos_merge_tags(p_tags text[], p_add text[], p_remove text[])
+RETURNS text[]
+LANGUAGE sql IMMUTABLE AS $$
+  SELECT ARRAY(
+    SELECT DISTINCT t.tag
+    FROM unnest(p_tags || p_add) AS t(tag)
+    WHERE t.tag <> ALL (p_remove)
+    ORDER BY t.tag
+  );
+$$;
+
+-- Add and remove tags on many of a user's dos in one statement. A tag in both lists
+-- is removed. Dos that would end up with more than p_max_tags tags are left as they
+-- are; returns how many dos were updated and how many were left over the limit.
+CREATE FUNCTION dos_update_tags(p_user_id uuid, p_ids uuid[], p_add text[], p_remove text[], p_max_tags integer)
+RETURNS TABLE (updated integer, over_limit integer)
+LANGUAGE sql AS $$
+  WITH changed AS (
+    UPDATE dos d
+    SET tags = dos_merge_tags(d.tags, p_add, p_remove)
+    WHERE d.user_id = p_user_id
+      AND d.id = ANY (p_ids)
+      AND cardinality(dos_merge_tags(d.tags, p_add, p_remove)) <= p_max_tags
+    RETURNING 1
+  )
+  SELECT
+    (SELECT count(*)::integer FROM changed),
+    (SELECT count(*)::integer FROM dos d
+     WHERE d.user_id = p_user_id
+       AND d.id = ANY (p_ids)
+       AND cardinality(dos_merge_tags(d.tags, p_add, p_remove)) > p_max_tags);
+$$;
+
+-- The archive keeps a do's tags and gives them back on restore.
+CREATE OR REPLACE FUNCTION archive_completed_dos(p_cutoff timestamptz, p_batch integer)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  moved_count integer;
+BEGIN
+  WITH candidates AS (
+    SELECT d.user_id, d.id
+    FROM dos d
+    WHERE d.completed
+      AND d.completed_at < p_cutoff
+      AND d.do_type = 'normal'
+      AND NOT EXISTS (SELECT 1 FROM dos c WHERE c.user_id = d.user_id AND c.parent_id = d.id)
+    ORDER BY d.completed_at
+    LIMIT p_batch
+    FOR UPDATE SKIP LOCKED
+  ), moved AS (
+    DELETE FROM dos WHERE (user_id, id) IN (SELECT user_id, id FROM candidates) RETURNING *
+  )
+  INSERT INTO dos_archive (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex,
+    ancestor_ids, tags, archived_at
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count, m.parent_id, m.priority_date, m.color_hex,
+    m.ancestor_ids, m.tags, now()
+  FROM moved m;
+
+  GET DIAGNOSTICS moved_count = ROW_COUNT;
+  RETURN moved_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION restore_archived_dos(p_user_id uuid, p_ids uuid[])
+RETURNS SETOF dos
+LANGUAGE sql AS $$
+  WITH RECURSIVE chain AS (
+    SELECT a.id, a.parent_id, 0 AS depth
+    FROM dos_archive a
+    WHERE a.user_id = p_user_id AND a.id = ANY (p_ids)
+    UNION
+    SELECT a.id, a.parent_id, chain.depth + 1
+    FROM dos_archive a
+    JOIN chain ON a.id = chain.parent_id
+    WHERE a.user_id = p_user_id
+  ), moved AS (
+    DELETE FROM dos_archive WHERE id IN (SELECT id FROM chain) RETURNING *
+  )
+  INSERT INTO dos (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex, tags
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count,
+    -- A parent that was deleted while its child sat in the archive cannot be linked again.
+    CASE
+      WHEN m.parent_id IN (SELECT id FROM moved)
+        OR EXISTS (SELECT 1 FROM dos p WHERE p.user_id = m.user_id AND p.id = m.parent_id)
+        THEN m.parent_id
+    END,
+    m.priority_date, m.color_hex, m.tags
+  FROM moved m
+  ORDER BY (SELECT max(c.depth) FROM chain c WHERE c.id = m.id) DESC
+  RETURNING *;
+$$;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,28 @@
+-- Flow-up writes through a guarded UPDATE instead of an upsert.
+--
+-- The scan may come from a read replica, so a row it saw can have been edited or
+-- deleted on the primary since. Each update only sets the columns flow-up owns, and
+-- only on a row whose time_unit and updated_at (bumped by the dos_updated_at trigger
+-- on every write) are still what the scan saw; anything else is left for the next
+-- run. Nothing is ever inserted. Returns the ids that were updated, so transitions
+-- are logged only for dos that actually moved.
+
+CREATE FUNCTION dos_apply_flow_up(p_updates jsonb)
+RETURNS TABLE (id uuid)
+LANGUAGE sql AS $$
+  UPDATE dos d
+  SET time_unit = u.time_unit,
+      flow_count = u.flow_count,
+      days_in_unit = u.days_in_unit
+  FROM jsonb_to_recordset(p_updates) AS u(
+    id uuid, user_id uuid, time_unit text, flow_count integer, days_in_unit integer,
+    expected_time_unit text, expected_updated_at timestamptz
+  )
+  WHERE d.user_id = u.user_id
+    AND d.id = u.id
+    AND d.time_unit = u.expected_time_unit
+    AND d.updated_at = u.expected_updated_at
+  RETURNING d.id;
+$$;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,82 @@
+-- Restored dos stay restored.
+--
+-- A do comes back from the archive still completed, with its old completed_at, so
+-- the next archive run would move it straight back. restore_archived_dos now stamps
+-- restored_at, and archive_completed_dos leaves a do alone until both its completion
+-- and its restore are older than the cutoff. The archive doesn't keep restored_at:
+-- a do archived again is restored with a fresh one.
+
+ALTER TABLE dos ADD COLUMN restored_at timestamptz;
+
+CREATE OR REPLACE FUNCTION archive_completed_dos(p_cutoff timestamptz, p_batch integer)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  moved_count integer;
+BEGIN
+  WITH candidates AS (
+    SELECT d.user_id, d.id
+    FROM dos d
+    WHERE d.completed
+      AND d.completed_at < p_cutoff
+      AND d.do_type = 'normal'
+      AND (d.restored_at IS NULL OR d.restored_at < p_cutoff)
+      AND NOT EXISTS (SELECT 1 FROM dos c WHERE c.user_id = d.user_id AND c.parent_id = d.id)
+    ORDER BY d.completed_at
+    LIMIT p_batch
+    FOR UPDATE SKIP LOCKED
+  ), moved AS (
+    DELETE FROM dos WHERE (user_id, id) IN (SELECT user_id, id FROM candidates) RETURNING *
+  )
+  INSERT INTO dos_archive (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex,
+    ancestor_ids, tags, archived_at
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count, m.parent_id, m.priority_date, m.color_hex,
+    m.ancestor_ids, m.tags, now()
+  FROM moved m;
+
+  GET DIAGNOSTICS moved_count = ROW_COUNT;
+  RETURN moved_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION restore_archived_dos(p_user_id uuid, p_ids uuid[])
+RETURNS SETOF dos
+LANGUAGE sql AS $$
+  WITH RECURSIVE chain AS (
+    SELECT a.id, a.parent_id, 0 AS depth
+    FROM dos_archive a
+    WHERE a.user_id = p_user_id AND a.id = ANY (p_ids)
+    UNION
+    SELECT a.id, a.parent_id, chain.depth + 1
+    FROM dos_archive a
+    JOIN chain ON a.id = chain.parent_id
+    WHERE a.user_id = p_user_id
+  ), moved AS (
+    DELETE FROM dos_archive WHERE id IN (SELECT id FROM chain) RETURNING *
+  )
+  INSERT INTO dos (
+    id, user_id, title, time_unit, completed, completed_at, days_in_unit, flow_count,
+    created_at, updated_at, do_type, completion_count, parent_id, priority_date, color_hex, tags,
+    restored_at
+  )
+  SELECT
+    m.id, m.user_id, m.title, m.time_unit, m.completed, m.completed_at, m.days_in_unit, m.flow_count,
+    m.created_at, m.updated_at, m.do_type, m.completion_count,
+    -- A parent that was deleted while its child sat in the archive cannot be linked again.
+    CASE
+      WHEN m.parent_id IN (SELECT id FROM moved)
+        OR EXISTS (SELECT 1 FROM dos p WHERE p.user_id = m.user_id AND p.id = m.parent_id)
+        THEN m.parent_id
+    END,
+    m.priority_date, m.color_hex, m.tags, now()
+  FROM moved m
+  ORDER BY (SELECT max(c.depth) FROM chain c WHERE c.id = m.id) DESC
+  RETURNING *;
+$$;
+
+NOTIFY pgrst, 'reload schema';
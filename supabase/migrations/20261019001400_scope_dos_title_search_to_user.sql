@@ -0,0 +1,14 @@
+-- Title search over one user's dos.
+--
+-- dos_title_trgm_idx indexed every user's titles, so search_dos matched the pattern
+-- against the whole partition's trigram postings before filtering on user_id. With
+-- btree_gin, user_id goes into the same GIN index: a search only reads the postings
+-- of its own user's titles, and a query too short to yield trigrams still narrows
+-- by user_id. The index is built on every partition of dos inside this migration; on
+-- a large database, create it on each partition with CREATE INDEX CONCURRENTLY and
+-- attach them first.
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+CREATE INDEX IF NOT EXISTS dos_user_title_trgm_idx ON dos USING gin (user_id, title gin_trgm_ops);
+DROP INDEX IF EXISTS dos_title_trgm_idx;
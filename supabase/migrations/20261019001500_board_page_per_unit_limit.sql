@@ -0,0 +1,24 @@
+-- The first p_limit dos of each requested time_unit, read one unit at a time.
+--
+-- dos_board_page ranked every one of the user's dos in the requested units with
+-- row_number() before keeping p_limit per unit, so a board read grew with the size of
+-- each column rather than with p_limit. Each unit is now a LIMIT p_limit scan of
+-- dos_user_time_unit_created_at_idx in (created_at, id) order, which stops after
+-- p_limit rows.
+
+CREATE OR REPLACE FUNCTION dos_board_page(p_user_id uuid, p_units text[], p_limit integer)
+RETURNS SETOF dos
+LANGUAGE sql STABLE AS $$
+  SELECT page.*
+  FROM (SELECT DISTINCT unit FROM unnest(p_units) AS unit) units
+  CROSS JOIN LATERAL (
+    SELECT d.*
+    FROM dos d
+    WHERE d.user_id = p_user_id AND d.time_unit = units.unit
+    ORDER BY d.created_at, d.id
+    LIMIT p_limit
+  ) page
+  ORDER BY page.time_unit, page.created_at, page.id;
+$$;
+
+NOTIFY pgrst, 'reload schema';